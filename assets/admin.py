@@ -1,8 +1,10 @@
 from django.contrib import admin
 
-from .models import Asset, Network, Balance, Transaction
+from .models import Asset, Network, Balance, BalanceEntry, PortfolioSnapshot, Transaction
 
 admin.site.register(Asset)
 admin.site.register(Network)
 admin.site.register(Balance)
-admin.site.register(Transaction)
\ No newline at end of file
+admin.site.register(Transaction)
+admin.site.register(BalanceEntry)
+admin.site.register(PortfolioSnapshot)
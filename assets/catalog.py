@@ -0,0 +1,100 @@
+"""
+Diff-based sync of the asset/network catalog.
+
+``sync_catalog()`` loads the current catalog in a few queries, diffs it
+against the desired state and applies only the difference in bulk: one
+upsert per table for new rows, one bulk_update per table for changed rows,
+and one insert plus one delete for ``Asset.networks`` links. The statement
+count does not depend on catalog size.
+"""
+from django.db import transaction
+
+from assets.models import Asset, Network
+
+NETWORK_FIELDS = ("full_name", "confirmations", "min_deposit_amount", "apr_low", "apr_high")
+ASSET_FIELDS = ("name", "fiat", "staking")
+
+
+def _normalize(model, fields, values):
+    return {name: model._meta.get_field(name).to_python(values[name]) for name in fields if name in values}
+
+
+def _sync_rows(model, key, fields, desired, stats):
+    """Upserts ``desired`` ({key: {field: value}}) and returns {key: pk}."""
+    existing = {getattr(obj, key): obj for obj in model.objects.filter(**{f"{key}__in": list(desired)})}
+    to_create, to_update, changed_fields = [], [], set()
+    for value, wanted in desired.items():
+        wanted = _normalize(model, fields, wanted)
+        obj = existing.get(value)
+        if obj is None:
+            to_create.append(model(**{key: value}, **wanted))
+            continue
+        diff = {name: v for name, v in wanted.items() if getattr(obj, name) != v}
+        if diff:
+            for name, v in diff.items():
+                setattr(obj, name, v)
+            to_update.append(obj)
+            changed_fields.update(diff)
+
+    if to_create:
+        # Upsert rather than insert so a concurrent sync cannot make us fail
+        model.objects.bulk_create(
+            to_create, update_conflicts=True, unique_fields=[key], update_fields=list(fields),
+        )
+    if to_update:
+        model.objects.bulk_update(to_update, sorted(changed_fields))
+
+    label = model._meta.model_name
+    stats[f"{label}_created"] = len(to_create)
+    stats[f"{label}_updated"] = len(to_update)
+    stats[f"{label}_unchanged"] = len(desired) - len(to_create) - len(to_update)
+    if not to_create:
+        return {value: obj.pk for value, obj in existing.items()}
+    return dict(model.objects.filter(**{f"{key}__in": list(desired)}).values_list(key, "pk"))
+
+
+@transaction.atomic
+def sync_catalog(networks, assets) -> dict:
+    """
+    ``networks``: {name: {field: value}} for NETWORK_FIELDS.
+    ``assets``: {symbol: {field: value, "networks": [name, ...] | None}};
+    a ``networks`` list replaces the asset's links, None leaves them alone.
+
+    Rows not mentioned are left untouched. Returns per-table counts.
+    """
+    stats = {}
+    network_ids = _sync_rows(Network, "name", NETWORK_FIELDS, networks, stats)
+    asset_ids = _sync_rows(Asset, "symbol", ASSET_FIELDS, assets, stats)
+
+    managed = {asset_ids[symbol] for symbol, spec in assets.items() if spec.get("networks") is not None}
+    missing = {
+        name for spec in assets.values() for name in spec.get("networks") or () if name not in network_ids
+    }
+    if missing:
+        network_ids.update(Network.objects.filter(name__in=missing).values_list("name", "pk"))
+    unknown = missing - set(network_ids)
+    if unknown:
+        raise ValueError(f"Unknown network(s): {', '.join(sorted(unknown))}")
+
+    desired_links = {
+        (asset_ids[symbol], network_ids[name])
+        for symbol, spec in assets.items() if spec.get("networks") is not None
+        for name in spec["networks"]
+    }
+    Link = Asset.networks.through
+    current = {
+        (asset_id, network_id): pk
+        for pk, asset_id, network_id in Link.objects.filter(asset_id__in=managed).values_list("pk", "asset_id", "network_id")
+    }
+    to_add = desired_links - set(current)
+    to_remove = [pk for pair, pk in current.items() if pair not in desired_links]
+    if to_add:
+        Link.objects.bulk_create(
+            [Link(asset_id=asset_id, network_id=network_id) for asset_id, network_id in sorted(to_add)],
+            ignore_conflicts=True,
+        )
+    if to_remove:
+        Link.objects.filter(pk__in=to_remove).delete()
+    stats["links_added"] = len(to_add)
+    stats["links_removed"] = len(to_remove)
+    return stats
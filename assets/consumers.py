@@ -1,22 +1,78 @@
 # app_name/consumers.py
 import asyncio
 import contextlib
+import logging
+import time
 from decimal import Decimal, ROUND_DOWN
 
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
-from asgiref.sync import sync_to_async
 from urllib.parse import parse_qs
 
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from django.contrib.auth.models import AnonymousUser
+from django.db.models import Sum
 
-from assets.models import Balance, Quote
+from assets.models import Asset, Balance, Quote
+from assets.rates import get_rates
+from core import metrics
+from core.executors import database_sync_to_async
+from core.ws_auth import authenticate_token
+
+logger = logging.getLogger(__name__)
 
 DECIMAL_PLACES = Decimal("0.01")
-jwt_auth = JWTAuthentication()
+PUSH_INTERVAL = 2  # default seconds between balance pushes per connection
+PUSH_MIN_INTERVAL = 1  # bounds for {"action": "interval"}
+PUSH_MAX_INTERVAL = 300
+HEARTBEAT_INTERVAL = 20  # seconds between server pings to clients that answer them
+HEARTBEAT_TIMEOUT = 60  # such a client silent for this long is closed as dead
+PONG_LAG_LIMIT = 10  # a ping unanswered this long means the client is not reading
+CLOSE_DEAD = 4008
+
+QUOTE_MIN_INTERVAL = 0.25  # at most 4 ticker messages per second per connection
+QUOTE_MAX_SYMBOLS = 50
+
+
+def quotes_group(symbol: str) -> str:
+    return f"quotes.{symbol.upper()}"
+
+
+def quote_ticker(quote, symbol: str) -> dict:
+    """The wire format of one ticker; built once per Quote write, not per socket."""
+    return {
+        "symbol": symbol,
+        "bid": str(quote.bid),
+        "ask": str(quote.ask),
+        "lp": str(quote.lp) if quote.lp is not None else None,
+        "perc_24": quote.perc_24,
+        "time": quote.time.isoformat() if quote.time else None,
+    }
 
 
 class BalanceStreamConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Total balance in the user's preferred currency, pushed every few seconds.
+
+    Server -> {"value": "123.45", "currency": "EUR"}      every interval
+              {"type": "ping"} | {"type": "pong"} | {"type": "error", "error": "..."}
+    Client -> {"action": "interval", "seconds": 10}       push interval, within
+                                                          PUSH_MIN/MAX_INTERVAL
+              {"action": "pause"} | {"action": "resume"}  e.g. on visibilitychange
+              {"action": "ping"} | {"action": "pong"}
+
+    A paused connection does no balance work at all: its task sleeps until
+    resume (which pushes at once) or the next heartbeat. Clients that never
+    send anything get the original fixed-interval stream. Once a client has
+    sent any message it is pinged every HEARTBEAT_INTERVAL and closed with
+    CLOSE_DEAD if it stays silent for HEARTBEAT_TIMEOUT. The task never
+    waits longer than HEARTBEAT_INTERVAL, whatever the push interval.
+
+    daphne buffers sends without blocking, so the only sign of a client that
+    has stopped reading is its pong: the ping is queued behind every push
+    before it. While a ping has been unanswered for PONG_LAG_LIMIT, pushes
+    are skipped instead of piling up in the buffer, and the current total
+    is pushed as soon as the pong arrives. Clients that don't answer pings
+    can't be told apart from idle ones and are not throttled.
+    """
+
     async def connect(self):
         user = self.scope.get("user")
 
@@ -24,29 +80,124 @@ class BalanceStreamConsumer(AsyncJsonWebsocketConsumer):
         if not user or getattr(user, "is_anonymous", True):
             token = self._extract_bearer_from_headers() or self._extract_token_from_query()
             if token:
-                user = await self._authenticate_token(token)
+                user = await authenticate_token(token)
 
         if not user or getattr(user, "is_anonymous", True):
             await self.close(code=4001)
             return
 
         self.user = user
+        self.interval = PUSH_INTERVAL
+        self._active = asyncio.Event()
+        self._active.set()
+        self._wakeup = asyncio.Event()
+        self._behind = False
+        self._heartbeats = False
+        self._last_seen = self._last_ping = time.monotonic()
+        self._ping_pending = None  # when the unanswered ping was sent
         await self.accept()
+        metrics.ws_connections.inc("balances")
         self._task = asyncio.create_task(self._loop_push())
 
     async def disconnect(self, code):
+        task = getattr(self, "_task", None)
+        if task is None:
+            return
+        metrics.ws_connections.dec("balances")
+        if not self._active.is_set():
+            metrics.ws_paused.dec("balances")
         with contextlib.suppress(Exception):
-            self._task.cancel()
+            task.cancel()
+
+    async def receive_json(self, content, **kwargs):
+        self._last_seen = time.monotonic()
+        self._heartbeats = True
+        action = content.get("action") if isinstance(content, dict) else None
+
+        if action == "pause":
+            if self._active.is_set():
+                self._active.clear()
+                metrics.ws_paused.inc("balances")
+        elif action == "resume":
+            if not self._active.is_set():
+                self._active.set()
+                metrics.ws_paused.dec("balances")
+                self._wakeup.set()
+        elif action == "interval":
+            try:
+                seconds = float(content.get("seconds"))
+            except (TypeError, ValueError):
+                seconds = float("nan")
+            if not PUSH_MIN_INTERVAL <= seconds <= PUSH_MAX_INTERVAL:
+                await self.send_json({
+                    "type": "error",
+                    "error": f"seconds must be between {PUSH_MIN_INTERVAL} and {PUSH_MAX_INTERVAL}",
+                })
+                return
+            self.interval = seconds
+            self._wakeup.set()  # restart the wait with the new interval
+        elif action == "ping":
+            await self.send_json({"type": "pong"})
+        elif action == "pong":
+            self._ping_pending = None
+            if self._behind:
+                # Caught up with everything sent before the ping: push the current total now
+                self._behind = False
+                self._wakeup.set()
+        else:
+            await self.send_json({"type": "error", "error": "Expected {action: interval|pause|resume|ping|pong}"})
 
     async def _loop_push(self):
         try:
+            next_push = time.monotonic()
             while True:
-                payload = await self._compute_total_value_with_rate(self.user.id)
-                await self.send_json(payload)
-                await asyncio.sleep(2)
+                # Due, or woken early by resume, a new interval or a caught-up client
+                if self._active.is_set() and (self._wakeup.is_set() or time.monotonic() >= next_push):
+                    self._wakeup.clear()
+                    await self._push()
+                    next_push = time.monotonic() + self.interval
+                if not await self._heartbeat():
+                    return
+                # Paused connections only wake for resume and the heartbeat
+                timeout = HEARTBEAT_INTERVAL
+                if self._active.is_set():
+                    timeout = min(timeout, max(0, next_push - time.monotonic()))
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
         except asyncio.CancelledError:
             pass
 
+    async def _push(self):
+        if self._ping_pending is not None and time.monotonic() - self._ping_pending >= PONG_LAG_LIMIT:
+            # Not reading: don't add to what is already waiting in the transport
+            self._behind = True
+            metrics.ws_skipped.inc("balances")
+            return
+        payload = await self._compute_total_value_with_rate(self.user.id)
+        await self.send_json(payload)
+        metrics.ws_pushes.inc("balances")
+
+    async def _heartbeat(self) -> bool:
+        """Ping heartbeat-aware clients; False once the connection was closed as dead."""
+        if not self._heartbeats:
+            return True
+        now = time.monotonic()
+        if now - self._last_seen > HEARTBEAT_TIMEOUT:
+            await self._reap()
+            return False
+        if now - self._last_ping >= HEARTBEAT_INTERVAL:
+            self._last_ping = now
+            if self._ping_pending is None:
+                self._ping_pending = now
+            await self.send_json({"type": "ping"})
+        return True
+
+    async def _reap(self):
+        logger.info("Closing balance stream for user %s: silent for %ss", self.user.id, HEARTBEAT_TIMEOUT)
+        metrics.ws_reaped.inc("balances")
+        with contextlib.suppress(Exception):
+            await self.close(code=CLOSE_DEAD)
+
     # -------- auth helpers --------
     def _extract_bearer_from_headers(self):
         headers = dict(self.scope.get("headers") or [])
@@ -71,75 +222,128 @@ class BalanceStreamConsumer(AsyncJsonWebsocketConsumer):
         except Exception:
             return None
 
-    @sync_to_async
-    def _authenticate_token(self, token: str):
-        try:
-            validated = jwt_auth.get_validated_token(token)
-            return jwt_auth.get_user(validated)
-        except Exception:
-            return AnonymousUser()
-
     # -------- data logic --------
-    @sync_to_async
+    @database_sync_to_async
     def _compute_total_value_with_rate(self, user_id: int) -> dict:
         """
         Compute total balances in user's preferred currency.
         Returns: { value: "123.45", currency: "EUR" }
+
+        Both queries and a possible rate matrix rebuild run as one call on the
+        DB pool, so each push costs a single thread handoff.
         """
         from users.models import User  # import user model here
 
-        total_usd = Decimal("0")
-
-        # sum all balances in USD
-        balances = (
-            Balance.objects.select_related("asset")
-            .filter(user_id=user_id)
-            .only("available", "asset_id")
+        amounts = dict(
+            Balance.objects.filter(user_id=user_id)
+            .with_live_available()
+            .values("asset_id")
+            .annotate(total=Sum("live_available"))
+            .values_list("asset_id", "total")
         )
 
-        for bal in balances:
-            q = (
-                Quote.objects.filter(asset_id=bal.asset_id)
-                .order_by("-time")
-                .only("value_in_usd")
-                .first()
-            )
-            if not q or q.value_in_usd is None:
-                continue
-            try:
-                total_usd += Decimal(bal.available) * Decimal(q.value_in_usd)
-            except Exception:
-                continue
-
         # get user's preferred fiat
         user = User.objects.filter(id=user_id).select_related("preferred_currency").first()
-        fiat_asset = user.preferred_currency if user and user.preferred_currency else None
-
-        if not fiat_asset:
-            # fallback to USD
-            return {
-                "value": str(total_usd.quantize(DECIMAL_PLACES, rounding=ROUND_DOWN)),
-                "currency": "USD",
-            }
-
-        # get latest quote for fiat asset
-        fiat_quote = (
-            Quote.objects.filter(asset_id=fiat_asset.id)
-            .order_by("-time")
-            .only("value_in_usd")
-            .first()
-        )
-
-        if not fiat_quote or not fiat_quote.value_in_usd:
-            rate = Decimal("1")
-        else:
-            rate = Decimal(fiat_quote.value_in_usd)
-
-        # convert USD to fiat
-        total_fiat = total_usd / rate
+        currency = user.preferred_currency.symbol if user and user.preferred_currency else "USD"
 
+        rates = get_rates()
+        total = rates.total(amounts, currency)
+        if total is None:
+            # No rate for the preferred currency: fall back to USD
+            currency, total = "USD", rates.total(amounts, "USD")
 
         return {
-            "value": str(total_fiat.quantize(DECIMAL_PLACES, rounding=ROUND_DOWN)),
-            "currency": fiat_asset.symbol,
+            "value": str(Decimal(repr(total)).quantize(DECIMAL_PLACES, rounding=ROUND_DOWN)),
+            "currency": currency,
         }
+
+
+class QuoteStreamConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Public ticker stream.
+
+    Client -> {"action": "subscribe" | "unsubscribe", "symbols": ["BTC", ...]}
+    Server -> {"type": "snapshot", "data": [ticker, ...]}  on subscribe
+              {"type": "ticker", "data": [ticker, ...]}    coalesced updates
+              {"type": "error", "error": "..."}
+
+    Each Quote write is broadcast once to the "quotes.<SYMBOL>" group (see
+    assets.signals). Per connection, updates are coalesced to the latest
+    ticker per symbol and flushed at most every QUOTE_MIN_INTERVAL seconds.
+    """
+
+    async def connect(self):
+        self.symbols = set()
+        self._pending = {}
+        self._wakeup = asyncio.Event()
+        await self.accept()
+        metrics.ws_connections.inc("quotes")
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def disconnect(self, code):
+        task = getattr(self, "_task", None)
+        if task is None:
+            return
+        metrics.ws_connections.dec("quotes")
+        task.cancel()
+        for symbol in self.symbols:
+            await self.channel_layer.group_discard(quotes_group(symbol), self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        action = content.get("action") if isinstance(content, dict) else None
+        symbols = content.get("symbols") if isinstance(content, dict) else None
+        if action not in ("subscribe", "unsubscribe") or not isinstance(symbols, list):
+            await self.send_json({"type": "error", "error": "Expected {action: subscribe|unsubscribe, symbols: [...]}"})
+            return
+        symbols = {str(symbol).upper() for symbol in symbols if symbol}
+
+        if action == "unsubscribe":
+            for symbol in symbols & self.symbols:
+                await self.channel_layer.group_discard(quotes_group(symbol), self.channel_name)
+                self._pending.pop(symbol, None)
+            self.symbols -= symbols
+            return
+
+        new = symbols - self.symbols
+        if len(self.symbols) + len(new) > QUOTE_MAX_SYMBOLS:
+            await self.send_json({"type": "error", "error": f"At most {QUOTE_MAX_SYMBOLS} symbols per connection"})
+            return
+        known = await self._known_symbols(new)
+        for symbol in known:
+            await self.channel_layer.group_add(quotes_group(symbol), self.channel_name)
+        self.symbols |= known
+        if new - known:
+            await self.send_json({"type": "error", "error": f"Unknown symbol(s): {', '.join(sorted(new - known))}"})
+        # Subscribe first, then snapshot: an update racing the snapshot is sent again, not lost
+        snapshot = await self._snapshot(known)
+        if snapshot:
+            await self.send_json({"type": "snapshot", "data": snapshot})
+
+    async def quote_update(self, event):
+        ticker = event["ticker"]
+        if ticker["symbol"] in self.symbols:
+            self._pending[ticker["symbol"]] = ticker
+            self._wakeup.set()
+
+    async def _flush_loop(self):
+        try:
+            while True:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                if self._pending:
+                    data, self._pending = list(self._pending.values()), {}
+                    await self.send_json({"type": "ticker", "data": data})
+                    metrics.ws_pushes.inc("quotes")
+                await asyncio.sleep(QUOTE_MIN_INTERVAL)
+        except asyncio.CancelledError:
+            pass
+
+    @database_sync_to_async
+    def _known_symbols(self, symbols):
+        return set(Asset.objects.filter(symbol__in=symbols).values_list("symbol", flat=True))
+
+    @database_sync_to_async
+    def _snapshot(self, symbols):
+        assets = dict(Asset.objects.filter(symbol__in=symbols).values_list("pk", "symbol"))
+        quotes = Quote.objects.latest_by_asset(assets)
+        return [quote_ticker(quote, assets[asset_id]) for asset_id, quote in sorted(quotes.items())]
@@ -0,0 +1,159 @@
+"""
+BIP32/BIP44 derivation of deposit addresses.
+
+Each secp256k1 network has one seed. The web tier only holds the account's
+extended public key (the xpub at m/44'/<coin>'/0', settings.HD_XPUBS) and
+derives the deposit address for an index from it (m/44'/<coin>'/0'/0/<index>):
+one HMAC and one point addition per address, with no secret to generate,
+encrypt or store. Private keys are derived from the seed (settings.HD_SEEDS)
+only when a withdrawal is signed, so HD_SEEDS belongs on the signer, not on
+the web servers.
+
+SOL keys are ed25519, which has no public child derivation, so SOL keeps
+per-address keys (see AddressService).
+"""
+import functools
+import hashlib
+import hmac
+import struct
+from dataclasses import dataclass
+
+import base58
+from coincurve import PrivateKey, PublicKey
+from django.conf import settings
+
+from assets.keys import CURVE_ORDER, encode_address, export_private_key, hash160
+
+HARDENED = 0x80000000
+XPUB_VERSION = bytes.fromhex("0488b21e")
+XPRV_VERSION = bytes.fromhex("0488ade4")
+
+# SLIP-44 coin types of the networks derived here
+COIN_TYPES = {"BTC": 0, "LTC": 2, "ETH": 60, "TRX": 195}
+EXTERNAL_CHAIN = 0
+
+
+class HDKeyError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class ExtendedKey:
+    """A BIP32 node: a 32-byte secret or a 33-byte compressed public key, plus its chain code."""
+
+    key: bytes
+    chain_code: bytes
+    depth: int = 0
+    parent_fingerprint: bytes = b"\x00" * 4
+    child_number: int = 0
+
+    @classmethod
+    def from_seed(cls, seed: bytes) -> "ExtendedKey":
+        digest = hmac.new(b"Bitcoin seed", seed, hashlib.sha512).digest()
+        secret = digest[:32]
+        if not 0 < int.from_bytes(secret, "big") < CURVE_ORDER:
+            raise HDKeyError("Seed yields an invalid master key")
+        return cls(secret, digest[32:])
+
+    @classmethod
+    def parse(cls, text: str) -> "ExtendedKey":
+        """Parse a base58 xpub or xprv."""
+        try:
+            raw = base58.b58decode_check(text.strip())
+        except ValueError:
+            raise HDKeyError("Invalid extended key checksum")
+        if len(raw) != 78:
+            raise HDKeyError("Invalid extended key length")
+        version, depth, fingerprint = raw[:4], raw[4], raw[5:9]
+        (child_number,) = struct.unpack(">L", raw[9:13])
+        chain_code, key = raw[13:45], raw[45:]
+        if version == XPRV_VERSION and key[0] == 0:
+            key = key[1:]
+        elif version != XPUB_VERSION or key[0] not in (2, 3):
+            raise HDKeyError("Unsupported extended key version")
+        return cls(key, chain_code, depth, fingerprint, child_number)
+
+    @property
+    def is_private(self) -> bool:
+        return len(self.key) == 32
+
+    @functools.cached_property
+    def public_key(self) -> bytes:
+        """Compressed SEC1 public key."""
+        if self.is_private:
+            return PublicKey.from_secret(self.key).format(compressed=True)
+        return self.key
+
+    def neuter(self) -> "ExtendedKey":
+        return ExtendedKey(self.public_key, self.chain_code, self.depth, self.parent_fingerprint, self.child_number)
+
+    def serialize(self) -> str:
+        version, key = (XPRV_VERSION, b"\x00" + self.key) if self.is_private else (XPUB_VERSION, self.key)
+        raw = (
+            version + bytes([self.depth]) + self.parent_fingerprint
+            + struct.pack(">L", self.child_number) + self.chain_code + key
+        )
+        return base58.b58encode_check(raw).decode()
+
+    def child(self, index: int) -> "ExtendedKey":
+        hardened = index >= HARDENED
+        if hardened:
+            if not self.is_private:
+                raise HDKeyError("Hardened children need the private key")
+            data = b"\x00" + self.key
+        else:
+            data = self.public_key
+        digest = hmac.new(self.chain_code, data + struct.pack(">L", index), hashlib.sha512).digest()
+        tweak, chain_code = digest[:32], digest[32:]
+        if int.from_bytes(tweak, "big") >= CURVE_ORDER:
+            raise HDKeyError(f"Invalid child {index}; use the next index")
+        try:
+            if self.is_private:
+                key = PrivateKey(self.key).add(tweak).secret
+            else:
+                key = PublicKey(self.key).add(tweak).format(compressed=True)
+        except ValueError:
+            raise HDKeyError(f"Invalid child {index}; use the next index")
+        return ExtendedKey(key, chain_code, self.depth + 1, hash160(self.public_key)[:4], index)
+
+    def derive(self, path: str) -> "ExtendedKey":
+        """Walk a path such as "m/44'/0'/0'" (from the master) or "0/5" (relative)."""
+        node = self
+        for part in path.split("/"):
+            if part in ("m", ""):
+                continue
+            hardened = part[-1] in "'hH"
+            index = int(part[:-1] if hardened else part)
+            node = node.child(index + HARDENED if hardened else index)
+        return node
+
+
+def account_path(network: str) -> str:
+    return f"m/44'/{COIN_TYPES[network]}'/0'"
+
+
+def is_enabled(network: str) -> bool:
+    return network in COIN_TYPES and bool(settings.HD_XPUBS.get(network))
+
+
+@functools.lru_cache(maxsize=None)
+def _external_chain(xpub: str) -> ExtendedKey:
+    return ExtendedKey.parse(xpub).child(EXTERNAL_CHAIN)
+
+
+def deposit_address(network: str, index: int) -> str:
+    """Derive the deposit address for ``index`` from the network's account xpub."""
+    if not is_enabled(network):
+        raise HDKeyError(f"No HD xpub configured for {network}")
+    return encode_address(network, _external_chain(settings.HD_XPUBS[network]).child(index).public_key)
+
+
+def deposit_private_key(network: str, index: int) -> str:
+    """Derive the signing key for ``index`` from the network's seed; only the signer has it."""
+    seed = settings.HD_SEEDS.get(network)
+    if not seed:
+        raise HDKeyError(f"No HD seed configured for {network}")
+    account = ExtendedKey.from_seed(bytes.fromhex(seed)).derive(account_path(network))
+    if account.neuter().serialize() != settings.HD_XPUBS.get(network):
+        raise HDKeyError(f"HD seed for {network} does not match its configured xpub")
+    return export_private_key(network, account.derive(f"{EXTERNAL_CHAIN}/{index}").key)
@@ -0,0 +1,106 @@
+"""
+secp256k1 keys and addresses on libsecp256k1 (coincurve).
+
+One code path for BTC, LTC, ETH and TRX: a 32-byte secret, its compressed
+public key from coincurve, and each chain's address and private key
+encoding on top. This replaces python-bitcoinlib (BTC), pure-Python ecdsa
+(LTC) and tronpy (TRX) for key generation, and gives the same addresses and
+keys for the same secret.
+
+``generate_batch()`` fans large batches out over a process pool. The module
+doesn't touch Django, so pool workers only import this file.
+"""
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import base58
+from coincurve import PublicKey
+from eth_hash.auto import keccak
+from eth_utils import to_checksum_address
+
+CURVE_ORDER = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+
+P2PKH_VERSIONS = {"BTC": b"\x00", "LTC": b"\x30"}
+WIF_VERSIONS = {"BTC": b"\x80", "LTC": b"\xb0"}
+TRON_PREFIX = b"\x41"
+NETWORKS = ("BTC", "LTC", "ETH", "TRX")
+
+BATCH_CHUNK = 2000  # keys per pool task; smaller batches run in-process
+
+
+def hash160(data: bytes) -> bytes:
+    return hashlib.new("ripemd160", hashlib.sha256(data).digest()).digest()
+
+
+def _p2pkh(network: str, compressed: bytes) -> str:
+    return base58.b58encode_check(P2PKH_VERSIONS[network] + hash160(compressed)).decode()
+
+
+def _address(network: str, public_key: PublicKey) -> str:
+    if network in P2PKH_VERSIONS:
+        return _p2pkh(network, public_key.format(compressed=True))
+    digest = keccak(public_key.format(compressed=False)[1:])[-20:]
+    if network == "ETH":
+        return to_checksum_address(digest)
+    if network == "TRX":
+        return base58.b58encode_check(TRON_PREFIX + digest).decode()
+    raise ValueError(f"No address encoding for {network}")
+
+
+def encode_address(network: str, public_key: bytes) -> str:
+    """The address a SEC1 public key has on ``network``."""
+    if network in P2PKH_VERSIONS and len(public_key) == 33:
+        return _p2pkh(network, public_key)  # already compressed, no need to parse the point
+    return _address(network, PublicKey(public_key))
+
+
+def export_private_key(network: str, secret: bytes) -> str:
+    """A 32-byte secret in the format each chain's signer takes (WIF or hex)."""
+    if network in WIF_VERSIONS:
+        return base58.b58encode_check(WIF_VERSIONS[network] + secret + b"\x01").decode()
+    if network == "ETH":
+        return "0x" + secret.hex()
+    return secret.hex()
+
+
+def new_secret() -> bytes:
+    while True:
+        secret = os.urandom(32)
+        if 0 < int.from_bytes(secret, "big") < CURVE_ORDER:
+            return secret
+
+
+def from_secret(network: str, secret: bytes) -> tuple[str, str]:
+    """(address, private_key) for ``secret`` on ``network``."""
+    # PublicKey.from_secret takes about half the time of PrivateKey(secret).public_key
+    return _address(network, PublicKey.from_secret(secret)), export_private_key(network, secret)
+
+
+def generate(network: str) -> tuple[str, str]:
+    """A fresh random (address, private_key)."""
+    return from_secret(network, new_secret())
+
+
+def _generate_many(network: str, count: int) -> list[tuple[str, str]]:
+    return [generate(network) for _ in range(count)]
+
+
+def generate_batch(network: str, count: int, workers: int | None = None) -> list[tuple[str, str]]:
+    """
+    ``count`` fresh (address, private_key) pairs, generated in chunks of
+    BATCH_CHUNK across ``workers`` processes (default: one per CPU).
+    """
+    if network not in NETWORKS:
+        raise ValueError(f"No address encoding for {network}")
+    if count <= BATCH_CHUNK or workers == 1:
+        return _generate_many(network, count)
+
+    chunks = [BATCH_CHUNK] * (count // BATCH_CHUNK)
+    if count % BATCH_CHUNK:
+        chunks.append(count % BATCH_CHUNK)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = []
+        for chunk in pool.map(_generate_many, [network] * len(chunks), chunks):
+            results.extend(chunk)
+    return results
@@ -0,0 +1,242 @@
+"""
+Balance journal.
+
+Every credit and debit is recorded as a BalanceEntry. ``Balance.available`` is
+a snapshot: credits are plain inserts into the journal tail (no hot-row
+update), and ``compact()`` periodically folds the tail into the snapshot.
+Debits go through ``reserve()``, which applies guarded updates to the
+snapshot and journals them as already folded.
+
+Amounts are integer minor units (see assets.money) throughout.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import Coalesce
+
+from assets.models import Balance, BalanceEntry, Network
+from assets.money import from_minor
+
+
+class InsufficientFunds(Exception):
+    def __init__(self, available):
+        self.available = available
+        super().__init__(f"Insufficient balance. Available: {from_minor(available)}")
+
+
+class ReservationConflict(Exception):
+    """Concurrent debits kept moving the balances; the funds may be there, retry."""
+
+    def __init__(self):
+        super().__init__("Balance changed during the reservation, please retry")
+
+
+class _StalePlan(Exception):
+    pass
+
+
+def credit(balance, amount: int, cause: str, reference=None) -> BalanceEntry:
+    """Append a credit to the journal tail of ``balance``."""
+    return BalanceEntry.objects.create(
+        balance=balance,
+        amount=amount,
+        cause=cause,
+        reference=str(reference) if reference is not None else None,
+    )
+
+
+def primary_balance(user, asset):
+    """
+    The balance that credits land on when no network is implied: the user's
+    oldest balance for ``asset``, created on the asset's first network if missing.
+    """
+    balance = Balance.objects.filter(user=user, asset=asset).order_by("pk").first()
+    if balance is None:
+        balance = Balance.objects.create(
+            user=user, asset=asset, network=asset.networks.order_by("pk").first()
+        )
+    return balance
+
+
+def primary_balances(keys) -> dict:
+    """
+    Bulk primary_balance(): {(user_id, asset_id): balance_id} for every key
+    in one query, creating the missing balances like primary_balance() does.
+    """
+    keys = set(keys)
+    if not keys:
+        return {}
+    found = {}
+    rows = (
+        Balance.objects.filter(user_id__in={u for u, _ in keys}, asset_id__in={a for _, a in keys})
+        .order_by("-pk")
+        .values_list("pk", "user_id", "asset_id")
+    )
+    for pk, user_id, asset_id in rows:
+        if (user_id, asset_id) in keys:
+            found[(user_id, asset_id)] = pk  # descending, so the oldest wins
+    for user_id, asset_id in sorted(keys - found.keys()):
+        network_id = (
+            Network.objects.filter(assets=asset_id).order_by("pk").values_list("pk", flat=True).first()
+        )
+        found[(user_id, asset_id)] = Balance.objects.create(
+            user_id=user_id, asset_id=asset_id, network_id=network_id
+        ).pk
+    return found
+
+
+def credit_many(credits, reference=None) -> list:
+    """
+    Bulk credit(): ``credits`` is [(user_id, asset_id, amount, cause), ...],
+    each landing on the user's primary balance. One insert for all of them.
+    """
+    credits = [item for item in credits if item[2] != 0]
+    if not credits:
+        return []
+    balance_ids = primary_balances((user_id, asset_id) for user_id, asset_id, _, _ in credits)
+    return BalanceEntry.objects.bulk_create(
+        [
+            BalanceEntry(
+                balance_id=balance_ids[(user_id, asset_id)],
+                amount=amount,
+                cause=cause,
+                reference=str(reference) if reference is not None else None,
+            )
+            for user_id, asset_id, amount, cause in credits
+        ]
+    )
+
+
+def reserve(user, asset, amount: int, cause: str, reference=None, attempts: int = 3) -> list:
+    """
+    Debit ``amount`` of ``asset`` across the user's balances on all networks,
+    taking from the largest balance first.
+
+    Nothing is locked while planning. Each debit is a guarded
+    ``UPDATE ... SET available = available - x WHERE available >= x`` applied
+    in primary-key order, so concurrent reservations never deadlock and row
+    locks are only held for the statements that follow. If a guard fails
+    because the balance moved underneath us, the plan is rolled back to a
+    savepoint and recomputed.
+
+    Must run inside ``transaction.atomic()``.
+    Returns [(balance, deducted), ...]. Raises ValueError for an amount that
+    isn't positive, InsufficientFunds when the funds are not there,
+    ReservationConflict when every attempt lost its plan to a concurrent debit.
+    """
+    if amount <= 0:
+        raise ValueError(f"Reserved amount must be positive, got {amount}")
+    for _ in range(attempts):
+        balances = list(
+            Balance.objects.with_live_available()
+            .select_related("network")
+            .filter(user=user, asset=asset)
+            .order_by("-live_available", "pk")
+        )
+        total_available = sum(b.live_available for b in balances)
+        if total_available < amount:
+            raise InsufficientFunds(total_available)
+
+        remaining = amount
+        used_balances = []
+        for bal in balances:
+            if remaining <= 0:
+                break
+            deduct = min(bal.live_available, remaining)
+            if deduct <= 0:
+                continue
+            used_balances.append((bal, deduct))
+            remaining -= deduct
+
+        # Funds still sitting in the journal tail must be folded before the guard can see them
+        unfolded = [bal.pk for bal, deduct in used_balances if bal.available < deduct]
+        if unfolded:
+            compact(balance_ids=unfolded)
+
+        try:
+            with transaction.atomic():
+                for bal, deduct in sorted(used_balances, key=lambda item: item[0].pk):
+                    updated = Balance.objects.filter(pk=bal.pk, available__gte=deduct).update(
+                        available=F("available") - deduct
+                    )
+                    if not updated:
+                        raise _StalePlan()
+        except _StalePlan:
+            continue
+
+        BalanceEntry.objects.bulk_create(
+            [
+                BalanceEntry(
+                    balance=bal,
+                    amount=-deduct,
+                    cause=cause,
+                    reference=str(reference) if reference is not None else None,
+                    folded=True,
+                )
+                for bal, deduct in used_balances
+            ]
+        )
+        return used_balances
+
+    raise ReservationConflict()
+
+
+def refund_withdrawal(tx) -> None:
+    """Reverse the journal debits recorded for a withdrawal transaction."""
+    if BalanceEntry.objects.filter(cause=BalanceEntry.WITHDRAWAL_REFUND, reference=str(tx.id)).exists():
+        return
+
+    debits = BalanceEntry.objects.filter(
+        cause=BalanceEntry.WITHDRAWAL, reference=str(tx.id)
+    ).select_related("balance")
+
+    refunded = False
+    for entry in debits:
+        credit(entry.balance, -entry.amount, BalanceEntry.WITHDRAWAL_REFUND, tx.id)
+        refunded = True
+
+    if not refunded:
+        # Withdrawals made before the journal existed have no debit entries
+        balances = Balance.objects.filter(user_id=tx.user_id, asset_id=tx.asset_id).order_by("pk")
+        balance = balances.filter(network_id=tx.network_id).first() or balances.first()
+        if balance:
+            credit(balance, tx.amount, BalanceEntry.WITHDRAWAL_REFUND, tx.id)
+
+
+def compact(balance_ids=None, batch_size: int = 5000) -> int:
+    """
+    Fold unfolded journal entries into their Balance snapshots.
+    Returns the number of entries folded.
+    """
+    tail = BalanceEntry.objects.filter(folded=False)
+    if balance_ids is not None:
+        tail = tail.filter(balance_id__in=balance_ids)
+
+    folded = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                tail.select_for_update().order_by("pk").values_list("pk", "balance_id", "amount")[:batch_size]
+            )
+            if not rows:
+                break
+
+            totals = defaultdict(int)
+            for _, balance_id, amount in rows:
+                totals[balance_id] += amount
+
+            BalanceEntry.objects.filter(pk__in=[pk for pk, _, _ in rows]).update(folded=True)
+            for balance_id in sorted(totals):
+                Balance.objects.filter(pk=balance_id).update(
+                    available=F("available") + totals[balance_id]
+                )
+        folded += len(rows)
+    return folded
+
+
+def balance_at(user, asset, at) -> int:
+    """Total balance of ``asset`` for ``user`` as of datetime ``at``, across all networks."""
+    return BalanceEntry.objects.filter(
+        balance__user=user, balance__asset=asset, created_at__lte=at
+    ).aggregate(total=Coalesce(Sum("amount"), 0))["total"]
@@ -0,0 +1,41 @@
+# Generated by Django 6.0 on 2026-10-19 15:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def open_journal(apps, schema_editor):
+    Balance = apps.get_model('assets', 'Balance')
+    BalanceEntry = apps.get_model('assets', 'BalanceEntry')
+    entries = [
+        BalanceEntry(balance_id=pk, amount=available, cause='opening', folded=True)
+        for pk, available in Balance.objects.exclude(available=0).values_list('pk', 'available').iterator()
+    ]
+    BalanceEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0014_transaction'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceEntry',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('amount', models.DecimalField(decimal_places=8, max_digits=20)),
+                ('cause', models.CharField(choices=[('opening', 'Opening balance'), ('deposit', 'Deposit'), ('withdrawal', 'Withdrawal'), ('withdrawal_refund', 'Withdrawal refund'), ('stake', 'Stake'), ('unstake', 'Unstake')], max_length=20)),
+                ('reference', models.CharField(blank=True, max_length=64, null=True)),
+                ('folded', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('balance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='assets.balance')),
+            ],
+            options={
+                'db_table': 'balance_entries',
+                'indexes': [models.Index(fields=['balance', 'folded'], name='balance_ent_balance_12fcaf_idx'), models.Index(fields=['balance', 'created_at'], name='balance_ent_balance_50f384_idx'), models.Index(fields=['cause', 'reference'], name='balance_ent_cause_9bcab3_idx')],
+            },
+        ),
+        migrations.RunPython(open_journal, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 6.0 on 2026-10-19 16:14
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def _repoint(related_model, field_name, keep, others):
+    """Moves rows pointing at ``others`` to ``keep``, dropping those that would break a unique_together."""
+    rows = related_model.objects.filter(**{f"{field_name}__in": others})
+    for together in related_model._meta.unique_together:
+        if field_name not in together:
+            continue
+        rest = [name for name in together if name != field_name]
+        kept = set(related_model.objects.filter(**{field_name: keep}).values_list(*rest))
+        for pk, *values in rows.values_list("pk", *rest):
+            if tuple(values) in kept:
+                related_model.objects.filter(pk=pk).delete()
+            else:
+                kept.add(tuple(values))
+    rows.update(**{field_name: keep})
+
+
+def merge_duplicates(apps, schema_editor):
+    """Folds rows sharing a symbol/name into the oldest one before the keys become unique."""
+    for model_name, key in (("Asset", "symbol"), ("Network", "name")):
+        model = apps.get_model("assets", model_name)
+        duplicates = (
+            model.objects.values(key).annotate(rows=Count("pk"), keep=Min("pk")).filter(rows__gt=1)
+        )
+        for duplicate in duplicates:
+            others = list(
+                model.objects.filter(**{key: duplicate[key]}).exclude(pk=duplicate["keep"])
+                .values_list("pk", flat=True)
+            )
+            relations = [
+                (rel.field.model, rel.field.name) for rel in model._meta.related_objects if not rel.many_to_many
+            ]
+            # Asset.networks links, from whichever side this model is on
+            for field in list(model._meta.many_to_many) + [
+                rel.field for rel in model._meta.related_objects if rel.many_to_many
+            ]:
+                through = field.remote_field.through
+                relations += [
+                    (through, f.name) for f in through._meta.fields
+                    if f.is_relation and f.related_model == model
+                ]
+            for related_model, field_name in relations:
+                _repoint(related_model, field_name, duplicate["keep"], others)
+            model.objects.filter(pk__in=others).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0015_balanceentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='asset',
+            name='symbol',
+            field=models.CharField(max_length=20, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='network',
+            name='name',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+    ]
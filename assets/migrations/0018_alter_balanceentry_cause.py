@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0017_alter_balanceentry_cause'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='balanceentry',
+            name='cause',
+            field=models.CharField(choices=[('opening', 'Opening balance'), ('deposit', 'Deposit'), ('withdrawal', 'Withdrawal'), ('withdrawal_refund', 'Withdrawal refund'), ('stake', 'Stake'), ('unstake', 'Unstake'), ('order_hold', 'Order hold'), ('order_release', 'Order release'), ('trade', 'Trade'), ('convert', 'Convert')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,121 @@
+# Generated by Django 6.0 on 2026-10-19 12:00
+
+import assets.money
+from django.db import migrations, models
+
+# (model, amount columns) rewritten as integer minor units
+AMOUNTS = [
+    ('transaction', ('amount', 'fee')),
+    ('balance', ('available',)),
+    ('balanceentry', ('amount',)),
+]
+
+
+def to_minor_units(apps, schema_editor):
+    quote_name = schema_editor.quote_name
+    for model_name, columns in AMOUNTS:
+        table = apps.get_model('assets', model_name)._meta.db_table
+        assignments = ", ".join(
+            f"{quote_name(column + '_minor')} = CAST(ROUND({quote_name(column)} * 100000000) AS BIGINT)"
+            for column in columns
+        )
+        schema_editor.execute(f"UPDATE {quote_name(table)} SET {assignments}")
+
+
+def from_minor_units(apps, schema_editor):
+    quote_name = schema_editor.quote_name
+    for model_name, columns in AMOUNTS:
+        table = apps.get_model('assets', model_name)._meta.db_table
+        assignments = ", ".join(
+            f"{quote_name(column)} = {quote_name(column + '_minor')} / 100000000.0"
+            for column in columns
+        )
+        schema_editor.execute(f"UPDATE {quote_name(table)} SET {assignments}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0019_portfoliosnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='amount_minor',
+            field=assets.money.MinorUnitField(default=0),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='fee_minor',
+            field=assets.money.MinorUnitField(default=0),
+        ),
+        migrations.AddField(
+            model_name='balance',
+            name='available_minor',
+            field=assets.money.MinorUnitField(default=0),
+        ),
+        migrations.AddField(
+            model_name='balanceentry',
+            name='amount_minor',
+            field=assets.money.MinorUnitField(default=0),
+        ),
+        # Nullable while both columns exist, so that removing them can be reversed
+        migrations.AlterField(
+            model_name='transaction',
+            name='amount',
+            field=models.DecimalField(decimal_places=8, max_digits=20, null=True),
+        ),
+        migrations.AlterField(
+            model_name='balanceentry',
+            name='amount',
+            field=models.DecimalField(decimal_places=8, max_digits=20, null=True),
+        ),
+        migrations.RunPython(to_minor_units, from_minor_units),
+        migrations.RemoveField(
+            model_name='transaction',
+            name='amount',
+        ),
+        migrations.RemoveField(
+            model_name='transaction',
+            name='fee',
+        ),
+        migrations.RemoveField(
+            model_name='balance',
+            name='available',
+        ),
+        migrations.RemoveField(
+            model_name='balanceentry',
+            name='amount',
+        ),
+        migrations.RenameField(
+            model_name='transaction',
+            old_name='amount_minor',
+            new_name='amount',
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='amount',
+            field=assets.money.MinorUnitField(),
+        ),
+        migrations.RenameField(
+            model_name='transaction',
+            old_name='fee_minor',
+            new_name='fee',
+        ),
+        migrations.RenameField(
+            model_name='balance',
+            old_name='available_minor',
+            new_name='available',
+        ),
+        migrations.RenameField(
+            model_name='balanceentry',
+            old_name='amount_minor',
+            new_name='amount',
+        ),
+        migrations.AlterField(
+            model_name='balanceentry',
+            name='amount',
+            field=assets.money.MinorUnitField(),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-19 16:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0021_balance_hd_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='balance',
+            index=models.Index(fields=['public'], name='balances_public_ee2331_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 18:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0022_balance_public_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='balance',
+            name='address_assigned_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
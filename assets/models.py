@@ -1,8 +1,10 @@
 from django.db import models
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 
-from decimal import Decimal
+from assets.money import MinorUnitField, from_minor
 class Network(models.Model):
-    name = models.CharField(max_length=100)
+    name = models.CharField(max_length=100, unique=True)
     full_name = models.CharField(max_length=200)
     confirmations = models.IntegerField(default=0)
     min_deposit_amount = models.DecimalField(max_digits=15, decimal_places=8, default=0)
@@ -52,8 +54,9 @@ class Transaction(models.Model):
     network = models.ForeignKey('Network', on_delete=models.PROTECT, related_name='transactions')
     
     type = models.CharField(max_length=20, choices=TRANSACTION_TYPES)
-    amount = models.DecimalField(max_digits=20, decimal_places=8)
-    fee = models.DecimalField(max_digits=20, decimal_places=8, default=Decimal('0'))
+    # Minor units (assets.money)
+    amount = MinorUnitField()
+    fee = MinorUnitField(default=0)
     
     from_address = models.CharField(max_length=255, blank=True, null=True)
     to_address = models.CharField(max_length=255, blank=True, null=True)
@@ -77,7 +80,7 @@ class Transaction(models.Model):
         ]
     
     def __str__(self):
-        return f"{self.get_type_display()} - {self.amount} {self.asset.symbol} ({self.get_status_display()})"
+        return f"{self.get_type_display()} - {from_minor(self.amount)} {self.asset.symbol} ({self.get_status_display()})"
     
     def mark_completed(self, blockchain_hash=None):
         from django.utils import timezone
@@ -97,13 +100,11 @@ class Transaction(models.Model):
         self.save()
         
         if self.type == self.WITHDRAWAL:
-            balance = Balance.objects.get(user=self.user, asset=self.asset)
-            balance.available += self.amount
-            balance.pending_withdrawal -= self.amount
-            balance.save()
+            from assets import ledger
+            ledger.refund_withdrawal(self)
 
 class Asset(models.Model):
-    symbol = models.CharField(max_length=20)
+    symbol = models.CharField(max_length=20, unique=True)
     name = models.CharField(max_length=100)
     rate = models.DecimalField(max_digits=20, decimal_places=6, default=0)
     networks = models.ManyToManyField(Network, related_name="assets", blank=True)
@@ -118,26 +119,133 @@ class Asset(models.Model):
     def __repr__(self):
         return f"<Asset name={self.name}>"
 
+class BalanceQuerySet(models.QuerySet):
+    def with_live_available(self):
+        """Annotate ``live_available``: the snapshot plus the unfolded journal tail."""
+        tail = (
+            BalanceEntry.objects.filter(balance=OuterRef("pk"), folded=False)
+            .order_by()
+            .values("balance")
+            .annotate(total=Sum("amount"))
+            .values("total")
+        )
+        return self.annotate(
+            live_available=F("available") + Coalesce(
+                Subquery(tail),
+                Value(0),
+                output_field=MinorUnitField(),
+            )
+        )
+
+
 class Balance(models.Model):
+    """
+    Per-network balance snapshot.
+
+    ``available`` only reflects journal entries that have been folded in by
+    compaction; use ``Balance.objects.with_live_available()`` for the spendable amount.
+    """
     asset = models.ForeignKey(Asset, related_name="balances", on_delete=models.CASCADE)
-    available = models.DecimalField(max_digits=20, decimal_places=8, default=0)
+    # Minor units (assets.money)
+    available = MinorUnitField(default=0)
     network = models.ForeignKey(Network, related_name = 'balances', null = True, on_delete = models.CASCADE)
     user = models.ForeignKey(
         'users.User', related_name="user_balances", on_delete=models.CASCADE
     )
     public= models.CharField(max_length=200, blank=True, null=True)
     private = models.TextField(blank=True, null=True)
+    # Child index of ``public`` under the network's HD xpub (assets.hdwallet); such
+    # balances have no ``private``, the key is derived when signing
+    hd_index = models.PositiveIntegerField(blank=True, null=True)
+    # When ``public`` was set; the block scanner picks up new addresses by it
+    address_assigned_at = models.DateTimeField(blank=True, null=True, db_index=True)
+
+    objects = BalanceQuerySet.as_manager()
     
     class Meta:
         db_table = 'balances'
+        constraints = [
+            models.UniqueConstraint(fields=['network', 'hd_index'], name='balance_network_hd_index'),
+        ]
+        indexes = [
+            # Exact address lookups from the block scanner (assets.scanner)
+            models.Index(fields=['public']),
+        ]
 
     def __str__(self):
         return f"{self.asset.symbol} Balance"
     
     def __repr__(self):
         return f"Asset={self.asset.symbol}, Total={self.total}>"
+
+
+class BalanceEntry(models.Model):
+    """Append-only journal of every credit (positive) and debit (negative) on a Balance."""
+
+    OPENING = 'opening'
+    DEPOSIT = 'deposit'
+    WITHDRAWAL = 'withdrawal'
+    WITHDRAWAL_REFUND = 'withdrawal_refund'
+    STAKE = 'stake'
+    UNSTAKE = 'unstake'
+    ORDER_HOLD = 'order_hold'
+    ORDER_RELEASE = 'order_release'
+    TRADE = 'trade'
+    CONVERT = 'convert'
+
+    CAUSE_CHOICES = [
+        (OPENING, 'Opening balance'),
+        (DEPOSIT, 'Deposit'),
+        (WITHDRAWAL, 'Withdrawal'),
+        (WITHDRAWAL_REFUND, 'Withdrawal refund'),
+        (STAKE, 'Stake'),
+        (UNSTAKE, 'Unstake'),
+        (ORDER_HOLD, 'Order hold'),
+        (ORDER_RELEASE, 'Order release'),
+        (TRADE, 'Trade'),
+        (CONVERT, 'Convert'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    balance = models.ForeignKey(Balance, related_name='entries', on_delete=models.CASCADE)
+    # Minor units (assets.money)
+    amount = MinorUnitField()
+    cause = models.CharField(max_length=20, choices=CAUSE_CHOICES)
+    reference = models.CharField(max_length=64, blank=True, null=True)
+    # True once the amount is included in Balance.available
+    folded = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'balance_entries'
+        indexes = [
+            models.Index(fields=['balance', 'folded']),
+            models.Index(fields=['balance', 'created_at']),
+            models.Index(fields=['cause', 'reference']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_cause_display()} {from_minor(self.amount)} (balance {self.balance_id})"
     
 
+class QuoteQuerySet(models.QuerySet):
+    def latest_by_asset(self, asset_ids=None):
+        """{asset_id: newest Quote} in one query, whatever the interval."""
+        qs = self if asset_ids is None else self.filter(asset_id__in=asset_ids)
+        latest = {}
+        for quote in qs.order_by("asset_id", "-time", "-id"):
+            latest.setdefault(quote.asset_id, quote)
+        return latest
+
+    async def alatest_by_asset(self, asset_ids=None):
+        """Async latest_by_asset()."""
+        qs = self if asset_ids is None else self.filter(asset_id__in=asset_ids)
+        latest = {}
+        async for quote in qs.order_by("asset_id", "-time", "-id"):
+            latest.setdefault(quote.asset_id, quote)
+        return latest
+
+
 class Quote(models.Model):
     id = models.BigAutoField(primary_key=True)
     asset = models.ForeignKey(Asset, on_delete=models.CASCADE)
@@ -166,9 +274,28 @@ class Quote(models.Model):
     perc_24 = models.FloatField(default=0)
     value_in_usd = models.DecimalField(max_digits=20, decimal_places=8, default=0)
 
+    objects = QuoteQuerySet.as_manager()
+
     class Meta:
         db_table = "quotes"
         unique_together = ("asset", "interval")
 
     def __str__(self):
-        return f"{self.symbol}"
\ No newline at end of file
+        return f"{self.symbol}"
+
+class PortfolioSnapshot(models.Model):
+    """A user's total holdings in USD at the close of one day, written by snapshot_portfolios."""
+
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey('users.User', on_delete=models.CASCADE, related_name='portfolio_snapshots')
+    day = models.DateField()
+    value_usd = models.DecimalField(max_digits=24, decimal_places=2)
+
+    class Meta:
+        db_table = 'portfolio_snapshots'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'day'], name='portfolio_snapshot_user_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.day}: {self.value_usd} USD"
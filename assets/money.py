@@ -0,0 +1,48 @@
+"""
+Integer minor units for amounts.
+
+Balances, journal entries, transactions, stakes, orders and conversions are
+stored as whole numbers of 10^-8 of the asset (satoshi-style), which is the
+precision every amount column already had. The database sums them as native
+integers and Python does plain ``int`` arithmetic on them; ``Decimal`` only
+appears at the API boundary, where ``to_minor()`` and ``from_minor()``
+convert exactly and reject anything finer than one unit.
+
+Prices and rates stay Decimal: they are multipliers, not amounts.
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.db import models
+
+DECIMALS = 8
+SCALE = 10 ** DECIMALS
+QUANTUM = Decimal(1).scaleb(-DECIMALS)
+
+
+class InexactAmount(ValueError):
+    pass
+
+
+def to_minor(value) -> int:
+    """Exact minor units for a Decimal, int or numeric string; raises InexactAmount."""
+    try:
+        value = Decimal(value)
+    except (InvalidOperation, TypeError, ValueError):
+        raise InexactAmount(f"Invalid amount: {value!r}")
+    if not value.is_finite():
+        raise InexactAmount(f"Invalid amount: {value}")
+    units = value.scaleb(DECIMALS)
+    if units != units.to_integral_value():
+        raise InexactAmount(f"Amount has more than {DECIMALS} decimal places: {value}")
+    return int(units)
+
+
+def from_minor(units) -> Decimal:
+    """The Decimal amount for ``units``, with exactly DECIMALS places."""
+    return Decimal(int(units)).scaleb(-DECIMALS).quantize(QUANTUM)
+
+
+class MinorUnitField(models.BigIntegerField):
+    """An amount held as integer minor units; Python values are plain ints."""
+
+    description = "Amount in integer minor units (10^-8)"
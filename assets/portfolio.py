@@ -0,0 +1,94 @@
+"""
+Daily portfolio snapshots.
+
+``snapshot_day()`` values every user's holdings at the close of one day in a
+single INSERT ... SELECT, so the work stays in the database however many
+users there are. A balance at the cutoff is its live amount minus whatever
+was journalled after the cutoff:
+
+    available + unfolded tail - entries created at or after the cutoff
+
+which only aggregates the recent part of the journal, in integer minor
+units; the scale is divided out once per user. Holdings are priced
+with each asset's latest quote (quotes keep no history, so run it shortly
+after midnight); assets without a quote are left out.
+"""
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db import connection, transaction
+
+from assets.models import Balance, BalanceEntry, PortfolioSnapshot, Quote
+from assets.money import SCALE
+
+# range -> (days covered, days per point)
+CHART_RANGES = {
+    "1W": (7, 1),
+    "1M": (30, 1),
+    "1Y": (365, 7),
+}
+
+
+def day_cutoff(day):
+    """The first instant after ``day`` (UTC)."""
+    return datetime.combine(day + timedelta(days=1), time.min, tzinfo=dt_timezone.utc)
+
+
+def snapshot_day(day) -> int:
+    """(Re)writes every user's snapshot for ``day``. Returns the number of rows written."""
+    prices = {
+        asset_id: quote.value_in_usd
+        for asset_id, quote in Quote.objects.latest_by_asset().items()
+        if quote.value_in_usd
+    }
+    if not prices:
+        return 0
+
+    quote_name = connection.ops.quote_name
+    cutoff = connection.ops.adapt_datetimefield_value(day_cutoff(day))
+    sql = f"""
+        INSERT INTO {quote_name(PortfolioSnapshot._meta.db_table)} (user_id, day, value_usd)
+        SELECT b.user_id, %s, ROUND(SUM((b.available + COALESCE(adj.amount, 0)) * px.price) / {SCALE}, 2)
+        FROM {quote_name(Balance._meta.db_table)} b
+        JOIN ({" UNION ALL ".join(["SELECT %s AS asset_id, %s AS price"] * len(prices))}) px
+            ON px.asset_id = b.asset_id
+        LEFT JOIN (
+            SELECT balance_id,
+                   SUM(CASE WHEN folded THEN 0 ELSE amount END)
+                   - SUM(CASE WHEN created_at >= %s THEN amount ELSE 0 END) AS amount
+            FROM {quote_name(BalanceEntry._meta.db_table)}
+            WHERE folded = %s OR created_at >= %s
+            GROUP BY balance_id
+        ) adj ON adj.balance_id = b.id
+        GROUP BY b.user_id
+    """
+    params = [day]
+    for asset_id, price in sorted(prices.items()):
+        params += [asset_id, Decimal(price)]
+    params += [cutoff, False, cutoff]
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        PortfolioSnapshot.objects.filter(day=day).delete()
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def chart(user, range_key: str, today) -> list:
+    """
+    [(day, value_usd), ...] oldest first for one CHART_RANGES range: the
+    snapshot closing each step-day bucket, ending at the newest snapshot.
+    """
+    days, step = CHART_RANGES[range_key]
+    rows = list(
+        PortfolioSnapshot.objects.filter(user=user, day__gt=today - timedelta(days=days), day__lte=today)
+        .order_by("day")
+        .values_list("day", "value_usd")
+    )
+    if step == 1 or not rows:
+        return rows
+    # Buckets are anchored on the newest day so the latest value is always a point
+    last = rows[-1][0]
+    points = {}
+    for day, value in rows:
+        points[(last - day).days // step] = (day, value)
+    return [points[bucket] for bucket in sorted(points, reverse=True)]
@@ -0,0 +1,142 @@
+"""
+Cross rates between every pair of assets.
+
+Each asset gets a USD anchor from its latest quote: ``value_in_usd``, or,
+when that is missing, ``lp`` (quoted in USDT) times USDT's anchor; USD is 1
+by definition and USDT, without a quote of its own, is 1 as well. The matrix ``rates[i, j] = anchor[i] / anchor[j]`` (units of
+j per unit of i) is one NumPy outer product, so every direct or triangulated
+pair is precomputed and a conversion is an index lookup. Unknown rates are
+NaN and convert to None.
+
+The matrix is rebuilt lazily: after a Quote is saved in this process (see
+assets.signals) or once it is older than RATES_MAX_AGE, which covers quotes
+written by other processes. Rates are float64, fine for valuations shown to
+users; settlement keeps using integer minor units.
+
+Amounts passed in are integer minor units (assets.money); results are
+floats in whole units of the target.
+"""
+import threading
+import time
+
+import numpy as np
+from asgiref.sync import sync_to_async
+
+from assets.models import Quote
+from assets.money import SCALE
+
+RATES_MAX_AGE = 5
+
+USD = "USD"
+USDT = "USDT"
+
+
+class RateMatrix:
+    def __init__(self, asset_ids, symbols, anchors):
+        self.asset_ids = list(asset_ids)
+        self.symbols = list(symbols)
+        self.by_id = {asset_id: i for i, asset_id in enumerate(self.asset_ids) if asset_id is not None}
+        self.by_symbol = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.usd = np.asarray(anchors, dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.rates = np.outer(self.usd, 1.0 / self.usd)
+        self.built_at = time.monotonic()
+
+    @classmethod
+    def build(cls):
+        """One query: assets without a quote have no rate anyway."""
+        quotes = sorted(
+            Quote.objects.select_related("asset").latest_by_asset().values(), key=lambda quote: quote.asset_id
+        )
+        anchors = {
+            quote.asset.symbol: float(quote.value_in_usd) for quote in quotes if quote.value_in_usd
+        }
+        anchors.setdefault(USD, 1.0)
+        usdt = anchors.get(USDT, 1.0)
+        for quote in quotes:
+            if quote.asset.symbol not in anchors and quote.lp:
+                anchors[quote.asset.symbol] = float(quote.lp) * usdt
+
+        asset_ids = [quote.asset_id for quote in quotes]
+        symbols = [quote.asset.symbol for quote in quotes]
+        anchors.setdefault(USDT, usdt)
+        for symbol in (USD, USDT):
+            if symbol not in symbols:
+                asset_ids.append(None)
+                symbols.append(symbol)
+        return cls(asset_ids, symbols, [anchors.get(symbol, np.nan) for symbol in symbols])
+
+    def index(self, asset):
+        """Row/column of an asset given as an Asset, an id or a symbol; None if unknown."""
+        if isinstance(asset, str):
+            return self.by_symbol.get(asset)
+        return self.by_id.get(getattr(asset, "pk", asset))
+
+    def rate(self, source, target):
+        """Units of ``target`` per unit of ``source``, or None."""
+        i, j = self.index(source), self.index(target)
+        if i is None or j is None:
+            return None
+        value = self.rates[i, j]
+        return None if np.isnan(value) else float(value)
+
+    def convert(self, amount, source, target):
+        """``amount`` minor units of ``source`` in whole units of ``target``, or None."""
+        rate = self.rate(source, target)
+        return None if rate is None else amount / SCALE * rate
+
+    def total(self, amounts, target):
+        """
+        Sum of {asset (id, symbol or Asset): minor units} in whole units of
+        ``target``; assets with no rate are skipped. None if ``target`` itself
+        has no rate.
+        """
+        j = self.index(target)
+        if j is None or np.isnan(self.usd[j]):
+            return None
+        if not amounts:
+            return 0.0
+        rows, values = [], []
+        for asset, amount in amounts.items():
+            i = self.index(asset)
+            if i is not None:
+                rows.append(i)
+                values.append(amount)
+        column = self.rates[rows, j]
+        return float(np.nansum(np.asarray(values, dtype=np.int64) * column)) / SCALE
+
+
+_matrix = None
+_dirty = True
+_lock = threading.Lock()
+
+
+def invalidate():
+    """Forces the next get_rates() to rebuild; called when quotes change."""
+    global _dirty
+    _dirty = True
+
+
+def _is_fresh(matrix) -> bool:
+    return matrix is not None and not _dirty and time.monotonic() - matrix.built_at < RATES_MAX_AGE
+
+
+def get_rates() -> RateMatrix:
+    global _matrix, _dirty
+    matrix = _matrix
+    if _is_fresh(matrix):
+        return matrix
+    with _lock:
+        if _matrix is matrix:
+            # Clear the flag first so a quote saved during the build marks it dirty again
+            _dirty = False
+            _matrix = RateMatrix.build()
+        return _matrix
+
+
+async def aget_rates() -> RateMatrix:
+    """get_rates() for async code: only goes to a thread when the matrix needs a rebuild."""
+    matrix = _matrix
+    if _is_fresh(matrix):
+        return matrix
+    return await sync_to_async(get_rates)()
@@ -1,7 +1,8 @@
 # assets/routing.py
 from django.urls import path
-from .consumers import BalanceStreamConsumer
+from .consumers import BalanceStreamConsumer, QuoteStreamConsumer
 
 websocket_urlpatterns = [
     path("ws/balances/", BalanceStreamConsumer.as_asgi()),
+    path("ws/quotes/", QuoteStreamConsumer.as_asgi()),
 ]
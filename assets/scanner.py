@@ -0,0 +1,288 @@
+"""
+Deposit detection straight from chain blocks, next to the webhook provider.
+
+Sources are configured in settings.CHAIN_SCANNERS ({network: source}) and
+read by ``manage.py scan_blocks``:
+
+- ``"rpc:<url>"`` follows a bitcoind-compatible JSON-RPC node (BTC, LTC)
+  from a start height to the tip, then polls for new blocks.
+- ``"file:<path>"`` reads an NDJSON file, one block per line:
+  ``{"height": 1, "hash": "...", "outputs": [{"txid": "...", "index": 0,
+  "address": "...", "amount": "0.5", "asset": "USDT"}]}`` (``asset``
+  defaults to the network's coin): the stand-in for any chain.
+
+Every output address is checked against an AddressIndex: a Bloom filter
+over all of the network's Balance.public values in memory, then one indexed
+query for the few outputs that pass it. Matches become DepositCandidates,
+emitted per block in chunks of SCANNER_BATCH_SIZE to a sink; the default
+one records them as pending deposit Transactions keyed on "txid:index", so
+rescanning a block is harmless. Confirmations and reorgs are left to
+whatever completes pending deposits.
+
+The filter hashes with Python's per-process string hash, so it is rebuilt
+in every process and never persisted. Addresses assigned since the last
+refresh (Balance.address_assigned_at, whatever the row's age) are added
+before each block, and the whole filter is rebuilt every
+SCANNER_REBUILD_INTERVAL seconds.
+"""
+import json
+import logging
+import math
+import time
+from datetime import timedelta
+from decimal import Decimal
+from typing import NamedTuple
+
+import numpy as np
+import requests
+from django.conf import settings
+from django.utils import timezone
+
+from assets.models import Balance, Transaction
+from assets.money import to_minor
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+BLOOM_ERROR_RATE = 0.001
+MIN_CAPACITY = 1024
+BUILD_CHUNK = 50000
+# Each refresh looks back this far, for assignments committed after a later one was read
+ASSIGNED_LAG = timedelta(seconds=60)
+
+
+class Output(NamedTuple):
+    txid: str
+    index: int
+    address: str
+    amount: int  # minor units (assets.money)
+    symbol: str
+
+
+class Block(NamedTuple):
+    height: int
+    hash: str
+    outputs: list
+
+
+class DepositCandidate(NamedTuple):
+    network_id: int
+    height: int
+    txid: str
+    index: int
+    address: str
+    amount: int
+    balance_id: int
+    user_id: int
+    asset_id: int
+
+
+# ---------------- Address index ----------------
+class BloomFilter:
+    """
+    Bit array sized for ``capacity`` items at ``error_rate`` false positives.
+    Items are hashed once with Python's string hash; the k bit positions come
+    from its two 32-bit halves (double hashing), computed for a whole batch
+    at once with NumPy.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = BLOOM_ERROR_RATE):
+        self.capacity = max(capacity, 1)
+        self.size = max(64, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        self.count = 0
+        self._steps = np.arange(self.hashes, dtype=np.uint64)
+
+    def _positions(self, items):
+        hashes = np.fromiter(map(hash, items), dtype=np.int64, count=len(items)).view(np.uint64)
+        first, second = hashes & 0xFFFFFFFF, (hashes >> 32) | 1
+        return (first[:, None] + self._steps * second[:, None]) % self.size
+
+    def add_many(self, items):
+        if not items:
+            return
+        positions = self._positions(items).ravel()
+        np.bitwise_or.at(self.bits, positions >> 3, np.left_shift(1, positions & 7).astype(np.uint8))
+        self.count += len(items)
+
+    def contains_many(self, items) -> np.ndarray:
+        """Boolean array: False means definitely absent."""
+        if not items:
+            return np.zeros(0, dtype=bool)
+        positions = self._positions(items)
+        return ((self.bits[positions >> 3] >> (positions & 7)) & 1).all(axis=1)
+
+
+class AddressIndex:
+    """Every deposit address on one network: Bloom filter first, then the exact lookup."""
+
+    def __init__(self, network: str):
+        self.network = network
+        self.bloom = None
+        self.checked_at = None
+        self.recent = set()  # addresses seen by the last refresh, still inside its lag window
+        self.built_at = 0.0
+
+    def _addressed(self):
+        return Balance.objects.filter(network__name=self.network, public__isnull=False).exclude(public="")
+
+    def refresh(self):
+        """Add addresses assigned since the last call; rebuild when stale or full."""
+        if self.bloom is not None and time.monotonic() - self.built_at < settings.SCANNER_REBUILD_INTERVAL:
+            since, self.checked_at = self.checked_at - ASSIGNED_LAG, timezone.now()
+            seen = set(self._addressed().filter(address_assigned_at__gte=since).values_list("public", flat=True))
+            new, self.recent = seen - self.recent, seen
+            if self.bloom.count + len(new) <= self.bloom.capacity:
+                self._add(new)
+                return
+        self.rebuild()
+
+    def rebuild(self):
+        started = time.perf_counter()
+        self.checked_at, self.recent = timezone.now(), set()
+        addressed = self._addressed()
+        self.bloom = BloomFilter(max(2 * addressed.count(), MIN_CAPACITY))
+        chunk = []
+        for public in addressed.values_list("public", flat=True).iterator(chunk_size=BUILD_CHUNK):
+            chunk.append(public)
+            if len(chunk) == BUILD_CHUNK:
+                self._add(chunk)
+                chunk = []
+        self._add(chunk)
+        self.built_at = time.monotonic()
+        logger.info(
+            "%s address index: %d addresses, %.1f MB, built in %.2fs",
+            self.network, self.bloom.count, self.bloom.bits.nbytes / 2**20, time.perf_counter() - started,
+        )
+
+    def _add(self, addresses):
+        if addresses:
+            self.bloom.add_many(list(addresses))
+
+    def match(self, addresses) -> dict:
+        """{address: (balance_id, user_id, asset_id, asset symbol, network_id)} for ours among ``addresses``."""
+        hits = {addresses[i] for i in np.flatnonzero(self.bloom.contains_many(addresses))}
+        if not hits:
+            return {}
+        rows = self._addressed().filter(public__in=hits).values_list(
+            "public", "pk", "user_id", "asset_id", "asset__symbol", "network_id",
+        )
+        matches = {public: rest for public, *rest in rows}
+        metrics.scanner_false_positives.inc(self.network, amount=len(hits) - len(matches))
+        return matches
+
+
+# ---------------- Scanning ----------------
+def record_candidates(candidates):
+    """Default sink: one pending deposit Transaction per output, ignoring ones already recorded."""
+    Transaction.objects.bulk_create(
+        [
+            Transaction(
+                user_id=c.user_id, asset_id=c.asset_id, network_id=c.network_id,
+                type=Transaction.DEPOSIT, status=Transaction.PENDING,
+                amount=c.amount, to_address=c.address,
+                blockchain_hash=f"{c.txid}:{c.index}", description=f"Block {c.height}",
+            )
+            for c in candidates
+        ],
+        ignore_conflicts=True,
+    )
+
+
+class BlockScanner:
+    def __init__(self, network: str, sink=record_candidates, batch_size: int = None):
+        self.network = network
+        self.index = AddressIndex(network)
+        self.sink = sink
+        self.batch_size = batch_size or settings.SCANNER_BATCH_SIZE
+
+    def scan(self, block: Block) -> list:
+        """DepositCandidates for the outputs of ``block`` paying one of our addresses."""
+        started = time.perf_counter()
+        matches = self.index.match([output.address for output in block.outputs])
+        candidates = []
+        for output in block.outputs:
+            match = matches.get(output.address)
+            if match is None:
+                continue
+            balance_id, user_id, asset_id, symbol, network_id = match
+            if output.symbol != symbol:
+                logger.warning(
+                    "%s block %s: %s sent to the %s address of balance %s, skipped",
+                    self.network, block.height, output.symbol, symbol, balance_id,
+                )
+                continue
+            candidates.append(DepositCandidate(
+                network_id, block.height, output.txid, output.index, output.address, output.amount,
+                balance_id, user_id, asset_id,
+            ))
+        metrics.scanner_block_duration.observe(self.network, value=time.perf_counter() - started)
+        metrics.scanner_blocks.inc(self.network)
+        return candidates
+
+    def run(self, blocks):
+        """Scan ``blocks`` in order, emitting candidates to the sink; returns (blocks, candidates)."""
+        scanned = found = 0
+        for block in blocks:
+            self.index.refresh()
+            candidates = self.scan(block)
+            for start in range(0, len(candidates), self.batch_size):
+                self.sink(candidates[start:start + self.batch_size])
+            metrics.scanner_candidates.inc(self.network, amount=len(candidates))
+            scanned += 1
+            found += len(candidates)
+        return scanned, found
+
+
+# ---------------- Block sources ----------------
+def blocks_from_source(network: str, source: str, from_height: int = None):
+    if source.startswith("file:"):
+        return file_blocks(network, source[len("file:"):], from_height)
+    if source.startswith("rpc:"):
+        return rpc_blocks(network, source[len("rpc:"):], from_height)
+    raise ValueError(f"Unknown block source {source!r} for {network}")
+
+
+def file_blocks(network: str, path: str, from_height: int = None):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            data = json.loads(line)
+            if from_height is not None and data["height"] < from_height:
+                continue
+            yield Block(data["height"], data.get("hash", ""), [
+                Output(o["txid"], o.get("index", 0), o["address"], to_minor(o["amount"]), o.get("asset") or network)
+                for o in data["outputs"]
+            ])
+
+
+def _rpc(url, method, *params):
+    response = requests.post(url, json={"jsonrpc": "1.0", "id": method, "method": method, "params": params}, timeout=30)
+    response.raise_for_status()
+    body = json.loads(response.text, parse_float=Decimal)  # amounts stay exact
+    if body.get("error"):
+        raise RuntimeError(f"{method}: {body['error']}")
+    return body["result"]
+
+
+def rpc_blocks(network: str, url: str, from_height: int = None):
+    """Blocks from a bitcoind-compatible node, following the tip forever."""
+    height = _rpc(url, "getblockcount") if from_height is None else from_height
+    while True:
+        if height > _rpc(url, "getblockcount"):
+            time.sleep(settings.SCANNER_POLL_INTERVAL)
+            continue
+        block_hash = _rpc(url, "getblockhash", height)
+        block = _rpc(url, "getblock", block_hash, 2)
+        outputs = []
+        for tx in block["tx"]:
+            for vout in tx["vout"]:
+                script = vout.get("scriptPubKey", {})
+                address = script.get("address") or next(iter(script.get("addresses") or []), None)
+                if address:
+                    outputs.append(Output(tx["txid"], vout["n"], address, to_minor(vout["value"]), network))
+        yield Block(height, block_hash, outputs)
+        height += 1
@@ -1,5 +1,20 @@
 from rest_framework import serializers
 from .models import Asset, Network
+from .money import DECIMALS, from_minor, to_minor
+
+
+class AmountField(serializers.DecimalField):
+    """A decimal amount on the wire, integer minor units (assets.money) inside."""
+
+    def __init__(self, max_digits=20, decimal_places=DECIMALS, **kwargs):
+        super().__init__(max_digits=max_digits, decimal_places=decimal_places, **kwargs)
+
+    def to_internal_value(self, data):
+        return to_minor(super().to_internal_value(data))
+
+    def to_representation(self, value):
+        return super().to_representation(from_minor(value))
+
 
 class NetworkSerializer(serializers.ModelSerializer):
     class Meta:
@@ -1,19 +1,17 @@
-from tronpy.keys import PrivateKey
 from cryptography.fernet import Fernet
 from solders.keypair import Keypair
 from tronpy import Tron
 from bitcoin import SelectParams
-from bitcoin.wallet import CBitcoinSecret, P2PKHBitcoinAddress
 from eth_account import Account
-from ecdsa import SigningKey, SECP256k1
 
 from django.conf import settings
 import requests
+from assets import hdwallet, keys
 from assets.models import Balance
 from decimal import Decimal
 import logging
+import ast
 import base58
-import hashlib
 
 logger = logging.getLogger(__name__)
 
@@ -46,10 +44,7 @@ class BlockChainService:
         try:
 
             chain = asset.fb_native_asset
-            enc = balance.encrypted_private
-            if isinstance(enc, str) and enc.startswith("b'"):
-                enc = eval(enc)
-            priv = self.fernet.decrypt(enc).decode()
+            priv = self.address_service.signing_key(balance)
 
             if chain in ["ETH", "MATIC", "AVAX", "BNB"]:
                 if not priv.startswith("0x"):
@@ -274,20 +269,17 @@ class AddressService:
         self.network = network
 
     
-    def create_address(self):
-
-        import os 
-
+    def create_address(self, index=None):
+        """
+        Returns (address, private_key). On networks with an HD xpub the address
+        is derived for ``index`` and private_key is None: nothing to store.
+        """
+        if index is not None and hdwallet.is_enabled(self.network.upper()):
+            return hdwallet.deposit_address(self.network.upper(), index), None
         if self.network.upper() == "ETH":
             return self._create_evm_address()
-        elif self.network.upper() == "TRX":
-            return self._create_trx_address()
-        elif self.network.upper() in ['BTC', 'LTC']:
-            secret = os.urandom(32)
-            if self.network.upper() == 'BTC':
-                return self._create_btc_address(secret)
-            else:
-                return self._create_ltc_address(secret)
+        elif self.network.upper() in ("BTC", "LTC", "TRX"):
+            return keys.generate(self.network.upper())
         elif self.network.upper() == "SOL":
             return self._create_sol_address()
         
@@ -295,34 +287,6 @@ class AddressService:
         acct = Account.create()
         return acct.address, acct.key.hex()
 
-    def _create_trx_address(self):
-        private_key = PrivateKey.random()
-        address = private_key.public_key.to_base58check_address()
-        return (address, private_key.hex())
-
-    def _create_btc_address(self, secret):
-        key = CBitcoinSecret.from_secret_bytes(secret)
-        addr = P2PKHBitcoinAddress.from_pubkey(key.pub)
-        wif = str(key)
-        return str(addr), wif
-    
-    def _create_ltc_address(self, secret):
-        version_byte = b"\xb0"
-        compressed_priv = secret + b"\x01"
-        extended_key = version_byte + compressed_priv
-        wif = base58.b58encode_check(extended_key).decode("utf-8")
-        sk = SigningKey.from_string(secret, curve=SECP256k1)
-        vk = sk.verifying_key
-        x = vk.to_string()[:32]
-        y = vk.to_string()[32:]
-        prefix = b"\x02" if (int.from_bytes(y, "big") % 2 == 0) else b"\x03"
-        compressed_pubkey = prefix + x
-        h1 = hashlib.sha256(compressed_pubkey).digest()
-        h2 = hashlib.new("ripemd160", h1).digest()
-        payload = b"\x30" + h2
-        address = base58.b58encode_check(payload).decode("utf-8")
-        return address, wif
-
     def _create_sol_address(self):
         keypair = Keypair()
         address = str(keypair.pubkey())
@@ -342,3 +306,12 @@ class AddressService:
         cipher = Fernet(settings.WALLET_ENCRYPTION_KEY)
         decrypted_key = cipher.decrypt(encrypted_private_key)
         return decrypted_key.decode()
+
+    def signing_key(self, balance):
+        """Private key for ``balance.public``: derived from the HD seed, or decrypted from ``private``."""
+        if balance.hd_index is not None:
+            return hdwallet.deposit_private_key(self.network.upper(), balance.hd_index)
+        enc = balance.private
+        if isinstance(enc, str) and enc.startswith("b'"):
+            enc = ast.literal_eval(enc)
+        return self.decrypt_private_key(enc)
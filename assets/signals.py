@@ -0,0 +1,48 @@
+# assets/signals.py
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from assets import rates
+from assets.consumers import quote_ticker, quotes_group
+from assets.models import Asset, Quote
+
+# asset_id -> symbol, so saving a quote doesn't query its asset every time
+_symbols = {}
+
+
+def quote_symbol(quote) -> str:
+    """The symbol of a quote's asset: from the loaded asset, the cache, or one query the first time."""
+    if Quote._meta.get_field("asset").is_cached(quote):
+        symbol = _symbols[quote.asset_id] = quote.asset.symbol
+        return symbol
+    symbol = _symbols.get(quote.asset_id)
+    if symbol is None:
+        symbol = _symbols[quote.asset_id] = (
+            Asset.objects.values_list("symbol", flat=True).get(pk=quote.asset_id)
+        )
+    return symbol
+
+
+@receiver([post_save, post_delete], sender=Asset, dispatch_uid="assets.forget_symbol")
+def forget_symbol(sender, instance, **kwargs):
+    _symbols.pop(instance.pk, None)
+
+
+@receiver(post_save, sender=Quote, dispatch_uid="assets.broadcast_quote")
+def broadcast_quote(sender, instance, **kwargs):
+    """Fan one Quote write out to every ws/quotes/ subscriber of its symbol, after commit."""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    symbol = quote_symbol(instance)
+    message = {"type": "quote.update", "ticker": quote_ticker(instance, symbol)}
+    transaction.on_commit(lambda: async_to_sync(channel_layer.group_send)(quotes_group(symbol), message))
+
+
+@receiver(post_save, sender=Quote, dispatch_uid="assets.invalidate_rates")
+def invalidate_rates(sender, instance, **kwargs):
+    """Rebuild the cross-rate matrix once the new quote is committed."""
+    transaction.on_commit(rates.invalidate)
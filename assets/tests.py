@@ -1,3 +1,780 @@
-from django.test import TestCase
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import base58
+import coincurve
+from channels.testing import WebsocketCommunicator
+
+from django.db import connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import F
+from django.test import AsyncClient, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from assets import consumers, hdwallet, keys, ledger, portfolio, rates
+from assets.catalog import sync_catalog
+from assets.signals import quote_symbol
+from assets.money import SCALE, InexactAmount, from_minor, to_minor
+from assets.models import Asset, Balance, BalanceEntry, Network, PortfolioSnapshot, Quote, Transaction
+from assets.scanner import Block, BlockScanner, Output
+from assets.service import AddressService
+from core import metrics
+from users.models import User
+
+
+class LedgerTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(email="ledger@example.com")
+        cls.asset = Asset.objects.create(symbol="BTC", name="Bitcoin")
+        cls.btc = Network.objects.create(name="BTC", full_name="Bitcoin")
+        cls.bsc = Network.objects.create(name="BSC", full_name="BNB Smart Chain")
+        cls.asset.networks.add(cls.btc, cls.bsc)
+
+    def balance(self, network, available=0, tail=()):
+        balance = Balance.objects.create(user=self.user, asset=self.asset, network=network, available=available)
+        for amount in tail:
+            ledger.credit(balance, amount, BalanceEntry.DEPOSIT)
+        return balance
+
+    def live(self, balance):
+        return Balance.objects.with_live_available().get(pk=balance.pk).live_available
+
+
+class ReserveTests(LedgerTestCase):
+    def test_takes_from_the_largest_balance_first(self):
+        small = self.balance(self.btc, available=30)
+        large = self.balance(self.bsc, available=100)
+
+        with transaction.atomic():
+            used = ledger.reserve(self.user, self.asset, 120, BalanceEntry.WITHDRAWAL, reference=7)
+
+        self.assertEqual([(b.pk, amount) for b, amount in used], [(large.pk, 100), (small.pk, 20)])
+        self.assertEqual(Balance.objects.get(pk=large.pk).available, 0)
+        self.assertEqual(Balance.objects.get(pk=small.pk).available, 10)
+        debits = BalanceEntry.objects.filter(cause=BalanceEntry.WITHDRAWAL, reference="7")
+        self.assertEqual(sorted(debits.values_list("amount", flat=True)), [-100, -20])
+        self.assertTrue(all(entry.folded for entry in debits))
+
+    def test_rejects_amounts_that_are_not_positive(self):
+        balance = self.balance(self.btc, available=100)
+
+        for amount in (0, -50):
+            with self.subTest(amount), self.assertRaises(ValueError), transaction.atomic():
+                ledger.reserve(self.user, self.asset, amount, BalanceEntry.STAKE)
+
+        self.assertEqual(self.live(balance), 100)
+        self.assertFalse(BalanceEntry.objects.exists())
+
+    def test_insufficient_funds_counts_the_journal_tail(self):
+        self.balance(self.btc, available=40, tail=[50])
+
+        with self.assertRaises(ledger.InsufficientFunds) as raised, transaction.atomic():
+            ledger.reserve(self.user, self.asset, 91, BalanceEntry.WITHDRAWAL)
+
+        self.assertEqual(raised.exception.available, 90)
+        self.assertFalse(BalanceEntry.objects.filter(cause=BalanceEntry.WITHDRAWAL).exists())
+
+    def test_folds_the_tail_it_needs(self):
+        balance = self.balance(self.btc, available=10, tail=[50, 40])
+
+        with transaction.atomic():
+            ledger.reserve(self.user, self.asset, 95, BalanceEntry.STAKE)
+
+        self.assertEqual(Balance.objects.get(pk=balance.pk).available, 5)
+        self.assertFalse(BalanceEntry.objects.filter(balance=balance, folded=False).exists())
+
+    def test_replans_when_the_guard_fails(self):
+        balance = self.balance(self.btc, available=50, tail=[60])
+        real_compact = ledger.compact
+        calls = []
+
+        def compact_then_race(**kwargs):
+            # A concurrent withdrawal lands between planning and the guarded update
+            folded = real_compact(**kwargs)
+            if not calls:
+                Balance.objects.filter(pk=balance.pk).update(available=F("available") - 5)
+            calls.append(kwargs)
+            return folded
+
+        with mock.patch.object(ledger, "compact", side_effect=compact_then_race), transaction.atomic():
+            used = ledger.reserve(self.user, self.asset, 100, BalanceEntry.WITHDRAWAL)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([amount for _, amount in used], [100])
+        self.assertEqual(Balance.objects.get(pk=balance.pk).available, 5)
+        self.assertEqual(BalanceEntry.objects.filter(cause=BalanceEntry.WITHDRAWAL).count(), 1)
+
+    def test_replan_sees_funds_taken_by_the_race(self):
+        balance = self.balance(self.btc, available=50, tail=[60])
+        real_compact = ledger.compact
+
+        def compact_then_race(**kwargs):
+            folded = real_compact(**kwargs)
+            Balance.objects.filter(pk=balance.pk).update(available=F("available") - 30)
+            return folded
+
+        with mock.patch.object(ledger, "compact", side_effect=compact_then_race):
+            with self.assertRaises(ledger.InsufficientFunds) as raised, transaction.atomic():
+                ledger.reserve(self.user, self.asset, 100, BalanceEntry.WITHDRAWAL)
+
+        self.assertEqual(raised.exception.available, 80)
+
+    def test_conflict_when_every_attempt_loses_the_race(self):
+        balance = self.balance(self.btc, available=50, tail=[60])
+        real_compact = ledger.compact
+
+        def compact_then_race(**kwargs):
+            # Funds stay sufficient, but the snapshot moves under every plan
+            folded = real_compact(**kwargs)
+            Balance.objects.filter(pk=balance.pk).update(available=F("available") - 20)
+            ledger.credit(balance, 20, BalanceEntry.DEPOSIT)
+            return folded
+
+        with mock.patch.object(ledger, "compact", side_effect=compact_then_race) as compact:
+            with self.assertRaises(ledger.ReservationConflict), transaction.atomic():
+                ledger.reserve(self.user, self.asset, 100, BalanceEntry.WITHDRAWAL, attempts=3)
+
+        self.assertEqual(compact.call_count, 3)
+        self.assertEqual(self.live(balance), 110)
+        self.assertFalse(BalanceEntry.objects.filter(cause=BalanceEntry.WITHDRAWAL).exists())
+
+
+class CompactTests(LedgerTestCase):
+    def test_folds_the_tail_without_changing_live_balances(self):
+        first = self.balance(self.btc, available=10, tail=[1, 2, 3])
+        second = self.balance(self.bsc, tail=[5, -4])
+
+        self.assertEqual(ledger.compact(batch_size=2), 5)
+
+        self.assertEqual(Balance.objects.get(pk=first.pk).available, 16)
+        self.assertEqual(Balance.objects.get(pk=second.pk).available, 1)
+        self.assertEqual(self.live(first), 16)
+        self.assertFalse(BalanceEntry.objects.filter(folded=False).exists())
+        self.assertEqual(ledger.compact(), 0)
+
+    def test_only_the_given_balances(self):
+        first = self.balance(self.btc, tail=[7])
+        second = self.balance(self.bsc, tail=[9])
+
+        self.assertEqual(ledger.compact(balance_ids=[first.pk]), 1)
+
+        self.assertEqual(Balance.objects.get(pk=first.pk).available, 7)
+        self.assertEqual(Balance.objects.get(pk=second.pk).available, 0)
+        self.assertEqual(self.live(second), 9)
+
+
+class BalanceAtTests(LedgerTestCase):
+    def test_sums_entries_up_to_the_moment_across_networks(self):
+        now = timezone.now()
+        first = self.balance(self.btc)
+        second = self.balance(self.bsc)
+        for balance, amount, age in [(first, 100, 3), (second, 50, 2), (first, -30, 1), (second, 20, 0)]:
+            entry = ledger.credit(balance, amount, BalanceEntry.DEPOSIT)
+            BalanceEntry.objects.filter(pk=entry.pk).update(created_at=now - timedelta(days=age))
+
+        self.assertEqual(ledger.balance_at(self.user, self.asset, now - timedelta(days=4)), 0)
+        self.assertEqual(ledger.balance_at(self.user, self.asset, now - timedelta(days=2)), 150)
+        self.assertEqual(ledger.balance_at(self.user, self.asset, now - timedelta(hours=1)), 120)
+        self.assertEqual(ledger.balance_at(self.user, self.asset, now), 140)
+
+    def test_folding_does_not_change_history(self):
+        self.balance(self.btc, tail=[25])
+        before = ledger.balance_at(self.user, self.asset, timezone.now())
+        ledger.compact()
+        self.assertEqual(ledger.balance_at(self.user, self.asset, timezone.now()), before)
+
+
+class TransactionExportTests(LedgerTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for amount in (150000000, 25):
+            Transaction.objects.create(
+                user=cls.user, asset=cls.asset, network=cls.btc, type=Transaction.DEPOSIT, amount=amount
+            )
+        cls.headers = {"Authorization": f"Bearer {AccessToken.for_user(cls.user)}"}
+
+    def test_streams_from_a_sync_iterator_under_wsgi(self):
+        response = APIClient(headers=self.headers).get(reverse("transaction-export"), {"output": "ndjson"})
+
+        self.assertTrue(response.streaming)
+        self.assertFalse(response.is_async)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)["amount"] for line in lines], ["1.50000000", "0.00000025"])
+
+    async def test_streams_from_an_async_generator_under_asgi(self):
+        # Same timestamp on every row, one row per chunk: the keyset must page on id too
+        await Transaction.objects.filter(user=self.user).aupdate(timestamp=timezone.now())
+        with mock.patch("assets.views.EXPORT_CHUNK_SIZE", 1):
+            response = await AsyncClient().get(reverse("transaction-export"), headers=self.headers)
+
+            self.assertTrue(response.streaming)
+            self.assertTrue(response.is_async)
+            body = b"".join([chunk async for chunk in response.streaming_content]).decode()
+
+        header, *rows = body.splitlines()
+        self.assertTrue(header.startswith("transaction_id,timestamp,type"))
+        self.assertEqual([row.split(",")[6] for row in rows], ["1.50000000", "0.00000025"])
+
+
+HD_XPUB = hdwallet.ExtendedKey.from_seed(bytes(range(32))).derive(hdwallet.account_path("BTC")).neuter().serialize()
+
+
+@override_settings(HD_XPUBS={"BTC": HD_XPUB})
+class DepositAddressTests(LedgerTestCase):
+    def deposit(self, user):
+        client = APIClient(headers={"Authorization": f"Bearer {AccessToken.for_user(user)}"})
+        response = client.get(reverse("deposit", kwargs={"symbol": "BTC", "network": "BTC"}))
+        self.assertEqual(response.status_code, 200)
+        return response.json()["address"], Balance.objects.get(user=user, network=self.btc)
+
+    def test_indexes_are_dense_per_network(self):
+        # Balances without addresses push the pks well past the indexes
+        for network in (self.btc, self.bsc):
+            self.balance(network)
+        second = User.objects.create(email="second@example.com")
+
+        first_address, first = self.deposit(self.user)
+        second_address, second = self.deposit(second)
+
+        self.assertEqual((first.hd_index, second.hd_index), (0, 1))
+        self.assertEqual(first_address, hdwallet.deposit_address("BTC", 0))
+        self.assertEqual(second_address, hdwallet.deposit_address("BTC", 1))
+        self.assertEqual(self.deposit(self.user)[0], first_address)
+
+    def test_index_taken_by_a_concurrent_request_is_skipped(self):
+        rival = User.objects.create(email="rival@example.com")
+        create_address = AddressService.create_address
+
+        def race(service, index=None):
+            # Another request claims the first index between Max() and the update
+            if not Balance.objects.filter(user=rival).exists():
+                Balance.objects.create(user=rival, asset=self.asset, network=self.btc, hd_index=index, public="rival")
+            return create_address(service, index=index)
+
+        with mock.patch.object(AddressService, "create_address", autospec=True, side_effect=race):
+            address, balance = self.deposit(self.user)
+
+        self.assertEqual(balance.hd_index, 1)
+        self.assertEqual(address, hdwallet.deposit_address("BTC", 1))
+
+    def test_scanner_finds_an_address_given_to_an_existing_balance(self):
+        existing = self.balance(self.btc)
+        newer = User.objects.create(email="newer@example.com")
+        Balance.objects.create(user=newer, asset=self.asset, network=self.btc, public="newer")
+        found = []
+        scanner = BlockScanner("BTC", sink=found.extend)
+        scanner.run([Block(1, "a", [])])
+
+        address, balance = self.deposit(self.user)
+        scanner.run([Block(2, "b", [Output("tx", 0, address, 5 * SCALE, "BTC")])])
+
+        self.assertEqual(balance.pk, existing.pk)
+        self.assertEqual([(c.balance_id, c.address, c.amount) for c in found], [(existing.pk, address, 5 * SCALE)])
+
+
+class CatalogSyncTests(TestCase):
+    NETWORKS = {
+        "BTC": {"full_name": "Bitcoin", "confirmations": 2, "min_deposit_amount": "0.0001"},
+        "ETH": {"full_name": "Ethereum", "confirmations": 12},
+    }
+
+    def sync(self, assets, networks=None):
+        return sync_catalog(self.NETWORKS if networks is None else networks, assets)
+
+    def links(self, symbol):
+        return set(Asset.objects.get(symbol=symbol).networks.values_list("name", flat=True))
+
+    def test_inserts_then_does_nothing_on_the_same_catalog(self):
+        assets = {
+            "BTC": {"name": "Bitcoin", "networks": ["BTC"]},
+            "USDT": {"name": "Tether", "networks": ["ETH", "BTC"]},
+        }
+        stats = self.sync(assets)
+
+        self.assertEqual(
+            (stats["network_created"], stats["asset_created"], stats["links_added"]), (2, 2, 3)
+        )
+        self.assertEqual(Network.objects.get(name="BTC").min_deposit_amount, Decimal("0.0001"))
+        self.assertEqual(self.links("USDT"), {"BTC", "ETH"})
+
+        with self.assertNumQueries(5):  # networks, assets and links, between SAVEPOINT and RELEASE
+            stats = self.sync(assets)
+        self.assertEqual(
+            stats,
+            {
+                "network_created": 0, "network_updated": 0, "network_unchanged": 2,
+                "asset_created": 0, "asset_updated": 0, "asset_unchanged": 2,
+                "links_added": 0, "links_removed": 0,
+            },
+        )
+
+    def test_updates_changed_fields_only(self):
+        self.sync({"BTC": {"name": "Bitcoin", "staking": False, "networks": ["BTC"]}})
+
+        stats = self.sync(
+            {"BTC": {"name": "Bitcoin", "staking": True, "networks": ["BTC"]}},
+            {"BTC": {**self.NETWORKS["BTC"], "confirmations": 3}, "ETH": self.NETWORKS["ETH"]},
+        )
+
+        self.assertEqual((stats["asset_updated"], stats["network_updated"], stats["network_unchanged"]), (1, 1, 1))
+        self.assertTrue(Asset.objects.get(symbol="BTC").staking)
+        self.assertEqual(Network.objects.get(name="BTC").confirmations, 3)
+
+    def test_replaces_links_and_leaves_unmentioned_rows_alone(self):
+        self.sync({
+            "USDT": {"name": "Tether", "networks": ["BTC", "ETH"]},
+            "ETH": {"name": "Ether", "networks": ["ETH"]},
+        })
+
+        stats = self.sync({"USDT": {"name": "Tether", "networks": ["ETH"]}, "ETH": {"name": "Ether", "networks": None}})
+        self.assertEqual((stats["links_added"], stats["links_removed"]), (0, 1))
+        self.assertEqual(self.links("USDT"), {"ETH"})
+        self.assertEqual(self.links("ETH"), {"ETH"})
+
+        self.sync({"USDT": {"name": "Tether", "networks": []}}, {})
+        self.assertEqual(self.links("USDT"), set())
+        self.assertEqual(Asset.objects.count(), 2)
+        self.assertEqual(Network.objects.count(), 2)
+
+    def test_unknown_network_rolls_back(self):
+        with self.assertRaisesMessage(ValueError, "Unknown network(s): SOL"):
+            self.sync({"SOL": {"name": "Solana", "networks": ["SOL"]}})
+        self.assertFalse(Asset.objects.exists())
+
+
+class MinorUnitTests(SimpleTestCase):
+    def test_exact_values_convert_both_ways(self):
+        for value, units in [("0", 0), ("1", 100000000), ("0.00000001", 1), ("-2.5", -250000000),
+                             ("123456.78900000", 12345678900000), (Decimal("1E-8"), 1), (7, 700000000)]:
+            with self.subTest(value=value):
+                self.assertEqual(to_minor(value), units)
+                self.assertEqual(from_minor(units), Decimal(value))
+
+    def test_from_minor_has_exactly_eight_places(self):
+        self.assertEqual(str(from_minor(150000000)), "1.50000000")
+
+    def test_rejects_what_is_not_a_whole_number_of_units(self):
+        for value in ("0.000000001", "1.123456789", Decimal("1E-9"), "NaN", "Infinity", "abc", None, ""):
+            with self.subTest(value=value), self.assertRaises(InexactAmount):
+                to_minor(value)
+
+    def test_float_noise_is_rejected_not_rounded(self):
+        with self.assertRaises(InexactAmount):
+            to_minor(0.1)
+
+
+class MigrationTestCase(TransactionTestCase):
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+
+class MinorUnitMigrationTests(MigrationTestCase):
+    before = [("assets", "0019_portfoliosnapshot")]
+    after = [("assets", "0020_minor_units")]
+
+    def test_amounts_survive_a_round_trip(self):
+        apps = self.migrate(self.before)
+        network = apps.get_model("assets", "Network").objects.create(name="BTC", full_name="Bitcoin")
+        asset = apps.get_model("assets", "Asset").objects.create(symbol="BTC", name="Bitcoin")
+        user = apps.get_model("users", "User").objects.create(email="migration@example.com")
+        balance = apps.get_model("assets", "Balance").objects.create(
+            user=user, asset=asset, network=network, available=Decimal("123.45678901")
+        )
+        apps.get_model("assets", "BalanceEntry").objects.create(
+            balance=balance, amount=Decimal("-0.00000001"), cause="withdrawal"
+        )
+        apps.get_model("assets", "Transaction").objects.create(
+            user=user, asset=asset, network=network, type="deposit",
+            amount=Decimal("1.5"), fee=Decimal("0.00000025"),
+        )
+
+        apps = self.migrate(self.after)
+        self.assertEqual(apps.get_model("assets", "Balance").objects.get().available, 12345678901)
+        self.assertEqual(apps.get_model("assets", "BalanceEntry").objects.get().amount, -1)
+        tx = apps.get_model("assets", "Transaction").objects.get()
+        self.assertEqual((tx.amount, tx.fee), (150000000, 25))
+
+        apps = self.migrate(self.before)
+        self.assertEqual(apps.get_model("assets", "Balance").objects.get().available, Decimal("123.45678901"))
+        self.assertEqual(apps.get_model("assets", "BalanceEntry").objects.get().amount, Decimal("-0.00000001"))
+        tx = apps.get_model("assets", "Transaction").objects.get()
+        self.assertEqual((tx.amount, tx.fee), (Decimal("1.5"), Decimal("0.00000025")))
+
+
+class CatalogKeysMigrationTests(MigrationTestCase):
+    before = [("assets", "0015_balanceentry")]
+    after = [("assets", "0016_unique_catalog_keys")]
+
+    def test_duplicates_are_merged_into_the_oldest_row(self):
+        apps = self.migrate(self.before)
+        Asset_, Network_ = apps.get_model("assets", "Asset"), apps.get_model("assets", "Network")
+        Quote_, Balance_ = apps.get_model("assets", "Quote"), apps.get_model("assets", "Balance")
+        networks = [Network_.objects.create(name="BTC", full_name="Bitcoin") for _ in range(2)]
+        eth = Network_.objects.create(name="ETH", full_name="Ethereum")
+        keep, duplicate = [Asset_.objects.create(symbol="BTC", name="Bitcoin") for _ in range(2)]
+        keep.networks.add(networks[0])
+        duplicate.networks.add(networks[1], eth)
+        user = apps.get_model("users", "User").objects.create(email="dupes@example.com")
+        balance = Balance_.objects.create(user=user, asset=duplicate, network=networks[1], available=1)
+        prices = dict(
+            bid=1, ask=1, volume=0, open_price=1, high_price=1, low_price=1, prev_close_price=1, max_24h=1, min_24h=1,
+        )
+        Quote_.objects.create(asset=keep, interval="1m", lp=1, **prices)
+        Quote_.objects.create(asset=duplicate, interval="1m", lp=2, **prices)  # same key as keep's: dropped
+        Quote_.objects.create(asset=duplicate, interval="1h", lp=3, **prices)
+
+        apps = self.migrate(self.after)
+        Asset_, Balance_ = apps.get_model("assets", "Asset"), apps.get_model("assets", "Balance")
+        self.assertEqual(list(Asset_.objects.values_list("pk", flat=True)), [keep.pk])
+        self.assertEqual(
+            set(apps.get_model("assets", "Network").objects.values_list("pk", flat=True)), {networks[0].pk, eth.pk}
+        )
+        self.assertEqual(
+            set(Asset_.objects.get().networks.values_list("pk", flat=True)), {networks[0].pk, eth.pk}
+        )
+        balance = Balance_.objects.get(pk=balance.pk)
+        self.assertEqual((balance.asset_id, balance.network_id), (keep.pk, networks[0].pk))
+        self.assertEqual(
+            sorted(apps.get_model("assets", "Quote").objects.values_list("asset_id", "interval", "lp")),
+            [(keep.pk, "1h", 3), (keep.pk, "1m", 1)],
+        )
+
+
+class BalanceStreamConsumerTests(SimpleTestCase):
+    PAYLOAD = {"value": "1.00", "currency": "USD"}
+
+    def setUp(self):
+        for name, value in (("HEARTBEAT_INTERVAL", 0.1), ("PUSH_MIN_INTERVAL", 0.05), ("PONG_LAG_LIMIT", 0.15)):
+            patcher = mock.patch.object(consumers, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        total = mock.patch.object(
+            consumers.BalanceStreamConsumer, "_compute_total_value_with_rate",
+            mock.AsyncMock(return_value=self.PAYLOAD),
+        )
+        total.start()
+        self.addCleanup(total.stop)
+
+    async def connect(self):
+        communicator = WebsocketCommunicator(consumers.BalanceStreamConsumer.as_asgi(), "/ws/balances/")
+        communicator.scope["user"] = User(id=1, email="stream@example.com")
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        self.assertEqual(await communicator.receive_json_from(), self.PAYLOAD)
+        return communicator
+
+    async def drain(self, communicator):
+        messages = []
+        while not await communicator.receive_nothing(timeout=0.01):
+            messages.append(await communicator.receive_json_from())
+        return messages
+
+    async def test_long_push_interval_still_pings(self):
+        communicator = await self.connect()
+        await communicator.send_json_to({"action": "interval", "seconds": consumers.PUSH_MAX_INTERVAL})
+        self.assertEqual(await communicator.receive_json_from(), self.PAYLOAD)
+
+        self.assertEqual(await communicator.receive_json_from(timeout=0.5), {"type": "ping"})
+        await communicator.send_json_to({"action": "pong"})
+        self.assertEqual(await communicator.receive_json_from(timeout=0.5), {"type": "ping"})
+        await communicator.disconnect()
+
+    async def test_unanswered_ping_pauses_pushes_until_the_pong(self):
+        communicator = await self.connect()
+        skipped = metrics.ws_skipped._values.get(("balances",), 0)
+        await communicator.send_json_to({"action": "interval", "seconds": 0.05})
+
+        while await communicator.receive_json_from(timeout=0.5) != {"type": "ping"}:
+            pass
+        # Past the lag limit nothing but pings is sent
+        await asyncio.sleep(consumers.PONG_LAG_LIMIT * 2)
+        await self.drain(communicator)
+        await asyncio.sleep(consumers.PONG_LAG_LIMIT * 2)
+        late = await self.drain(communicator)
+        self.assertTrue(late)
+        self.assertTrue(all(message == {"type": "ping"} for message in late))
+        self.assertGreater(metrics.ws_skipped._values.get(("balances",), 0), skipped)
+
+        await communicator.send_json_to({"action": "pong"})
+        self.assertEqual(await communicator.receive_json_from(timeout=0.5), self.PAYLOAD)
+        await communicator.disconnect()
+
+    async def test_clients_that_never_talk_are_not_throttled(self):
+        with mock.patch.object(consumers, "PUSH_INTERVAL", 0.05):
+            communicator = await self.connect()
+            await asyncio.sleep(consumers.PONG_LAG_LIMIT * 2)
+            for _ in range(3):
+                self.assertEqual(await communicator.receive_json_from(timeout=0.5), self.PAYLOAD)
+        await communicator.disconnect()
+
+
+def _quote(asset, lp, value_in_usd=0):
+    lp = Decimal(lp)
+    return Quote.objects.create(
+        asset=asset, interval="1m", bid=lp, ask=lp, lp=lp, volume=0,
+        open_price=lp, high_price=lp, low_price=lp, value_in_usd=Decimal(value_in_usd),
+    )
+
+
+class QuoteSignalTests(TestCase):
+    def test_saving_a_quote_does_not_query_its_asset_again(self):
+        asset = Asset.objects.create(symbol="BTC", name="Bitcoin")
+        _quote(asset, "100")
+
+        quote = Quote.objects.get()  # asset not loaded
+        with self.assertNumQueries(1):
+            quote.save()
+        self.assertEqual(quote_symbol(quote), "BTC")
+
+    def test_renamed_asset_is_looked_up_again(self):
+        asset = Asset.objects.create(symbol="BTC", name="Bitcoin")
+        quote = _quote(asset, "100")
+        asset.symbol = "XBT"
+        asset.save()
+
+        self.assertEqual(quote_symbol(Quote.objects.get(pk=quote.pk)), "XBT")
+
+
+class RateMatrixTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.btc = Asset.objects.create(symbol="BTC", name="Bitcoin")
+        cls.eth = Asset.objects.create(symbol="ETH", name="Ether")
+        cls.usdt = Asset.objects.create(symbol="USDT", name="Tether")
+        cls.doge = Asset.objects.create(symbol="DOGE", name="Dogecoin")
+        _quote(cls.btc, "100", value_in_usd="200")
+        _quote(cls.eth, "10")  # no USD value: lp is in USDT
+
+    def test_direct_and_inverse(self):
+        matrix = rates.RateMatrix.build()
+
+        self.assertEqual(matrix.rate("BTC", "USD"), 200.0)
+        self.assertEqual(matrix.rate("USD", "BTC"), 1 / 200)
+        self.assertEqual(matrix.rate(self.btc, self.btc.pk), 1.0)
+        self.assertEqual(matrix.convert(3 * SCALE, "BTC", "USD"), 600.0)
+
+    def test_missing_usdt_is_worth_one_dollar(self):
+        matrix = rates.RateMatrix.build()
+
+        self.assertEqual(matrix.rate("ETH", "USD"), 10.0)
+        self.assertEqual(matrix.rate("BTC", "ETH"), 20.0)
+        self.assertEqual(matrix.rate("ETH", "USDT"), 10.0)
+        self.assertEqual(matrix.rate("USDT", "USD"), 1.0)
+
+    def test_triangulates_through_the_usdt_quote(self):
+        _quote(self.usdt, "1", value_in_usd="0.5")
+        matrix = rates.RateMatrix.build()
+
+        self.assertEqual(matrix.rate("ETH", "USD"), 5.0)
+        self.assertEqual(matrix.rate("ETH", "USDT"), 10.0)
+        self.assertEqual(matrix.rate("BTC", "ETH"), 40.0)
+        self.assertEqual(matrix.rate("USDT", "BTC"), 0.5 / 200)
+
+    def test_assets_without_a_quote_have_no_rate(self):
+        matrix = rates.RateMatrix.build()
+
+        self.assertIsNone(matrix.rate("DOGE", "USD"))
+        self.assertIsNone(matrix.rate(self.doge, "BTC"))
+        self.assertIsNone(matrix.convert(SCALE, "BTC", "DOGE"))
+        self.assertIsNone(matrix.total({self.btc.pk: SCALE}, "DOGE"))
+        self.assertEqual(matrix.total({self.btc.pk: SCALE, self.doge.pk: SCALE, "ETH": 2 * SCALE}, "USD"), 220.0)
+        self.assertEqual(matrix.total({}, "USD"), 0.0)
+
+
+class PortfolioTests(LedgerTestCase):
+    DAY = date(2026, 1, 10)
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        _quote(cls.asset, "1", value_in_usd="2.5")
+
+    def entry(self, balance, amount, folded, after_cutoff):
+        entry = BalanceEntry.objects.create(balance=balance, amount=amount, cause=BalanceEntry.DEPOSIT, folded=folded)
+        cutoff = portfolio.day_cutoff(self.DAY)
+        created_at = cutoff + timedelta(hours=1) if after_cutoff else cutoff - timedelta(hours=1)
+        BalanceEntry.objects.filter(pk=entry.pk).update(created_at=created_at)
+
+    def snapshots(self):
+        return dict(PortfolioSnapshot.objects.values_list("user__email", "value_usd"))
+
+    def test_values_balances_at_the_cutoff(self):
+        balance = self.balance(self.btc, available=SCALE + SCALE // 5)
+        self.entry(balance, SCALE // 2, folded=False, after_cutoff=False)  # unfolded tail: counts
+        self.entry(balance, SCALE // 5, folded=True, after_cutoff=True)  # in available, but too late
+        self.entry(balance, 3 * SCALE // 10, folded=False, after_cutoff=True)  # too late
+        self.balance(self.bsc, available=34 * SCALE // 10000)  # 0.0085 USD rounds the total up
+        unpriced = Asset.objects.create(symbol="XYZ", name="Unpriced")
+        other = User.objects.create(email="other@example.com")
+        Balance.objects.create(user=other, asset=unpriced, network=self.btc, available=SCALE)
+
+        self.assertEqual(portfolio.snapshot_day(self.DAY), 1)
+        # (1.2 + 0.5 - 0.2 + 0.0034) BTC at 2.5 USD = 3.7585
+        self.assertEqual(self.snapshots(), {"ledger@example.com": Decimal("3.76")})
+
+    def test_rerunning_a_day_replaces_its_rows(self):
+        self.balance(self.btc, available=SCALE)
+        PortfolioSnapshot.objects.create(user=self.user, day=self.DAY - timedelta(days=1), value_usd=1)
+        portfolio.snapshot_day(self.DAY)
+        Quote.objects.filter(asset=self.asset).update(value_in_usd=Decimal("3"))
+
+        self.assertEqual(portfolio.snapshot_day(self.DAY), 1)
+        self.assertEqual(
+            list(PortfolioSnapshot.objects.order_by("day").values_list("day", "value_usd")),
+            [(self.DAY - timedelta(days=1), Decimal("1")), (self.DAY, Decimal("3"))],
+        )
+
+    def test_chart_keeps_the_last_snapshot_of_each_bucket(self):
+        PortfolioSnapshot.objects.bulk_create(
+            PortfolioSnapshot(user=self.user, day=self.DAY - timedelta(days=back), value_usd=back)
+            for back in range(10)
+        )
+
+        week = portfolio.chart(self.user, "1W", self.DAY)
+        year = portfolio.chart(self.user, "1Y", self.DAY)
+
+        self.assertEqual([value for _, value in week], [6, 5, 4, 3, 2, 1, 0])
+        self.assertEqual(year, [(self.DAY - timedelta(days=7), 7), (self.DAY, 0)])
+        self.assertEqual(portfolio.chart(self.user, "1M", self.DAY - timedelta(days=40)), [])
+
+
+class KeyTests(SimpleTestCase):
+    # (address, private key) for the secrets 1 and 0xC0FFEE, as python-bitcoinlib,
+    # ecdsa, tronpy and eth-account give them
+    KNOWN = {
+        1: {
+            "BTC": ("1BgGZ9tcN4rm9KBzDn7KprQz87SZ26SAMH", "KwDiBf89QgGbjEhKnhXJuH7LrciVrZi3qYjgd9M7rFU73sVHnoWn"),
+            "LTC": ("LVuDpNCSSj6pQ7t9Pv6d6sUkLKoqDEVUnJ", "T33ydQRKp4FCW5LCLLUB7deioUMoveiwekdwUwyfRDeGZm76aUjV"),
+            "ETH": ("0x7E5F4552091A69125d5DfCb7b8C2659029395Bdf", "0x" + "0" * 63 + "1"),
+            "TRX": ("TMVQGm1qAQYVdetCeGRRkTWYYrLXuHK2HC", "0" * 63 + "1"),
+        },
+        0xC0FFEE: {
+            "BTC": ("1PkjVT2eq7sLQaad4sa3bsawdHdop5EPWj", "KwDiBf89QgGbjEhKnhXJuH7LrciVrZi3qYjgd9M7rokSi6WAaj83"),
+            "LTC": ("LhygkfLUun7PfPGnF1ZLstehqW15qeuGZm", "T33ydQRKp4FCW5LCLLUB7deioUMoveiwekdwUwyfRmvcDz5XoXG6"),
+            "ETH": ("0xF5A5E415061470A8b9137959180901aEa72450a4", "0x" + "0" * 58 + "c0ffee"),
+            "TRX": ("TYN5HMyVFUj7Hxrq5TWjYL6YjFMuHnSDvh", "0" * 58 + "c0ffee"),
+        },
+    }
+
+    def test_known_secrets(self):
+        for secret, expected in self.KNOWN.items():
+            for network, pair in expected.items():
+                with self.subTest(network=network, secret=secret):
+                    self.assertEqual(keys.from_secret(network, secret.to_bytes(32, "big")), pair)
+
+    def test_encode_address_matches_from_secret(self):
+        secret = keys.new_secret()
+        public_key = coincurve.PublicKey.from_secret(secret)
+        for network in keys.NETWORKS:
+            for compressed in (True, False):
+                with self.subTest(network=network, compressed=compressed):
+                    self.assertEqual(
+                        keys.encode_address(network, public_key.format(compressed=compressed)),
+                        keys.from_secret(network, secret)[0],
+                    )
+
+    def test_batches_are_split_into_chunks(self):
+        chunks = []
+
+        def generate_many(network, count):
+            chunks.append(count)
+            return [keys.generate(network) for _ in range(count)]
+
+        with mock.patch.object(keys, "BATCH_CHUNK", 3), \
+                mock.patch.object(keys, "ProcessPoolExecutor", ThreadPoolExecutor), \
+                mock.patch.object(keys, "_generate_many", side_effect=generate_many):
+            batch = keys.generate_batch("BTC", 7, workers=2)
+            self.assertEqual(sorted(chunks), [1, 3, 3])
+
+            chunks.clear()
+            self.assertEqual(len(keys.generate_batch("BTC", 7, workers=1)), 7)
+            self.assertEqual(chunks, [7])
+
+        self.assertEqual(len(batch), 7)
+        self.assertEqual(len({address for address, _ in batch}), 7)
+        for address, wif in batch:
+            secret = base58.b58decode_check(wif)[1:33]
+            self.assertEqual(keys.from_secret("BTC", secret), (address, wif))
+        with self.assertRaises(ValueError):
+            keys.generate_batch("DOGE", 1)
+
+
+class HDWalletTests(SimpleTestCase):
+    # BIP32 test vectors 1 and 3: (path, xpub, xprv)
+    VECTORS = {
+        "000102030405060708090a0b0c0d0e0f": [
+            ("m",
+             "xpub661MyMwAqRbcFtXgS5sYJABqqG9YLmC4Q1Rdap9gSE8NqtwybGhePY2gZ29ESFjqJoCu1Rupje8YtGqsefD265TMg7usUDFdp6W1EGMcet8",
+             "xprv9s21ZrQH143K3QTDL4LXw2F7HEK3wJUD2nW2nRk4stbPy6cq3jPPqjiChkVvvNKmPGJxWUtg6LnF5kejMRNNU3TGtRBeJgk33yuGBxrMPHi"),
+            ("m/0'",
+             "xpub68Gmy5EdvgibQVfPdqkBBCHxA5htiqg55crXYuXoQRKfDBFA1WEjWgP6LHhwBZeNK1VTsfTFUHCdrfp1bgwQ9xv5ski8PX9rL2dZXvgGDnw",
+             "xprv9uHRZZhk6KAJC1avXpDAp4MDc3sQKNxDiPvvkX8Br5ngLNv1TxvUxt4cV1rGL5hj6KCesnDYUhd7oWgT11eZG7XnxHrnYeSvkzY7d2bhkJ7"),
+            ("m/0'/1",
+             "xpub6ASuArnXKPbfEwhqN6e3mwBcDTgzisQN1wXN9BJcM47sSikHjJf3UFHKkNAWbWMiGj7Wf5uMash7SyYq527Hqck2AxYysAA7xmALppuCkwQ",
+             "xprv9wTYmMFdV23N2TdNG573QoEsfRrWKQgWeibmLntzniatZvR9BmLnvSxqu53Kw1UmYPxLgboyZQaXwTCg8MSY3H2EU4pWcQDnRnrVA1xe8fs"),
+            ("m/0'/1/2'",
+             "xpub6D4BDPcP2GT577Vvch3R8wDkScZWzQzMMUm3PWbmWvVJrZwQY4VUNgqFJPMM3No2dFDFGTsxxpG5uJh7n7epu4trkrX7x7DogT5Uv6fcLW5",
+             "xprv9z4pot5VBttmtdRTWfWQmoH1taj2axGVzFqSb8C9xaxKymcFzXBDptWmT7FwuEzG3ryjH4ktypQSAewRiNMjANTtpgP4mLTj34bhnZX7UiM"),
+            ("m/0'/1/2'/2",
+             "xpub6FHa3pjLCk84BayeJxFW2SP4XRrFd1JYnxeLeU8EqN3vDfZmbqBqaGJAyiLjTAwm6ZLRQUMv1ZACTj37sR62cfN7fe5JnJ7dh8zL4fiyLHV",
+             "xprvA2JDeKCSNNZky6uBCviVfJSKyQ1mDYahRjijr5idH2WwLsEd4Hsb2Tyh8RfQMuPh7f7RtyzTtdrbdqqsunu5Mm3wDvUAKRHSC34sJ7in334"),
+            ("m/0'/1/2'/2/1000000000",
+             "xpub6H1LXWLaKsWFhvm6RVpEL9P4KfRZSW7abD2ttkWP3SSQvnyA8FSVqNTEcYFgJS2UaFcxupHiYkro49S8yGasTvXEYBVPamhGW6cFJodrTHy",
+             "xprvA41z7zogVVwxVSgdKUHDy1SKmdb533PjDz7J6N6mV6uS3ze1ai8FHa8kmHScGpWmj4WggLyQjgPie1rFSruoUihUZREPSL39UNdE3BBDu76"),
+        ],
+        # Leading zeros in the private key
+        "4b381541583be4423346c643850da4b320e46a87ae3d2a4e6da11eba819cd4acba45d239319ac14f863b8d5ab5a0d0c64d2e8a1e7d1457df2e5a3c51c73235be": [
+            ("m",
+             "xpub661MyMwAqRbcEZVB4dScxMAdx6d4nFc9nvyvH3v4gJL378CSRZiYmhRoP7mBy6gSPSCYk6SzXPTf3ND1cZAceL7SfJ1Z3GC8vBgp2epUt13",
+             "xprv9s21ZrQH143K25QhxbucbDDuQ4naNntJRi4KUfWT7xo4EKsHt2QJDu7KXp1A3u7Bi1j8ph3EGsZ9Xvz9dGuVrtHHs7pXeTzjuxBrCmmhgC6"),
+            ("m/0'",
+             "xpub68NZiKmJWnxxS6aaHmn81bvJeTESw724CRDs6HbuccFQN9Ku14VQrADWgqbhhTHBaohPX4CjNLf9fq9MYo6oDaPPLPxSb7gwQN3ih19Zm4Y",
+             "xprv9uPDJpEQgRQfDcW7BkF7eTya6RPxXeJCqCJGHuCJ4GiRVLzkTXBAJMu2qaMWPrS7AANYqdq6vcBcBUdJCVVFceUvJFjaPdGZ2y9WACViL4L"),
+        ],
+    }
+    SEED = "000102030405060708090a0b0c0d0e0f"
+
+    def test_bip32_vectors(self):
+        for seed, chain in self.VECTORS.items():
+            master = hdwallet.ExtendedKey.from_seed(bytes.fromhex(seed))
+            for path, xpub, xprv in chain:
+                with self.subTest(seed=seed[:8], path=path):
+                    node = master.derive(path)
+                    self.assertEqual((node.neuter().serialize(), node.serialize()), (xpub, xprv))
+                    self.assertEqual(hdwallet.ExtendedKey.parse(xprv), node)
+
+    def test_public_derivation_matches_private(self):
+        _, xpub, _ = self.VECTORS[self.SEED][3]
+        public = hdwallet.ExtendedKey.parse(xpub).derive("2/1000000000")
+        self.assertEqual(public.serialize(), self.VECTORS[self.SEED][5][1])
+        with self.assertRaises(hdwallet.HDKeyError):
+            hdwallet.ExtendedKey.parse(xpub).derive("0'")
+
+    def test_deposit_key_matches_the_deposit_address(self):
+        account = hdwallet.ExtendedKey.from_seed(bytes.fromhex(self.SEED)).derive(hdwallet.account_path("BTC"))
+        with override_settings(HD_SEEDS={"BTC": self.SEED}, HD_XPUBS={"BTC": account.neuter().serialize()}):
+            wif = hdwallet.deposit_private_key("BTC", 7)
+            secret = base58.b58decode_check(wif)[1:33]
+            self.assertEqual(keys.from_secret("BTC", secret), (hdwallet.deposit_address("BTC", 7), wif))
+
+    def test_seed_not_matching_the_xpub_is_refused(self):
+        with override_settings(HD_SEEDS={"BTC": self.SEED}, HD_XPUBS={"BTC": HD_XPUB}):
+            with self.assertRaisesMessage(hdwallet.HDKeyError, "does not match its configured xpub"):
+                hdwallet.deposit_private_key("BTC", 0)
+        with override_settings(HD_SEEDS={}, HD_XPUBS={"BTC": HD_XPUB}):
+            with self.assertRaisesMessage(hdwallet.HDKeyError, "No HD seed configured for BTC"):
+                hdwallet.deposit_private_key("BTC", 0)
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import AssetListView, Deposit, ValidateAddressView, WithdrawView, WithdrawalHistoryView, WithdrawalStatusView
+from .views import AssetListView, Deposit, FearGreedView, PortfolioHistoryView, TransactionExportView, ValidateAddressView, WithdrawView, WithdrawalHistoryView, WithdrawalStatusView
 
 urlpatterns = [
     path("assets/", AssetListView.as_view(), name="asset-list"),
@@ -7,5 +7,8 @@ urlpatterns = [
     path('assets/validate-address/', ValidateAddressView.as_view(), name='validate-address'),
     path('assets/withdraw/', WithdrawView.as_view(), name='withdraw'),
     path('assets/withdrawal-history/', WithdrawalHistoryView.as_view(), name='withdrawal-history'),
+    path('assets/transactions/export/', TransactionExportView.as_view(), name='transaction-export'),
+    path('assets/fear-greed/', FearGreedView.as_view(), name='fear-greed'),
+    path('assets/portfolio/history/', PortfolioHistoryView.as_view(), name='portfolio-history'),
     path('withdrawal-status/<int:transaction_id>/', WithdrawalStatusView.as_view(), name='withdrawal-status'),
 ]
@@ -4,8 +4,18 @@ from .models import Asset, Balance, Network
 from .serializers import AssetSerializer
 from rest_framework.permissions import IsAuthenticated
 from .service import BlockChainService
+from assets import hdwallet
 from django.db.models.functions import Coalesce
-from django.db.models import Sum, F, DecimalField
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, Max, OuterRef, Sum, F, Q
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime
+import base64
+import binascii
+import csv
+import json
 import re
 
 from rest_framework.views import APIView
@@ -15,21 +25,27 @@ from decimal import Decimal
 from rest_framework import status
 
 from assets.models import Asset, Quote
+from assets.money import InexactAmount, from_minor, to_minor
+from assets.rates import aget_rates
 from assets.serializers import AssetSerializer
+from core.async_views import AsyncAPIView
 
-from django.db.models import Sum, DecimalField
+from django.db.models import Sum
 from django.db.models.functions import Coalesce
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from staking.models import StakePending, StakingRewards
 from assets.models import Asset, Balance
+from django.contrib.auth import get_user_model
 
-class AssetListView(APIView):
+User = get_user_model()
 
-    def get(self, request):
+
+class AssetListView(AsyncAPIView):
+
+    async def get(self, request):
         section = request.query_params.get("section")
         user = request.user if request.user.is_authenticated else None
-        preferred_asset = user.preferred_currency if user else None
 
         # =========================
         # WITHDRAW SECTION
@@ -38,50 +54,32 @@ class AssetListView(APIView):
             if not user:
                 return Response([])
 
-            assets = (
-                Asset.objects
-                .filter(
-                    balances__user=user,
-                    balances__available__gt=0
-                )
-                .annotate(
-                    total_balance=Coalesce(
-                        Sum("balances__available"),
-                        0,
-                        output_field=DecimalField(max_digits=20, decimal_places=8)
-                    )
-                )
-                .distinct()
-                .prefetch_related("networks")
+            preferred_symbol = await (
+                User.objects.filter(pk=user.id).values_list("preferred_currency__symbol", flat=True).afirst()
             )
+            totals = {
+                asset_id: total
+                async for asset_id, total in Balance.objects
+                .filter(user_id=user.id)
+                .with_live_available()
+                .values("asset_id")
+                .annotate(total=Sum("live_available"))
+                .filter(total__gt=0)
+                .values_list("asset_id", "total")
+            }
+            assets = [asset async for asset in Asset.objects.filter(pk__in=totals).prefetch_related("networks")]
+            rates = await aget_rates()
 
             data = []
 
             for asset in assets:
-                asset_quote = (
-                    Quote.objects
-                    .filter(asset=asset)
-                    .order_by("-time")
-                    .first()
-                )
+                asset.total_balance = totals[asset.pk]
 
-                preferred_quote = None
-                if preferred_asset:
-                    preferred_quote = (
-                        Quote.objects
-                        .filter(asset=preferred_asset)
-                        .order_by("-time")
-                        .first()
-                    )
-
-                value_usd = (
-                    asset.total_balance * asset_quote.value_in_usd
-                    if asset_quote else 0
-                )
+                value_usd = rates.convert(asset.total_balance, asset.pk, "USD") or 0
 
                 value_preferred = (
-                    value_usd / preferred_quote.value_in_usd
-                    if preferred_quote and preferred_quote.value_in_usd else None
+                    rates.convert(asset.total_balance, asset.pk, preferred_symbol)
+                    if preferred_symbol else None
                 )
 
                 networks_data = [
@@ -98,10 +96,10 @@ class AssetListView(APIView):
                     "id": asset.id,
                     "symbol": asset.symbol,
                     "name": asset.name,
-                    "balance": str(asset.total_balance),
+                    "balance": str(from_minor(asset.total_balance)),
                     "value_usd": float(value_usd),
                     "value_preferred": float(value_preferred) if value_preferred else None,
-                    "preferred_currency": preferred_asset.symbol if preferred_asset else None,
+                    "preferred_currency": preferred_symbol,
                     "networks": networks_data,
                 })
 
@@ -114,61 +112,55 @@ class AssetListView(APIView):
             if not user:
                 return Response([])
 
-            assets = (
-                Asset.objects
+            assets = [
+                asset
+                async for asset in Asset.objects
                 .filter(fiat=False, staking=True, networks__apr_high__gt=0)
                 .distinct()
                 .prefetch_related("networks")
-            )
+            ]
+
+            asset_ids = [asset.pk for asset in assets]
+            pending = {
+                row["asset_id"]: row
+                async for row in StakePending.objects
+                .filter(user_id=user.id, asset_id__in=asset_ids)
+                .values("asset_id")
+                .annotate(amount=Sum("amount"), rewards=Sum("rewards"))
+            }
+            rewards = {
+                asset_id: total
+                async for asset_id, total in StakingRewards.objects
+                .filter(user_id=user.id, asset_id__in=asset_ids)
+                .values("asset_id")
+                .annotate(total=Sum("amount"))
+                .values_list("asset_id", "total")
+            }
+            available = {
+                asset_id: total
+                async for asset_id, total in Balance.objects
+                .filter(user_id=user.id, asset_id__in=asset_ids)
+                .with_live_available()
+                .values("asset_id")
+                .annotate(total=Sum("live_available"))
+                .values_list("asset_id", "total")
+            }
+            rates = await aget_rates()
 
             data = []
 
             for asset in assets:
-                # Get user's staking balance (from StakePending model)
-                staking_balance = StakePending.objects.filter(
-                    user=user,
-                    asset=asset
-                ).aggregate(
-                    total=Coalesce(Sum("amount"), 0, output_field=DecimalField(max_digits=15, decimal_places=8))
-                )["total"]
-
-                # Get user's staking rewards (from StakingRewards model)
-                total_rewards = StakingRewards.objects.filter(
-                    user=user,
-                    asset=asset
-                ).aggregate(
-                    total=Coalesce(Sum("amount"), 0, output_field=DecimalField(max_digits=15, decimal_places=8))
-                )["total"]
-
-                # Get pending rewards (accumulated but not yet claimed)
-                pending_rewards = StakePending.objects.filter(
-                    user=user,
-                    asset=asset
-                ).aggregate(
-                    total=Coalesce(Sum("rewards"), 0, output_field=DecimalField(max_digits=15, decimal_places=8))
-                )["total"]
-
-                # Get available balance for staking
-                available_balance = (
-                    Balance.objects
-                    .filter(user=user, asset=asset)
-                    .aggregate(
-                        total=Coalesce(Sum("available"), 0, output_field=DecimalField(max_digits=20, decimal_places=8))
-                    )["total"]
-                )
-
-                # Get latest quote for value calculation
-                asset_quote = (
-                    Quote.objects
-                    .filter(asset=asset)
-                    .order_by("-time")
-                    .first()
-                )
-
-                value_in_usd = float(staking_balance) * float(asset_quote.value_in_usd) if asset_quote else 0
-
-                # Get network info (APR, etc.)
-                network = asset.networks.first()
+                # Staking balance and pending (unclaimed) rewards come from StakePending,
+                # paid-out rewards from StakingRewards
+                staking_balance = pending.get(asset.pk, {}).get("amount") or 0
+                pending_rewards = pending.get(asset.pk, {}).get("rewards") or 0
+                total_rewards = rewards.get(asset.pk) or 0
+                available_balance = available.get(asset.pk) or 0
+                value_in_usd = rates.convert(staking_balance, asset.pk, "USD") or 0
+
+                # Get network info (APR, etc.); index the prefetched list, .first() would re-query
+                networks = asset.networks.all()
+                network = networks[0] if networks else None
                 apr_low = float(network.apr_low) if network and network.apr_low else 0
                 apr_high = float(network.apr_high) if network and network.apr_high else 0
 
@@ -176,10 +168,10 @@ class AssetListView(APIView):
                     "id": asset.id,
                     "symbol": asset.symbol,
                     "full_name": asset.name,
-                    "quantity": float(staking_balance),
-                    "total_reward": float(total_rewards),
-                    "pending_reward": float(pending_rewards),
-                    "avail": float(available_balance),
+                    "quantity": float(from_minor(staking_balance)),
+                    "total_reward": float(from_minor(total_rewards)),
+                    "pending_reward": float(from_minor(pending_rewards)),
+                    "avail": float(from_minor(available_balance)),
                     "value": value_in_usd,
                     "networks": [
                         {
@@ -202,22 +194,23 @@ class AssetListView(APIView):
         # =========================
         elif section == "fiat":
             assets = Asset.objects.filter(fiat=True)
+            if user:
+                assets = assets.annotate(
+                    preferred=Exists(User.objects.filter(pk=user.id, preferred_currency=OuterRef("pk")))
+                )
+            assets = [asset async for asset in assets]
+            quotes = await Quote.objects.alatest_by_asset([asset.pk for asset in assets])
             data = []
 
             for asset in assets:
-                quote = (
-                    Quote.objects
-                    .filter(asset=asset)
-                    .order_by("-time")
-                    .first()
-                )
+                quote = quotes.get(asset.pk)
 
                 data.append({
                     "id": asset.id,
                     "symbol": asset.symbol,
                     "name": asset.name,
                     "rate": float(quote.lp) if quote else None,
-                    "preferred": asset.id == user.preferred_currency_id if user else False,
+                    "preferred": getattr(asset, "preferred", False),
                 })
 
             return Response(data)
@@ -226,7 +219,7 @@ class AssetListView(APIView):
         # DEFAULT SECTION
         # =========================
         else:
-            assets = Asset.objects.filter(fiat=False).prefetch_related("networks")
+            assets = [asset async for asset in Asset.objects.filter(fiat=False).prefetch_related("networks")]
             return Response(AssetSerializer(assets, many=True).data)
 class Deposit(APIView):
     permission_classes = (IsAuthenticated,)
@@ -260,20 +253,53 @@ class Deposit(APIView):
 
         # Generate new address
         blockchain = BlockChainService(symbol, network.name)
-        address_result = blockchain.address_service.create_address()
-        address, private_key = address_result
+        if hdwallet.is_enabled(network.name.upper()):
+            return Response({"address": _assign_hd_address(balance, blockchain)})
 
-        encrypted_private = blockchain.address_service.encrypt_private_key(
+        address, private_key = blockchain.address_service.create_address()
+        balance.public = address
+        balance.private = blockchain.address_service.encrypt_private_key(
             private_key=private_key
         )
-
-        balance.public = address
-        balance.private = encrypted_private
+        balance.address_assigned_at = timezone.now()
         balance.save()
 
         return Response({"address": balance.public})
 
 
+HD_INDEX_ATTEMPTS = 10
+
+
+def _assign_hd_address(balance, blockchain):
+    """
+    Give ``balance`` the next free HD child index of its network and its address.
+
+    Indexes are dense per network (Max + 1), which keeps them inside the gap
+    limit wallets scan when the xpub is restored. Two balances racing for the
+    same index collide on balance_network_hd_index; the loser retries with
+    the next one. A balance that got its address from a concurrent request
+    keeps it.
+    """
+    for _ in range(HD_INDEX_ATTEMPTS):
+        top = Balance.objects.filter(network_id=balance.network_id).aggregate(top=Max("hd_index"))["top"]
+        index = 0 if top is None else top + 1
+        address, _ = blockchain.address_service.create_address(index=index)
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                assigned = Balance.objects.filter(Q(public__isnull=True) | Q(public=""), pk=balance.pk).update(
+                    public=address, hd_index=index, address_assigned_at=now
+                )
+        except IntegrityError:
+            continue
+        if not assigned:
+            balance.refresh_from_db(fields=["public", "hd_index", "address_assigned_at"])
+        else:
+            balance.public, balance.hd_index, balance.address_assigned_at = address, index, now
+        return balance.public
+    raise IntegrityError(f"No free HD index on {balance.network} after {HD_INDEX_ATTEMPTS} attempts")
+
+
 class AddressValidator:
     """Validates blockchain addresses for different cryptocurrencies"""
     
@@ -459,7 +485,9 @@ class ValidateAddressView(APIView):
         return Response(result, status=status.HTTP_200_OK if result["valid"] else status.HTTP_400_BAD_REQUEST)
 
 from django.db import transaction
-from assets.models import Transaction
+from assets import ledger
+from core.service import ApiService, StaleWhileRevalidateCache
+from assets.models import BalanceEntry, Transaction
 
 
 class WithdrawView(APIView):
@@ -469,7 +497,6 @@ class WithdrawView(APIView):
 
     permission_classes = (IsAuthenticated,)
 
-    @transaction.atomic
     def post(self, request):
         user = request.user
         data = request.data
@@ -487,11 +514,16 @@ class WithdrawView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Validate amount
+        # Validate amount; held as integer minor units from here on
         try:
-            amount = Decimal(amount_str)
+            amount = to_minor(amount_str)
             if amount <= 0:
                 raise ValueError()
+        except InexactAmount as e:
+            return Response(
+                {"success": False, "error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         except:
             return Response(
                 {"success": False, "error": "Invalid amount. Must be a positive number."},
@@ -524,76 +556,99 @@ class WithdrawView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Aggregate balances across all networks
-        balances = Balance.objects.select_for_update().filter(user=user, asset=asset).order_by('-available')
-        total_available = sum([b.available for b in balances], Decimal('0'))
+        try:
+            with transaction.atomic():
+                withdrawal_tx = Transaction.objects.create(
+                    user=user,
+                    asset=asset,
+                    network=target_network,
+                    type=Transaction.WITHDRAWAL,
+                    amount=amount,
+                    to_address=address,
+                    status=Transaction.PENDING,
+                    timestamp=timezone.now(),
+                    fee=0,
+                )
 
-        if total_available < amount:
+                # Deduct from balances, prioritizing networks with higher balance
+                used_balances = ledger.reserve(
+                    user, asset, amount, BalanceEntry.WITHDRAWAL, reference=withdrawal_tx.id
+                )
+
+                # Record all source networks in description
+                networks_used_desc = ", ".join([f"{asset.symbol}/{b.network.name if b.network else 'N/A'}: {from_minor(amt)}" for b, amt in used_balances])
+                withdrawal_tx.from_address = ", ".join([b.public for b, _ in used_balances if b.public])
+                withdrawal_tx.description = f"Withdrawal to {address} on {network_name} (sources: {networks_used_desc})"
+                withdrawal_tx.save(update_fields=["from_address", "description"])
+
+        except ledger.InsufficientFunds as e:
             return Response(
                 {
                     "success": False,
-                    "error": f"Insufficient balance. Available: {total_available} {symbol}",
-                    "available_balance": str(total_available)
+                    "error": f"Insufficient balance. Available: {from_minor(e.available)} {symbol}",
+                    "available_balance": str(from_minor(e.available))
                 },
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        try:
-            # Deduct from balances, prioritizing networks with higher balance
-            remaining = amount
-            used_balances = []  # track balances and amounts deducted
-            for bal in balances:
-                if remaining <= 0:
-                    break
-                deduct = min(bal.available, remaining)
-                bal.available -= deduct
-                bal.save()
-                used_balances.append((bal, deduct))
-                remaining -= deduct
-
-            # Create withdrawal transaction (record all source networks in description)
-            networks_used_desc = ", ".join([f"{b.asset.symbol}/{b.network.name if b.network else 'N/A'}: {amt}" for b, amt in used_balances])
-            withdrawal_tx = Transaction.objects.create(
-                user=user,
-                asset=asset,
-                network=target_network,
-                type=Transaction.WITHDRAWAL,
-                amount=amount,
-                from_address=", ".join([b.public for b, _ in used_balances if b.public]),
-                to_address=address,
-                status=Transaction.PENDING,
-                timestamp=timezone.now(),
-                fee=Decimal("0"),
-                description=f"Withdrawal to {address} on {network_name} (sources: {networks_used_desc})"
-            )
-
-            return Response(
-                {
-                    "success": True,
-                    "transaction_id": str(withdrawal_tx.id),
-                    "symbol": symbol,
-                    "amount": str(amount),
-                    "address": address,
-                    "network": network_name,
-                    "status": withdrawal_tx.get_status_display(),
-                    "timestamp": withdrawal_tx.timestamp.isoformat(),
-                    "remaining_balance": str(sum([b.available for b in balances], Decimal('0'))),
-                    "message": "Withdrawal initiated successfully. Please wait for confirmation."
-                },
-                status=status.HTTP_201_CREATED
-            )
+        except ledger.ReservationConflict as e:
+            return Response({"success": False, "error": str(e)}, status=status.HTTP_409_CONFLICT)
 
         except Exception as e:
-            transaction.set_rollback(True)
             return Response(
                 {"success": False, "error": f"Failed to process withdrawal: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-class WithdrawalHistoryView(APIView):
+
+        remaining_balance = (
+            Balance.objects.filter(user=user, asset=asset)
+            .with_live_available()
+            .aggregate(total=Sum("live_available"))["total"]
+        ) or 0
+
+        return Response(
+            {
+                "success": True,
+                "transaction_id": str(withdrawal_tx.id),
+                "symbol": symbol,
+                "amount": str(from_minor(amount)),
+                "address": address,
+                "network": network_name,
+                "status": withdrawal_tx.get_status_display(),
+                "timestamp": withdrawal_tx.timestamp.isoformat(),
+                "remaining_balance": str(from_minor(remaining_balance)),
+                "message": "Withdrawal initiated successfully. Please wait for confirmation."
+            },
+            status=status.HTTP_201_CREATED
+        )
+
+
+HISTORY_PAGE_SIZE = 20
+HISTORY_MAX_PAGE_SIZE = 100
+
+
+def _encode_cursor(tx) -> str:
+    raw = json.dumps({"t": tx.timestamp.isoformat(), "i": tx.id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str):
+    """Returns (timestamp, id) or raises ValueError."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        timestamp = datetime.fromisoformat(data["t"])
+        return timestamp, int(data["i"])
+    except (binascii.Error, KeyError, TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+class WithdrawalHistoryView(AsyncAPIView):
     """
-    Get user's withdrawal history
+    Get user's withdrawal history, newest first, using keyset pagination
+    over the (user, -timestamp) index.
     
-    GET /api/withdrawal-history/?symbol=ETH&limit=10
+    GET /api/withdrawal-history/?symbol=ETH&limit=10&cursor=<next_cursor>
     
     Response: {
         "count": 5,
@@ -608,44 +663,70 @@ class WithdrawalHistoryView(APIView):
                 "timestamp": "2025-12-28T10:30:00Z",
                 "fee": "0"
             }
-        ]
+        ],
+        "next_cursor": "eyJ0Ijo..."  # null on the last page
     }
     """
     permission_classes = (IsAuthenticated,)
 
-    def get(self, request):
+    async def get(self, request):
         user = request.user
         symbol = request.query_params.get("symbol")
-        limit = request.query_params.get("limit", 20)
+        limit = request.query_params.get("limit", HISTORY_PAGE_SIZE)
+        cursor = request.query_params.get("cursor")
 
         try:
             limit = int(limit)
         except ValueError:
-            limit = 20
+            limit = HISTORY_PAGE_SIZE
+        limit = max(1, min(limit, HISTORY_MAX_PAGE_SIZE))
 
         # Build query
-        query = Transaction.objects.filter(
-            user=user,
-            type=Transaction.WITHDRAWAL
-        ).order_by("-timestamp")
+        query = (
+            Transaction.objects.filter(
+                user_id=user.id,
+                type=Transaction.WITHDRAWAL
+            )
+            .select_related("asset", "network")
+            .only(
+                "id", "amount", "fee", "to_address", "status", "timestamp",
+                "asset__symbol", "network__name",
+            )
+            .order_by("-timestamp", "-id")
+        )
 
         # Filter by symbol if provided
         if symbol:
             query = query.filter(asset__symbol=symbol.upper())
 
-        # Limit results
-        transactions = query[:limit]
+        # Resume strictly after the last row of the previous page
+        if cursor:
+            try:
+                last_timestamp, last_id = _decode_cursor(cursor)
+            except ValueError:
+                return Response(
+                    {"error": "Invalid cursor"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            query = query.filter(
+                Q(timestamp__lt=last_timestamp) | Q(timestamp=last_timestamp, id__lt=last_id)
+            )
+
+        # Fetch one extra row to know whether another page exists
+        transactions = [tx async for tx in query[:limit + 1]]
+        has_more = len(transactions) > limit
+        transactions = transactions[:limit]
 
         data = [
             {
                 "transaction_id": str(tx.id),
                 "symbol": tx.asset.symbol,
-                "amount": str(tx.amount),
+                "amount": str(from_minor(tx.amount)),
                 "address": tx.to_address,
                 "network": tx.network.name,
                 "status": tx.get_status_display(),
                 "timestamp": tx.timestamp.isoformat(),
-                "fee": str(tx.fee),
+                "fee": str(from_minor(tx.fee)),
             }
             for tx in transactions
         ]
@@ -653,13 +734,209 @@ class WithdrawalHistoryView(APIView):
         return Response(
             {
                 "count": len(data),
-                "results": data
+                "results": data,
+                "next_cursor": _encode_cursor(transactions[-1]) if has_more else None,
             },
             status=status.HTTP_200_OK
         )
 
 
-class WithdrawalStatusView(APIView):
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FIELDS = (
+    "id", "timestamp", "type", "status", "asset__symbol", "network__name",
+    "amount", "fee", "from_address", "to_address", "blockchain_hash",
+    "confirmations", "completed_at",
+)
+EXPORT_COLUMNS = (
+    "transaction_id", "timestamp", "type", "status", "symbol", "network",
+    "amount", "fee", "from_address", "to_address", "blockchain_hash",
+    "confirmations", "completed_at",
+)
+
+# Positions of the minor-unit columns, written out as decimal amounts
+EXPORT_AMOUNTS = frozenset(EXPORT_FIELDS.index(field) for field in ("amount", "fee"))
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller."""
+
+    def write(self, value):
+        return value
+
+
+def _export_value(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return format(value, "f")
+    return value
+
+
+def _export_row(row):
+    return [
+        format(from_minor(value), "f") if i in EXPORT_AMOUNTS else _export_value(value)
+        for i, value in enumerate(row)
+    ]
+
+
+async def _aexport_rows(rows):
+    """
+    ``rows`` (EXPORT_FIELDS ordered by timestamp, id) in keyset-paginated
+    chunks read with the async ORM. ``aiterator()`` can't be used here: it
+    runs values_list() queries synchronously on the loop.
+    """
+    after = None
+    while True:
+        page = rows
+        if after is not None:
+            timestamp, pk = after
+            page = rows.filter(Q(timestamp__gt=timestamp) | Q(timestamp=timestamp, id__gt=pk))
+        chunk = [row async for row in page[:EXPORT_CHUNK_SIZE]]
+        for row in chunk:
+            yield row
+        if len(chunk) < EXPORT_CHUNK_SIZE:
+            return
+        after = (chunk[-1][1], chunk[-1][0])
+
+
+def _parse_bound(value: str, end_of_day: bool = False):
+    """
+    Parse a date or datetime query param into an aware datetime (None if invalid).
+    A bare date is widened to the end of that day when ``end_of_day`` is set.
+    """
+    try:
+        parsed = parse_datetime(value)
+        day = parse_date(value) if parsed is None else None
+    except ValueError:
+        return None
+    if parsed is None:
+        if day is None:
+            return None
+        parsed = datetime.combine(day, datetime.max.time() if end_of_day else datetime.min.time())
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class TransactionExportView(APIView):
+    """
+    Stream the user's complete transaction history.
+
+    GET /api/assets/transactions/export/?output=csv&type=withdrawal&status=completed&from=2025-01-01&to=2025-12-31
+
+    - output: csv (default) or ndjson
+    - type, status: optional, as stored on Transaction
+    - from, to: optional ISO dates or datetimes (inclusive)
+    - user_id: staff only, export another user's history
+
+    Rows are read with a chunked iterator and written as they are produced,
+    so memory stays flat regardless of history size. Under ASGI the body is
+    an async generator over _aexport_rows(): Django would buffer a sync
+    iterator in full before sending the first byte.
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        params = request.query_params
+        output = params.get("output", "csv").lower()
+        if output not in ("csv", "ndjson"):
+            return Response(
+                {"error": "output must be 'csv' or 'ndjson'"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        user_id = request.user.id
+        if params.get("user_id"):
+            if not request.user.is_staff:
+                return Response(
+                    {"error": "Only staff can export other users' transactions"},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            try:
+                user_id = int(params["user_id"])
+            except ValueError:
+                return Response(
+                    {"error": "Invalid user_id"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        query = Transaction.objects.filter(user_id=user_id)
+
+        tx_type = params.get("type")
+        if tx_type:
+            if tx_type not in dict(Transaction.TRANSACTION_TYPES):
+                return Response(
+                    {"error": f"Invalid type '{tx_type}'"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            query = query.filter(type=tx_type)
+
+        tx_status = params.get("status")
+        if tx_status:
+            if tx_status not in dict(Transaction.STATUS_CHOICES):
+                return Response(
+                    {"error": f"Invalid status '{tx_status}'"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            query = query.filter(status=tx_status)
+
+        for param, lookup in (("from", "timestamp__gte"), ("to", "timestamp__lte")):
+            if params.get(param):
+                bound = _parse_bound(params[param], end_of_day=(param == "to"))
+                if bound is None:
+                    return Response(
+                        {"error": f"Invalid '{param}' date"},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                query = query.filter(**{lookup: bound})
+
+        rows = query.order_by("timestamp", "id").values_list(*EXPORT_FIELDS)
+        if isinstance(request._request, ASGIRequest):
+            rows = _aexport_rows(rows)
+            stream_csv, stream_ndjson = self._astream_csv, self._astream_ndjson
+        else:
+            rows = rows.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+            stream_csv, stream_ndjson = self._stream_csv, self._stream_ndjson
+
+        if output == "csv":
+            content = stream_csv(rows)
+            content_type = "text/csv"
+        else:
+            content = stream_ndjson(rows)
+            content_type = "application/x-ndjson"
+
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="transactions.{output}"'
+        return response
+
+    @staticmethod
+    def _stream_csv(rows):
+        writer = csv.writer(_Echo())
+        yield writer.writerow(EXPORT_COLUMNS)
+        for row in rows:
+            yield writer.writerow(_export_row(row))
+
+    @staticmethod
+    def _stream_ndjson(rows):
+        for row in rows:
+            yield json.dumps(dict(zip(EXPORT_COLUMNS, _export_row(row)))) + "\n"
+
+    @staticmethod
+    async def _astream_csv(rows):
+        writer = csv.writer(_Echo())
+        yield writer.writerow(EXPORT_COLUMNS)
+        async for row in rows:
+            yield writer.writerow(_export_row(row))
+
+    @staticmethod
+    async def _astream_ndjson(rows):
+        async for row in rows:
+            yield json.dumps(dict(zip(EXPORT_COLUMNS, _export_row(row)))) + "\n"
+
+
+class WithdrawalStatusView(AsyncAPIView):
     """
     Get status of a specific withdrawal transaction
     
@@ -678,13 +955,13 @@ class WithdrawalStatusView(APIView):
     """
     permission_classes = (IsAuthenticated,)
 
-    def get(self, request, transaction_id):
+    async def get(self, request, transaction_id):
         user = request.user
 
         try:
-            tx = Transaction.objects.get(
+            tx = await Transaction.objects.select_related("asset", "network").aget(
                 id=transaction_id,
-                user=user,
+                user_id=user.id,
                 type=Transaction.WITHDRAWAL
             )
         except Transaction.DoesNotExist:
@@ -699,14 +976,99 @@ class WithdrawalStatusView(APIView):
             {
                 "transaction_id": str(tx.id),
                 "symbol": tx.asset.symbol,
-                "amount": str(tx.amount),
+                "amount": str(from_minor(tx.amount)),
                 "address": tx.to_address,
                 "network": tx.network.name,
                 "status": tx.get_status_display(),
                 "timestamp": tx.timestamp.isoformat(),
-                "fee": str(tx.fee),
+                "fee": str(from_minor(tx.fee)),
                 "blockchain_hash": tx.blockchain_hash,
             },
             status=status.HTTP_200_OK
         )
 
+
+# ---------------- Fear & Greed ----------------
+# The upstream index changes once a day; serve a stale value for up to a day
+# rather than make a dashboard wait on alternative.me.
+FEAR_GREED_TTL = 300
+FEAR_GREED_MAX_STALE = 24 * 3600
+
+fear_greed_cache = StaleWhileRevalidateCache(
+    ApiService().get_fear_and_greed_index,
+    ttl=FEAR_GREED_TTL,
+    max_stale=FEAR_GREED_MAX_STALE,
+    is_valid=lambda value: isinstance(value, dict) and "error" not in value,
+)
+
+
+class FearGreedView(APIView):
+    """
+    Crypto Fear & Greed index from alternative.me, cached in-process.
+
+    GET /api/assets/fear-greed/
+
+    Response: {
+        "value": "54",
+        "value_classification": "Neutral",
+        "timestamp": "1735603200",
+        "age": 12,
+        "stale": false
+    }
+    """
+
+    def get(self, request):
+        index, age = fear_greed_cache.get()
+        if index is None:
+            return Response(
+                {"error": "Fear & Greed index is unavailable"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+
+        stale = age >= FEAR_GREED_TTL
+        response = Response(
+            {
+                "value": index.get("value"),
+                "value_classification": index.get("value_classification"),
+                "timestamp": index.get("timestamp"),
+                "age": int(age),
+                "stale": stale,
+            },
+            status=status.HTTP_200_OK,
+        )
+        response["Cache-Control"] = f"public, max-age={0 if stale else int(FEAR_GREED_TTL - age)}"
+        return response
+
+
+from assets import portfolio
+
+
+class PortfolioHistoryView(APIView):
+    """
+    The user's portfolio value over time, from the nightly snapshots.
+
+    GET /api/assets/portfolio/history/?range=1M   (1W, 1M or 1Y; default 1M)
+
+    Response: {
+        "range": "1M",
+        "currency": "USD",
+        "points": [{"date": "2026-01-01", "value": "1520.43"}, ...]   oldest first
+    }
+    1W and 1M have a point per day, 1Y a point per week.
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        range_key = request.query_params.get("range", "1M").upper()
+        if range_key not in portfolio.CHART_RANGES:
+            return Response(
+                {"error": f"range must be one of {', '.join(portfolio.CHART_RANGES)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        points = portfolio.chart(request.user, range_key, timezone.now().date())
+        return Response({
+            "range": range_key,
+            "currency": "USD",
+            "points": [{"date": day.isoformat(), "value": str(value)} for day, value in points],
+        })
@@ -9,13 +9,14 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 django_asgi_app = get_asgi_application()
 
 from assets.routing import websocket_urlpatterns
+from trading.routing import websocket_urlpatterns as trading_websocket_urlpatterns
 from core.ws_auth import TokenAuthMiddleware  # <-- import the middleware
 
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
     "websocket": AuthMiddlewareStack(
         TokenAuthMiddleware(              # session auth first, then JWT
-            URLRouter(websocket_urlpatterns)
+            URLRouter(websocket_urlpatterns + trading_websocket_urlpatterns)
         )
     ),
 })
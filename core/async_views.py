@@ -0,0 +1,114 @@
+# core/async_views.py
+"""
+APIView for native async handlers.
+
+DRF's APIView only dispatches sync handlers, so under daphne every request
+is handed to a thread along with authentication and rendering. AsyncAPIView
+keeps dispatch, authentication and rendering on the event loop:
+
+- Authentication is JWT, as on every other view: the token is verified on
+  the loop and the user is loaded once with ``User.objects.aget()``, so
+  deleted and deactivated users are rejected straight away. request.user
+  is the User row.
+- Handlers are coroutines and use the async ORM. Django still runs each
+  async query in a thread, so keep handlers to a few queries.
+- The response is rendered on the loop and returned as a plain
+  HttpResponse; Django would otherwise render a deferred Response in a
+  thread.
+
+Under WSGI (and the test client) Django runs these views through
+async_to_sync, so they behave the same as before.
+"""
+from asgiref.sync import iscoroutinefunction
+from django.http import HttpResponse
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+class AsyncJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication whose user lookup can be awaited (``aauthenticate``)."""
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        """get_user() on the async ORM, with the same checks."""
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+        try:
+            user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist as e:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and (
+            validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password)
+        ):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
+
+
+class AsyncAPIView(APIView):
+    authentication_classes = (AsyncJWTAuthentication,)
+
+    async def aperform_authentication(self, request):
+        """
+        Request._authenticate() with async authenticators awaited, so that
+        initial() finds request.user already set. Others (the test client's
+        forced authentication) are called as they are.
+        """
+        for authenticator in request.authenticators:
+            try:
+                if hasattr(authenticator, "aauthenticate"):
+                    user_auth_tuple = await authenticator.aauthenticate(request)
+                else:
+                    user_auth_tuple = authenticator.authenticate(request)
+            except exceptions.APIException:
+                request._not_authenticated()
+                raise
+            if user_auth_tuple is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth_tuple
+                return
+        request._not_authenticated()
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.aperform_authentication(request)
+            self.initial(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if iscoroutinefunction(handler):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        content = self.response.rendered_content
+        return HttpResponse(content, status=self.response.status_code, headers=dict(self.response.items()))
@@ -0,0 +1,79 @@
+# core/benchmarking.py
+"""Shared helpers for the in-process benchmark and query-budget commands."""
+import contextlib
+import os
+import shutil
+import subprocess
+import tempfile
+
+from django.conf import settings
+from django.db import connection, connections
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+WITHDRAW_ADDRESS = "0x" + "b" * 40
+BENCH_AMOUNT = "0.0001"
+
+
+def endpoints():
+    """(name, method, path, payload) for every benchmarked endpoint."""
+    asset_list = reverse("asset-list")
+    return [
+        ("asset-list", "get", asset_list, None),
+        ("asset-list:withdraw", "get", asset_list + "?section=withdraw", None),
+        ("asset-list:stake", "get", asset_list + "?section=stake", None),
+        ("asset-list:fiat", "get", asset_list + "?section=fiat", None),
+        ("deposit", "get", reverse("deposit", kwargs={"symbol": "ETH", "network": "ETH"}), None),
+        ("withdrawal-history", "get", reverse("withdrawal-history"), None),
+        ("portfolio-history", "get", reverse("portfolio-history") + "?range=1Y", None),
+        ("withdraw", "post", reverse("withdraw"),
+         {"symbol": "ETH", "address": WITHDRAW_ADDRESS, "network": "ETH", "amount": BENCH_AMOUNT}),
+        ("stake_asset", "post", reverse("stake_asset"), {"symbol": "ETH", "amount": BENCH_AMOUNT}),
+        ("unstake_asset", "post", reverse("unstake_asset"), {"symbol": "ETH", "amount": BENCH_AMOUNT}),
+        ("get_total_reward", "get", reverse("get_total_reward"), None),
+    ]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@contextlib.contextmanager
+def throwaway_database():
+    """
+    Run against a freshly migrated test database and drop it afterwards, so
+    benchmarks never touch real data. On SQLite the test database is a temp
+    file so every client thread sees the same data.
+
+    The test environment is set up as under manage.py test: without it the
+    test client's "testserver" host fails ALLOWED_HOSTS and every request
+    is a 400.
+    """
+    tmpdir = tempfile.mkdtemp(prefix="quantra-bench-")
+    settings.DATABASES["default"].setdefault("TEST", {})
+    if connection.vendor == "sqlite":
+        settings.DATABASES["default"]["TEST"]["NAME"] = os.path.join(tmpdir, "bench.sqlite3")
+    setup_test_environment()
+    try:
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            yield
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+    finally:
+        teardown_test_environment()
+        shutil.rmtree(tmpdir, ignore_errors=True)
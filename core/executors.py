@@ -0,0 +1,78 @@
+# core/executors.py
+"""
+A dedicated thread pool for the blocking work async code still has to do.
+
+``sync_to_async`` defaults to thread_sensitive=True, which runs every call,
+from every websocket, on one shared thread, so DB-backed pushes queue
+behind each other as connections grow. Django's async ORM methods
+(``aget()``, ``async for`` ...) hop onto that same thread for each query.
+``database_sync_to_async`` instead runs a whole unit of sync work (all the
+queries one push needs) on a pool of ASYNC_DB_WORKERS threads. Each worker
+keeps its own DB connection open for its lifetime, only reconnecting after
+an error has left it unusable (CONN_MAX_AGE does not apply: there is no
+request cycle to close it), so size the pool within what the database
+accepts.
+
+Queue depth, busy workers and queueing time are exported through
+core.metrics.
+"""
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from core import metrics
+
+_executor = None
+
+
+def db_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.ASYNC_DB_WORKERS, thread_name_prefix="async-db")
+    return _executor
+
+
+def queue_depth() -> int:
+    """Calls submitted to the pool and not yet picked up by a worker."""
+    return _executor._work_queue.qsize() if _executor is not None else 0
+
+
+metrics.executor_queued.track("db", callback=queue_depth)
+
+
+def _drop_broken_connections():
+    for conn in connections.all(initialized_only=True):
+        if conn.errors_occurred:
+            if conn.is_usable():
+                conn.errors_occurred = False
+            else:
+                conn.close()
+
+
+def _instrumented(func):
+    @functools.wraps(func)
+    def run(submitted, *args, **kwargs):
+        metrics.executor_wait.observe("db", value=time.perf_counter() - submitted)
+        metrics.executor_busy.inc("db")
+        _drop_broken_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            metrics.executor_busy.dec("db")
+
+    return run
+
+
+def database_sync_to_async(func):
+    """Like asgiref's sync_to_async, but runs ``func`` on the dedicated DB pool."""
+    run = sync_to_async(_instrumented(func), thread_sensitive=False, executor=db_executor())
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run(time.perf_counter(), *args, **kwargs)
+
+    return wrapper
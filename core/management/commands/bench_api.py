@@ -0,0 +1,147 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core import benchmarking
+from core.benchmarking import percentile, throwaway_database
+from core.metrics import QueryTimer
+from core.seeding import LoadSeeder
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the REST endpoints in-process against a throwaway database "
+        "and print req/s, latency percentiles and queries per request as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50, help="Seeded users (default: 50).")
+        parser.add_argument(
+            "--transactions", type=int, default=200,
+            help="Transactions seeded per user (default: 200).",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Dataset seed (default: 0).")
+        parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint (default: 200).")
+        parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients (default: 8).")
+        parser.add_argument(
+            "--endpoint", action="append", dest="endpoints",
+            help="Only run this endpoint (repeatable). Default: all.",
+        )
+        parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+
+    def handle(self, *args, **opts):
+        endpoints = benchmarking.endpoints()
+        if opts["endpoints"]:
+            unknown = set(opts["endpoints"]) - {name for name, *_ in endpoints}
+            if unknown:
+                raise CommandError(f"Unknown endpoint(s): {', '.join(sorted(unknown))}")
+            endpoints = [e for e in endpoints if e[0] in opts["endpoints"]]
+
+        with throwaway_database():
+            seed_started = time.perf_counter()
+            user_ids = self._seed(opts["users"], opts["transactions"], opts["seed"])
+            seed_seconds = time.perf_counter() - seed_started
+
+            results = {}
+            for name, method, path, payload in endpoints:
+                results[name] = self._run(name, method, path, payload, user_ids, opts["requests"], opts["concurrency"])
+                self.stderr.write(
+                    f"{name}: {results[name]['rps']} req/s, p95 {results[name]['p95_ms']} ms, "
+                    f"{results[name]['queries_per_request']} queries/req"
+                )
+
+        failed = sorted(name for name, result in results.items() if result["errors"])
+        report = {
+            "valid": not failed,  # error responses skip the work being measured
+            "commit": benchmarking.git_commit(),
+            "timestamp": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "dataset": {
+                "users": opts["users"],
+                "transactions_per_user": opts["transactions"],
+                "seed": opts["seed"],
+                "seed_seconds": round(seed_seconds, 3),
+            },
+            "requests_per_endpoint": opts["requests"],
+            "concurrency": opts["concurrency"],
+            "results": results,
+        }
+        output = json.dumps(report, indent=2)
+        if opts["output"]:
+            with open(opts["output"], "w", encoding="utf-8") as f:
+                f.write(output + "\n")
+        else:
+            self.stdout.write(output)
+        if failed:
+            raise CommandError(
+                "Error responses from " + ", ".join(
+                    f"{name} ({', '.join(map(str, results[name]['error_statuses']))})" for name in failed
+                ) + ": the run is invalid"
+            )
+
+    # ---------------- Dataset ----------------
+    def _seed(self, n_users, n_transactions, seed):
+        seeder = LoadSeeder(seed=seed)
+        assets = seeder.ensure_catalog()
+        user_ids = seeder.seed_users(n_users, prefix="bench")
+        # Large enough balances that every withdraw/stake request can succeed
+        seeder.seed_balances(user_ids, assets, min_amount=100)
+        seeder.seed_transactions(user_ids, assets, n_transactions)
+        seeder.seed_staking(user_ids, assets, pending_per_user=2, tx_per_user=5, rewards_per_user=5)
+        return user_ids
+
+    # ---------------- Load ----------------
+    def _run(self, name, method, path, payload, user_ids, n_requests, concurrency):
+        latencies = []
+        queries = []
+        errors = []
+        lock = threading.Lock()
+
+        def worker(worker_id):
+            # Server errors are recorded as 500s instead of aborting the run
+            client = APIClient(raise_request_exception=False)
+            users = list(User.objects.filter(pk__in=user_ids[worker_id::concurrency] or user_ids))
+            try:
+                for i in range(worker_id, n_requests, concurrency):
+                    client.force_authenticate(users[i % len(users)])
+                    timer = QueryTimer()
+                    started = time.perf_counter()
+                    with connection.execute_wrapper(timer):
+                        if method == "get":
+                            response = client.get(path)
+                        else:
+                            response = client.post(path, payload, format="json")
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        latencies.append(elapsed)
+                        queries.append(timer.queries)
+                        if response.status_code >= 400:
+                            errors.append(response.status_code)
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(worker, range(concurrency)))
+        wall = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            "requests": len(latencies),
+            "errors": len(errors),
+            "error_statuses": sorted(set(errors)),
+            "rps": round(len(latencies) / wall, 1) if wall else None,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2) if latencies else None,
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+            "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+        }
@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import time
+
+import base58
+from bitcoin.wallet import CBitcoinSecret, P2PKHBitcoinAddress
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from ecdsa import SECP256k1, SigningKey
+from tronpy.keys import PrivateKey as TronPrivateKey
+
+from assets import keys
+from core import benchmarking
+
+CROSS_CHECKS = 200
+
+
+# ---------------- Previous key generation, kept as the baseline ----------------
+def _bitcoinlib_btc(secret):
+    key = CBitcoinSecret.from_secret_bytes(secret)
+    return str(P2PKHBitcoinAddress.from_pubkey(key.pub)), str(key)
+
+
+def _ecdsa_ltc(secret):
+    wif = base58.b58encode_check(b"\xb0" + secret + b"\x01").decode("utf-8")
+    point = SigningKey.from_string(secret, curve=SECP256k1).verifying_key.to_string()
+    prefix = b"\x02" if int.from_bytes(point[32:], "big") % 2 == 0 else b"\x03"
+    h160 = hashlib.new("ripemd160", hashlib.sha256(prefix + point[:32]).digest()).digest()
+    return base58.b58encode_check(b"\x30" + h160).decode("utf-8"), wif
+
+
+def _tronpy_trx(secret):
+    key = TronPrivateKey(secret)
+    return key.public_key.to_base58check_address(), key.hex()
+
+
+BASELINES = {"BTC": ("python-bitcoinlib", _bitcoinlib_btc), "LTC": ("ecdsa", _ecdsa_ltc), "TRX": ("tronpy", _tronpy_trx)}
+
+
+def _rate(count, seconds):
+    return round(count / seconds) if seconds else None
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare deposit key generation on the previous libraries with the coincurve backend "
+        "(assets.keys), single-process and batched over a process pool, and report keys per second as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--networks", default=",".join(BASELINES),
+            help=f"Comma-separated networks (default: {','.join(BASELINES)}).",
+        )
+        parser.add_argument("--keys", type=int, default=20000, help="Keys per network for the coincurve runs (default: 20000).")
+        parser.add_argument(
+            "--baseline-keys", type=int, default=2000,
+            help="Keys per network on the previous libraries, which are much slower (default: 2000).",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count(),
+            help="Processes for the batch run (default: one per CPU).",
+        )
+        parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+
+    def handle(self, *args, **opts):
+        networks = [network.strip().upper() for network in opts["networks"].split(",") if network.strip()]
+        unknown = set(networks) - set(BASELINES)
+        if unknown:
+            raise CommandError(f"No baseline for {', '.join(sorted(unknown))}; choose from {', '.join(BASELINES)}")
+        if opts["keys"] < 1 or opts["baseline_keys"] < 1:
+            raise CommandError("--keys and --baseline-keys must be positive")
+
+        report = {
+            "commit": benchmarking.git_commit(),
+            "timestamp": timezone.now().isoformat(),
+            "settings": {key: opts[key] for key in ("keys", "baseline_keys", "workers")},
+            "networks": {network: self._run(network, opts) for network in networks},
+        }
+        output = json.dumps(report, indent=2)
+        if opts["output"]:
+            with open(opts["output"], "w", encoding="utf-8") as f:
+                f.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+    def _run(self, network, opts):
+        library, baseline = BASELINES[network]
+
+        # Same secret, same address and key: the backends are interchangeable
+        for _ in range(CROSS_CHECKS):
+            secret = keys.new_secret()
+            if baseline(secret) != keys.from_secret(network, secret):
+                raise CommandError(f"{network}: coincurve and {library} disagree for one secret")
+
+        started = time.perf_counter()
+        for _ in range(opts["baseline_keys"]):
+            baseline(keys.new_secret())
+        baseline_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(opts["keys"]):
+            keys.generate(network)
+        native_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        batch = keys.generate_batch(network, opts["keys"], workers=opts["workers"])
+        batch_s = time.perf_counter() - started
+        if len({address for address, _ in batch}) != opts["keys"]:
+            raise CommandError(f"{network}: batch returned duplicate addresses")
+
+        baseline_rate, native_rate, batch_rate = (
+            _rate(opts["baseline_keys"], baseline_s), _rate(opts["keys"], native_s), _rate(opts["keys"], batch_s),
+        )
+        return {
+            "baseline": {"library": library, "keys_per_s": baseline_rate},
+            "coincurve": {"keys_per_s": native_rate, "speedup": round(native_rate / baseline_rate, 1)},
+            "coincurve_batch": {
+                "keys_per_s": batch_rate,
+                "speedup": round(batch_rate / baseline_rate, 1),
+                "workers": opts["workers"],
+            },
+            "cross_checked": CROSS_CHECKS,
+        }
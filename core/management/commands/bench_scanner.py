@@ -0,0 +1,93 @@
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from assets.scanner import BloomFilter
+from core import benchmarking
+from core.benchmarking import percentile
+
+
+def _summary_us(values):
+    values = sorted(values)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "p50": round(percentile(values, 50) / 1000, 2),
+        "p99": round(percentile(values, 99) / 1000, 2),
+        "max": round(values[-1] / 1000, 2),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the deposit scanner's Bloom filter over synthetic addresses and time matching "
+        "whole blocks of outputs against it; reports build time, memory, per-block latency and "
+        "false positives as JSON. The exact stage is a dict here, not the database query"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--addresses", type=int, default=1_000_000, help="Our addresses (default: 1000000).")
+        parser.add_argument("--outputs", type=int, default=5000, help="Outputs per block (default: 5000).")
+        parser.add_argument("--blocks", type=int, default=100, help="Blocks to match (default: 100).")
+        parser.add_argument(
+            "--hit-rate", type=float, default=0.001,
+            help="Share of outputs paying one of our addresses (default: 0.001).",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Address and block seed (default: 0).")
+        parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+
+    def handle(self, *args, **opts):
+        if opts["addresses"] < 1 or opts["outputs"] < 1 or opts["blocks"] < 1:
+            raise CommandError("--addresses, --outputs and --blocks must be positive")
+        rng = random.Random(opts["seed"])
+
+        def address():
+            return "0x%040x" % rng.getrandbits(160)
+
+        ours = [address() for _ in range(opts["addresses"])]
+        started = time.perf_counter()
+        bloom = BloomFilter(2 * len(ours))
+        for start in range(0, len(ours), 50000):
+            bloom.add_many(ours[start:start + 50000])
+        build_s = time.perf_counter() - started
+        exact = dict.fromkeys(ours)
+
+        blocks = [
+            [rng.choice(ours) if rng.random() < opts["hit_rate"] else address() for _ in range(opts["outputs"])]
+            for _ in range(opts["blocks"])
+        ]
+        block_ns, hits, false_positives = [], 0, 0
+        clock = time.perf_counter_ns
+        for block in blocks:
+            t0 = clock()
+            passed = [block[i] for i in bloom.contains_many(block).nonzero()[0]]
+            matched = [addr for addr in passed if addr in exact]
+            block_ns.append(clock() - t0)
+            hits += len(matched)
+            false_positives += len(passed) - len(matched)
+
+        report = {
+            "commit": benchmarking.git_commit(),
+            "timestamp": timezone.now().isoformat(),
+            "settings": {key: opts[key] for key in ("addresses", "outputs", "blocks", "hit_rate", "seed")},
+            "bloom": {
+                "build_s": round(build_s, 3),
+                "mb": round(bloom.bits.nbytes / 2**20, 2),
+                "hashes": bloom.hashes,
+            },
+            "block_us": _summary_us(block_ns),
+            "outputs_per_s": round(opts["outputs"] * len(block_ns) / (sum(block_ns) / 1e9)),
+            "matches": hits,
+            "false_positives": false_positives,
+            "false_positive_rate": round(false_positives / (opts["outputs"] * opts["blocks"]), 6),
+        }
+        output = json.dumps(report, indent=2)
+        if opts["output"]:
+            with open(opts["output"], "w", encoding="utf-8") as f:
+                f.write(output + "\n")
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,272 @@
+import asyncio
+import json
+import os
+import random
+import resource
+import time
+from decimal import Decimal
+
+from asgiref.sync import SyncToAsync, sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from assets import ledger
+from assets.consumers import PUSH_INTERVAL
+from assets.models import Balance, BalanceEntry, Quote
+from assets.money import SCALE
+from core import benchmarking, executors
+from core.benchmarking import percentile, throwaway_database
+from core.seeding import LoadSeeder
+
+User = get_user_model()
+
+LOOP_LAG_INTERVAL = 0.1
+SAMPLE_INTERVAL = 0.5
+
+
+def _rss_bytes():
+    """Current resident set size; falls back to the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _executor_queue_depth():
+    """Calls waiting for the thread(s) behind sync_to_async and the DB pool."""
+    depth = executors.queue_depth()
+    for executor in (SyncToAsync.single_thread_executor, getattr(asyncio.get_running_loop(), "_default_executor", None)):
+        queue = getattr(executor, "_work_queue", None)
+        if queue is not None:
+            depth += queue.qsize()
+    return depth
+
+
+def _summary(values, scale=1000.0, digits=2):
+    values = sorted(values)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "p50": round(percentile(values, 50) * scale, digits),
+        "p95": round(percentile(values, 95) * scale, digits),
+        "p99": round(percentile(values, 99) * scale, digits),
+        "max": round(values[-1] * scale, digits),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Open many authenticated ws/balances/ connections against core.asgi.application "
+        "in-process and report connect/push latency, event-loop lag, executor queue depth "
+        "and memory per connection as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--connections", type=int, default=1000, help="Simulated clients (default: 1000).")
+        parser.add_argument(
+            "--users", type=int, default=None,
+            help="Distinct users the clients log in as (default: one per connection).",
+        )
+        parser.add_argument(
+            "--connect-concurrency", type=int, default=100,
+            help="Handshakes in flight at once while ramping up (default: 100).",
+        )
+        parser.add_argument(
+            "--duration", type=float, default=PUSH_INTERVAL * 5,
+            help=f"Seconds to hold the connections open (default: {PUSH_INTERVAL * 5}).",
+        )
+        parser.add_argument(
+            "--balance-updates", type=float, default=0,
+            help="Balance credits per second during the hold (default: 0).",
+        )
+        parser.add_argument(
+            "--quote-updates", type=float, default=0,
+            help="Quote price changes per second during the hold (default: 0).",
+        )
+        parser.add_argument(
+            "--paused", type=float, default=0,
+            help="Share of connections that send {action: pause} once open, like hidden tabs (default: 0).",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Dataset and mutation seed (default: 0).")
+        parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+
+    def handle(self, *args, **opts):
+        if opts["connections"] < 1:
+            raise CommandError("--connections must be positive")
+        if not 0 <= opts["paused"] <= 1:
+            raise CommandError("--paused must be between 0 and 1")
+        n_users = opts["users"] or opts["connections"]
+
+        with throwaway_database():
+            seeder = LoadSeeder(seed=opts["seed"])
+            assets = seeder.ensure_catalog()
+            user_ids = seeder.seed_users(n_users, prefix="wsbench")
+            seeder.seed_balances(user_ids, assets)
+            tokens = {user.pk: str(AccessToken.for_user(user)) for user in User.objects.filter(pk__in=user_ids)}
+            # Connections run on the event loop; the ORM work they trigger runs in
+            # the core.executors pool, whose threads open their own connections
+            connection.close()
+
+            from core.asgi import application
+
+            results = asyncio.run(self._simulate(application, user_ids, tokens, opts))
+
+        report = {
+            "commit": benchmarking.git_commit(),
+            "timestamp": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "push_interval_s": PUSH_INTERVAL,
+            "settings": {
+                key: opts[key]
+                for key in (
+                    "connections", "connect_concurrency", "duration", "balance_updates", "quote_updates",
+                    "paused", "seed",
+                )
+            } | {"users": n_users},
+            **results,
+        }
+        output = json.dumps(report, indent=2)
+        if opts["output"]:
+            with open(opts["output"], "w", encoding="utf-8") as f:
+                f.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+    # ---------------- Simulation ----------------
+    async def _simulate(self, application, user_ids, tokens, opts):
+        rng = random.Random(opts["seed"])
+        stop = asyncio.Event()
+        loop_lag, queue_depth = [], []
+        connect_times, push_gaps, visible_after = [], [], []
+        pending_changes = {}  # user_id -> when an unseen balance change was committed
+        n_paused = round(opts["connections"] * opts["paused"])
+        counters = {"failed": 0, "pushes": 0, "balance_updates": 0, "quote_updates": 0}
+
+        async def monitor():
+            expected = time.perf_counter() + LOOP_LAG_INTERVAL
+            next_sample = 0.0
+            while not stop.is_set():
+                await asyncio.sleep(LOOP_LAG_INTERVAL)
+                now = time.perf_counter()
+                loop_lag.append(max(0.0, now - expected))
+                expected = now + LOOP_LAG_INTERVAL
+                if now >= next_sample:
+                    queue_depth.append(_executor_queue_depth())
+                    next_sample = now + SAMPLE_INTERVAL
+
+        async def receive(communicator, user_id):
+            last_at = last_value = None
+            while True:
+                # A communicator timeout cancels the application, so never let it fire;
+                # the task is cancelled once the hold is over
+                message = await communicator.receive_json_from(timeout=opts["duration"] + 3600)
+                if message.get("type") == "ping":
+                    await communicator.send_json_to({"action": "pong"})
+                    continue
+                now = time.perf_counter()
+                counters["pushes"] += 1
+                if last_at is not None:
+                    push_gaps.append(now - last_at)
+                if last_value is not None and message.get("value") != last_value and user_id in pending_changes:
+                    visible_after.append(now - pending_changes.pop(user_id))
+                last_at, last_value = now, message.get("value")
+
+        async def open_connection(i, gate):
+            user_id = user_ids[i % len(user_ids)]
+            communicator = WebsocketCommunicator(application, f"/ws/balances/?token={tokens[user_id]}")
+            async with gate:
+                started = time.perf_counter()
+                try:
+                    connected, _ = await communicator.connect(timeout=30)
+                except asyncio.TimeoutError:
+                    connected = False
+                if not connected:
+                    counters["failed"] += 1
+                    return None
+                connect_times.append(time.perf_counter() - started)
+            if i < n_paused:
+                await communicator.send_json_to({"action": "pause"})
+            return communicator, asyncio.create_task(receive(communicator, user_id))
+
+        async def mutate(rate, action):
+            if rate <= 0:
+                return
+            while not stop.is_set():
+                await asyncio.sleep(rng.expovariate(rate))
+                await action()
+
+        @sync_to_async
+        def credit_balance():
+            balance = Balance.objects.filter(user_id=rng.choice(user_ids)).order_by("?").first()
+            if balance is None:
+                return
+            ledger.credit(balance, SCALE, BalanceEntry.DEPOSIT, reference="bench_ws")
+            pending_changes.setdefault(balance.user_id, time.perf_counter())
+            counters["balance_updates"] += 1
+
+        @sync_to_async
+        def move_quote():
+            factor = Decimal(str(round(rng.uniform(0.99, 1.01), 6)))
+            quote = Quote.objects.filter(asset__fiat=False).order_by("?").first()
+            if quote is None:
+                return
+            Quote.objects.filter(pk=quote.pk).update(value_in_usd=F("value_in_usd") * factor, lp=F("lp") * factor)
+            counters["quote_updates"] += 1
+
+        monitor_task = asyncio.create_task(monitor())
+        rss_before = _rss_bytes()
+        gate = asyncio.Semaphore(opts["connect_concurrency"])
+        ramp_started = time.perf_counter()
+        opened = [
+            c for c in await asyncio.gather(*(open_connection(i, gate) for i in range(opts["connections"])))
+            if c is not None
+        ]
+        ramp_seconds = time.perf_counter() - ramp_started
+        rss_after = _rss_bytes()
+        self.stderr.write(f"{len(opened)} connections open in {ramp_seconds:.1f}s; holding for {opts['duration']}s")
+
+        mutators = [
+            asyncio.create_task(mutate(opts["balance_updates"], credit_balance)),
+            asyncio.create_task(mutate(opts["quote_updates"], move_quote)),
+        ]
+        await asyncio.sleep(opts["duration"])
+        stop.set()
+        for task in mutators:
+            task.cancel()
+        await asyncio.gather(*mutators, return_exceptions=True)
+        for _, task in opened:
+            task.cancel()
+        await asyncio.gather(*(task for _, task in opened), return_exceptions=True)
+        await asyncio.gather(*(communicator.disconnect() for communicator, _ in opened), return_exceptions=True)
+        await monitor_task
+
+        return {
+            "connections": {
+                "opened": len(opened),
+                "failed": counters["failed"],
+                "ramp_seconds": round(ramp_seconds, 3),
+            },
+            "connect_ms": _summary(connect_times),
+            # Time between consecutive pushes on one connection; anything above
+            # push_interval_s is time spent queued or computing the payload
+            "push_gap_ms": _summary(push_gaps),
+            "pushes": counters["pushes"],
+            "balance_update_visible_ms": _summary(visible_after),
+            "mutations": {"balance_updates": counters["balance_updates"], "quote_updates": counters["quote_updates"]},
+            "event_loop_lag_ms": _summary(loop_lag),
+            "executor_queue_depth": {
+                "max": max(queue_depth, default=0),
+                "mean": round(sum(queue_depth) / len(queue_depth), 2) if queue_depth else 0,
+            },
+            "memory": {
+                "rss_delta_mb": round((rss_after - rss_before) / 2**20, 2),
+                "per_connection_kb": round((rss_after - rss_before) / 1024 / len(opened), 2) if opened else None,
+            },
+        }
@@ -0,0 +1,238 @@
+import os
+import traceback
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from assets import rates
+from assets.models import Asset, Network, Quote, Transaction
+from core import benchmarking
+from core.benchmarking import throwaway_database
+from core.seeding import LoadSeeder
+
+User = get_user_model()
+
+# Maximum queries per request, measured with force_authenticate (no auth query).
+# Raise a budget only together with the change that needs it.
+BUDGETS = {
+    "asset-list": 2,
+    "asset-list:withdraw": 5,
+    "asset-list:stake": 6,
+    "asset-list:fiat": 2,
+    "deposit": 4,
+    "withdrawal-history": 1,
+    "portfolio-history": 1,
+    "withdrawal-status": 1,
+    "transaction-export": 1,
+    "withdraw": 12,
+    "stake_asset": 10,
+    "unstake_asset": 12,
+    "get_total_reward": 3,
+}
+
+# Frames from these files are never reported as the call site
+_HARNESS_FILES = (os.path.abspath(__file__), os.path.abspath(benchmarking.__file__))
+
+
+class QueryLog:
+    """connection.execute_wrapper callback recording each query with its call site in the repo."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((self._call_site(), sql))
+        return execute(sql, params, many, context)
+
+    @staticmethod
+    def _call_site():
+        base_dir = str(settings.BASE_DIR)
+        for frame in reversed(traceback.extract_stack()[:-2]):
+            filename = os.path.abspath(frame.filename)
+            if (
+                filename.startswith(base_dir)
+                and "site-packages" not in filename
+                and filename not in _HARNESS_FILES
+            ):
+                return f"{os.path.relpath(filename, base_dir)}:{frame.lineno} in {frame.name}"
+        return "<outside the project>"
+
+    def by_call_site(self):
+        grouped = defaultdict(list)
+        for site, sql in self.queries:
+            grouped[site].append(sql)
+        return sorted(grouped.items(), key=lambda item: -len(item[1]))
+
+
+# ---------------- Dataset ----------------
+def seed_base(seed, rows):
+    """One user with balances everywhere and ``rows`` of history per table; returns (user, assets)."""
+    seeder = LoadSeeder(seed=seed)
+    assets = seeder.ensure_catalog()
+    user_ids = seeder.seed_users(1, prefix="budget")
+    seeder.seed_balances(user_ids, assets, min_amount=100)
+    _seed_history(seeder, user_ids, assets, rows)
+    return User.objects.get(pk=user_ids[0]), assets
+
+
+def grow(seed, user, assets, rows, scale):
+    """Gives ``user`` ``scale`` times the history and the catalog seed_base() created."""
+    grower = LoadSeeder(seed=seed + 1)
+    new_assets = _grow_catalog(len(assets) * (scale - 1))
+    grower.seed_balances([user.pk], new_assets, min_amount=100)
+    _seed_history(grower, [user.pk], {**assets, **new_assets}, rows * (scale - 1))
+
+
+def _seed_history(seeder, user_ids, assets, rows):
+    seeder.seed_transactions(user_ids, assets, rows)
+    seeder.seed_staking(user_ids, assets, pending_per_user=rows, tx_per_user=rows, rewards_per_user=rows)
+
+
+def _grow_catalog(n_assets):
+    """Adds ``n_assets`` staking-enabled crypto assets (own network and quote each) plus as many fiat ones."""
+    networks = Network.objects.bulk_create(
+        Network(name=f"NET{i}", full_name=f"Network {i}", apr_low=3.0, apr_high=5.0)
+        for i in range(n_assets)
+    )
+    crypto = Asset.objects.bulk_create(
+        Asset(symbol=f"C{i:03d}", name=f"Coin {i}", staking=True) for i in range(n_assets)
+    )
+    fiat = Asset.objects.bulk_create(
+        Asset(symbol=f"F{i:03d}", name=f"Fiat {i}", fiat=True) for i in range(n_assets)
+    )
+    Asset.networks.through.objects.bulk_create(
+        Asset.networks.through(asset_id=asset.pk, network_id=network.pk)
+        for asset, network in zip(crypto, networks)
+    )
+    price = Decimal("1")
+    Quote.objects.bulk_create(
+        Quote(
+            asset=asset, interval="1m", bid=price, ask=price, lp=price, volume=0,
+            open_price=price, high_price=price, low_price=price, value_in_usd=price,
+        )
+        for asset in crypto + fiat
+    )
+    return {
+        asset.symbol: asset
+        for asset in Asset.objects.filter(symbol__in=[a.symbol for a in crypto]).prefetch_related("networks")
+    }
+
+
+# ---------------- Measurement ----------------
+def endpoints(user):
+    """(name, method, path, payload) for every endpoint with a budget."""
+    withdrawal = (
+        Transaction.objects.filter(user=user, type=Transaction.WITHDRAWAL).order_by("-pk").first()
+    )
+    extra = [("transaction-export", "get", reverse("transaction-export") + "?output=ndjson", None)]
+    if withdrawal:
+        extra.append(
+            ("withdrawal-status", "get",
+             reverse("withdrawal-status", kwargs={"transaction_id": withdrawal.pk}), None)
+        )
+    return benchmarking.endpoints() + extra
+
+
+def prepare(client, user):
+    """A fresh instance per request and a cold rate matrix, so caches don't hide queries."""
+    client.force_authenticate(User.objects.get(pk=user.pk))
+    rates.invalidate()
+
+
+def send(client, method, path, payload):
+    """One request, with a streamed body read to the end (its queries run while streaming)."""
+    if method == "get":
+        response = client.get(path)
+    else:
+        response = client.post(path, payload, format="json")
+    if response.streaming:
+        b"".join(response.streaming_content)
+    return response
+
+
+def measure(user):
+    """{name: (status_code, QueryLog)} for every endpoint."""
+    client = APIClient(raise_request_exception=False)
+    results = {}
+    for name, method, path, payload in endpoints(user):
+        prepare(client, user)
+        log = QueryLog()
+        with connection.execute_wrapper(log):
+            response = send(client, method, path, payload)
+        results[name] = (response.status_code, log)
+    return results
+
+
+class Command(BaseCommand):
+    help = (
+        "Fail when an endpoint exceeds its query budget or when its query count grows "
+        "with the size of the dataset. Runs against a throwaway database "
+        "(core.tests.QueryBudgetTests runs the same check under manage.py test)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows", type=int, default=20,
+            help="History rows per table for the base dataset (default: 20).",
+        )
+        parser.add_argument(
+            "--scale", type=int, default=10,
+            help="Growth factor for rows and catalog size in the scaled dataset (default: 10).",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Dataset seed (default: 0).")
+        parser.add_argument(
+            "--show-sql", action="store_true",
+            help="Print the grouped SQL for every endpoint, not only the failing ones.",
+        )
+
+    def handle(self, *args, **opts):
+        if opts["scale"] < 2:
+            raise CommandError("--scale must be at least 2")
+
+        with throwaway_database():
+            user, assets = seed_base(opts["seed"], opts["rows"])
+            base = measure(user)
+            grow(opts["seed"], user, assets, opts["rows"], opts["scale"])
+            scaled = measure(user)
+
+        failures = []
+        self.stdout.write(f"{'endpoint':<24}{'status':>8}{'base':>8}{'scaled':>8}{'budget':>8}")
+        for name, (status_code, log) in scaled.items():
+            base_count = len(base[name][1].queries)
+            count = len(log.queries)
+            budget = BUDGETS.get(name)
+            problems = []
+            if status_code >= 400:
+                # An error response skips the work the budget is about
+                problems.append(f"status {status_code}")
+            if budget is None:
+                problems.append("no budget declared")
+            elif count > budget:
+                problems.append(f"{count} queries, budget {budget}")
+            if count > base_count:
+                problems.append(f"grows with data ({base_count} -> {count})")
+
+            line = f"{name:<24}{status_code:>8}{base_count:>8}{count:>8}{budget if budget is not None else '-':>8}"
+            if problems:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f"{line}  FAIL: {'; '.join(problems)}"))
+            else:
+                self.stdout.write(line)
+            if problems or opts["show_sql"]:
+                self._print_sql(log)
+
+        if failures:
+            raise CommandError(f"{len(failures)} endpoint(s) failed: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS(f"✅ All {len(scaled)} endpoints within their query budgets."))
+
+    def _print_sql(self, log):
+        for site, statements in log.by_call_site():
+            self.stdout.write(f"    {len(statements):>4}× {site}")
+            sample = " ".join(statements[0].split())
+            self.stdout.write(f"          {sample[:200]}{'…' if len(sample) > 200 else ''}")
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from assets import ledger
+
+
+class Command(BaseCommand):
+    help = "Fold the balance journal tail into Balance snapshots"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Journal entries folded per transaction (default: 5000).",
+        )
+
+    def handle(self, *args, **opts):
+        folded = ledger.compact(batch_size=opts["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"✅ Folded {folded} journal entries into balances."))
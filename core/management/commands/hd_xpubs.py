@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from assets import hdwallet
+
+
+class Command(BaseCommand):
+    help = "Print the HD_XPUBS value for the seeds in HD_SEEDS (run on the signer, copy to the web tier)"
+
+    def handle(self, *args, **opts):
+        networks = [network for network in settings.HD_SEEDS if network in hdwallet.COIN_TYPES]
+        if not networks:
+            raise CommandError(f"HD_SEEDS has no seed for any of {', '.join(hdwallet.COIN_TYPES)}")
+
+        xpubs = []
+        for network in networks:
+            master = hdwallet.ExtendedKey.from_seed(bytes.fromhex(settings.HD_SEEDS[network]))
+            account = master.derive(hdwallet.account_path(network))
+            xpubs.append(f"{network}={account.neuter().serialize()}")
+        self.stdout.write(f"HD_XPUBS={','.join(xpubs)}")
@@ -1,6 +1,9 @@
 from django.core.management.base import BaseCommand
-from assets.models import Asset, Network
-from core.service import KrakenService
+from django.db import connection
+from assets.catalog import NETWORK_FIELDS, sync_catalog
+from assets.models import Asset
+from core.metrics import QueryTimer
+from core.service import KrakenError, KrakenService
 
 kraken_client = KrakenService()
 
@@ -24,26 +27,6 @@ class Command(BaseCommand):
             {"name": "DOGE", "full_name": "Dogecoin", "confirmations": 40, "min_deposit_amount": 10, "apr_low": 1.0, "apr_high": 2.0},
         ]
 
-        # --- Populate or update Networks ---
-        for net in NETWORKS:
-            obj, created = Network.objects.get_or_create(
-                name=net["name"],
-                defaults={
-                    "full_name": net["full_name"],
-                    "confirmations": net["confirmations"],
-                    "min_deposit_amount": net["min_deposit_amount"],
-                    "apr_low": net["apr_low"],
-                    "apr_high": net["apr_high"],
-                },
-            )
-            if not created:
-                obj.full_name = net["full_name"]
-                obj.confirmations = net["confirmations"]
-                obj.min_deposit_amount = net["min_deposit_amount"]
-                obj.apr_low = net["apr_low"]
-                obj.apr_high = net["apr_high"]
-                obj.save(update_fields=["full_name", "confirmations", "min_deposit_amount", "apr_low", "apr_high"])
-
         # --- Assets configuration ---
         allowed_pairs = [
             "XBTUSDT", "ETHUSDT", "TIAUSDT", "ATOMUSDT", "DYMUSDT",
@@ -85,72 +68,47 @@ class Command(BaseCommand):
 
         FIAT_ASSETS = ["EUR", "USD"]
 
-        # --- Populate crypto assets ---
-        data = kraken_client.get_asset_pairs()["result"]
-
+        # --- Check the pairs against Kraken (advisory; the catalog is defined above) ---
+        try:
+            data = kraken_client.get_asset_pairs(pairs=allowed_pairs)["result"]
+        except (KrakenError, OSError, ValueError) as e:
+            self.stdout.write(self.style.WARNING(f"Could not check pairs against Kraken: {e}"))
+        else:
+            listed = set(data) | {pair.get("altname") for pair in data.values()}
+            for key in allowed_pairs:
+                if key not in listed:
+                    self.stdout.write(self.style.WARNING(f"{key} is not listed on Kraken"))
+
+        # --- Desired catalog ---
+        networks = {net["name"]: {field: net[field] for field in NETWORK_FIELDS} for net in NETWORKS}
+
+        assets = {}
         for key in allowed_pairs:
             symbol = key.replace("USDT", "")
             if symbol == "XBT":
                 symbol = "BTC"
-
-            is_staking = symbol in STAKING_ASSETS
-
-            asset, created = Asset.objects.get_or_create(
-                symbol=symbol,
-                defaults={
-                    "name": ASSET_NAMES.get(symbol, symbol), 
-                    "fiat": False,
-                    "staking": is_staking,
-                }
-            )
-            if not created:
-                asset.name = ASSET_NAMES.get(symbol, symbol)
-                asset.fiat = False
-                asset.staking = is_staking
-                asset.save(update_fields=["name", "fiat", "staking"])
-
-            network_names = ASSET_NETWORKS.get(symbol, [])
-            networks = Network.objects.filter(name__in=network_names)
-            asset.networks.set(networks)
-
-        # --- Populate USDT ---
-        usdt_asset, _ = Asset.objects.get_or_create(
-            symbol="USDT",
-            defaults={
-                "name": ASSET_NAMES["USDT"], 
+            assets[symbol] = {
+                "name": ASSET_NAMES.get(symbol, symbol),
                 "fiat": False,
-                "staking": False,
+                "staking": symbol in STAKING_ASSETS,
+                "networks": ASSET_NETWORKS.get(symbol, []),
             }
-        )
-        usdt_asset.name = ASSET_NAMES["USDT"]
-        usdt_asset.fiat = False
-        usdt_asset.staking = False
-        usdt_asset.save(update_fields=["name", "fiat", "staking"])
-        eth_network = Network.objects.get(name="ETH")
-        trx_network = Network.objects.get(name="TRX")
-        usdt_asset.networks.set([eth_network, trx_network])
-
-        # --- Populate fiat assets ---
+        assets["USDT"] = {"name": ASSET_NAMES["USDT"], "fiat": False, "staking": False, "networks": ["ETH", "TRX"]}
         for fiat_symbol in FIAT_ASSETS:
-            asset, created = Asset.objects.get_or_create(
-                symbol=fiat_symbol,
-                defaults={
-                    "name": ASSET_NAMES[fiat_symbol], 
-                    "fiat": True,
-                    "staking": False,
-                }
-            )
-            if not created:
-                asset.name = ASSET_NAMES[fiat_symbol]
-                asset.fiat = True
-                asset.staking = False
-                asset.save(update_fields=["name", "fiat", "staking"])
+            # Fiat has no networks; leave whatever links exist alone
+            assets[fiat_symbol] = {"name": ASSET_NAMES[fiat_symbol], "fiat": True, "staking": False, "networks": None}
+
+        # --- Apply the diff ---
+        timer = QueryTimer()
+        with connection.execute_wrapper(timer):
+            stats = sync_catalog(networks, assets)
 
         # --- Summary output ---
         staking_count = Asset.objects.filter(staking=True).count()
         total_count = Asset.objects.count()
         
         self.stdout.write(self.style.SUCCESS(f"✅ Assets and Networks populated or updated successfully."))
+        self.stdout.write(", ".join(f"{name}: {count}" for name, count in stats.items()) + f" ({timer.queries} queries)")
         self.stdout.write(self.style.SUCCESS(f"📊 Total Assets: {total_count}"))
         self.stdout.write(self.style.SUCCESS(f"⛓️  Staking Assets: {staking_count}"))
         self.stdout.write(self.style.SUCCESS(f"Staking assets: {', '.join(STAKING_ASSETS)}"))
\ No newline at end of file
@@ -1,3 +1,4 @@
+from channels.layers import InMemoryChannelLayer, get_channel_layer
 from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
 from decimal import Decimal
@@ -70,6 +71,10 @@ class Command(BaseCommand):
         source = opts["source"]
         interval = opts["interval"]
         timeout = float(opts["timeout"])
+        if isinstance(get_channel_layer(), InMemoryChannelLayer):
+            self.stdout.write(self.style.WARNING(
+                "In-memory channel layer: ws/quotes/ clients of the server won't see these quotes (set REDIS_URL)"
+            ))
 
         # --- Fetch data ---
         if source == "json":
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from assets.scanner import BlockScanner, blocks_from_source
+
+
+class Command(BaseCommand):
+    help = (
+        "Scan a network's blocks for outputs paying our deposit addresses and record them as "
+        "pending deposits (source from CHAIN_SCANNERS; rpc sources keep following the tip)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("network", help="Network name, e.g. BTC.")
+        parser.add_argument("--source", help='"rpc:<url>" or "file:<path>" (default: CHAIN_SCANNERS[network]).')
+        parser.add_argument(
+            "--from-height", type=int, default=None,
+            help="First block to scan (default: the node's tip for rpc, the whole file for file).",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=None,
+            help=f"Candidates per sink call (default: SCANNER_BATCH_SIZE={settings.SCANNER_BATCH_SIZE}).",
+        )
+
+    def handle(self, *args, **opts):
+        network = opts["network"].upper()
+        source = opts["source"] or settings.CHAIN_SCANNERS.get(network)
+        if not source:
+            raise CommandError(f"No block source for {network}: pass --source or set CHAIN_SCANNERS")
+        try:
+            blocks = blocks_from_source(network, source, opts["from_height"])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        scanner = BlockScanner(network, batch_size=opts["batch_size"])
+        scanned, found = scanner.run(blocks)
+        self.stdout.write(self.style.SUCCESS(f"✅ Scanned {scanned} {network} blocks, {found} deposit candidates."))
@@ -0,0 +1,77 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.seeding import LoadSeeder, fast_sqlite_writes
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-seed users, balances, transactions and staking rows at production scale. "
+        "Output is deterministic for a given --seed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10000, help="Users to create (default: 10000).")
+        parser.add_argument(
+            "--transactions-per-user", type=int, default=100,
+            help="Transaction rows per user (default: 100).",
+        )
+        parser.add_argument(
+            "--stake-pending-per-user", type=int, default=2,
+            help="StakePending rows per user (default: 2).",
+        )
+        parser.add_argument(
+            "--stake-tx-per-user", type=int, default=10,
+            help="StakeTx rows per user (default: 10).",
+        )
+        parser.add_argument(
+            "--rewards-per-user", type=int, default=30,
+            help="StakingRewards rows per user (default: 30).",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0).")
+        parser.add_argument("--days", type=int, default=365, help="History span in days (default: 365).")
+        parser.add_argument(
+            "--chunk-size", type=int, default=5000,
+            help="Rows per bulk_create / transaction (default: 5000).",
+        )
+        parser.add_argument(
+            "--prefix", default="load",
+            help="Email prefix for seeded users: <prefix>-<seed>-<n>@quantra.local (default: load).",
+        )
+
+    def handle(self, *args, **opts):
+        seed, prefix = opts["seed"], opts["prefix"]
+        if User.objects.filter(email__startswith=f"{prefix}-{seed}-").exists():
+            raise CommandError(
+                f"Users with prefix '{prefix}-{seed}-' already exist; pick another --seed or --prefix"
+            )
+
+        seeder = LoadSeeder(
+            seed=seed,
+            chunk_size=opts["chunk_size"],
+            days=opts["days"],
+            log=lambda message: self.stdout.write(f"• {message}"),
+        )
+
+        started = time.perf_counter()
+        with fast_sqlite_writes():
+            assets = seeder.ensure_catalog()
+            user_ids = seeder.seed_users(opts["users"], prefix=prefix)
+            seeder.seed_balances(user_ids, assets)
+            seeder.seed_transactions(user_ids, assets, opts["transactions_per_user"])
+            seeder.seed_staking(
+                user_ids, assets,
+                pending_per_user=opts["stake_pending_per_user"],
+                tx_per_user=opts["stake_tx_per_user"],
+                rewards_per_user=opts["rewards_per_user"],
+            )
+        elapsed = time.perf_counter() - started
+
+        total = sum(seeder.counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Seeded {total:,} rows in {elapsed:.1f}s ({total / elapsed if elapsed else 0:,.0f} rows/s)."
+        ))
@@ -0,0 +1,31 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from assets import portfolio
+
+
+class Command(BaseCommand):
+    help = "Write one portfolio value snapshot per user for a closed day (run nightly)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date",
+            help="Day to snapshot, YYYY-MM-DD (default: yesterday, UTC).",
+        )
+
+    def handle(self, *args, **opts):
+        if opts["date"]:
+            day = parse_date(opts["date"])
+            if day is None:
+                raise CommandError("--date must be YYYY-MM-DD")
+        else:
+            day = timezone.now().date() - timedelta(days=1)
+
+        started = time.perf_counter()
+        written = portfolio.snapshot_day(day)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"✅ Wrote {written} portfolio snapshots for {day} in {elapsed:.1f}s."))
@@ -0,0 +1,317 @@
+# core/metrics.py
+"""
+In-process metrics exposed in the Prometheus text format at /metrics.
+
+Collection is a handful of perf_counter() calls and dict updates under one
+lock per request, cheap enough to leave on in production. Metrics are
+per-process: scrape every worker.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra="") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self._lock = registry.lock
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.extend(self._render_value(labels, value))
+        return lines
+
+    def _render_value(self, labels, value):
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {value}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value):
+        with self._lock:
+            self._values[labels] = value
+
+
+class CallbackGauge(Gauge):
+    """A gauge whose values are read from callbacks when rendered."""
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        super().__init__(registry, name, documentation, labelnames)
+        self._callbacks = {}
+
+    def track(self, *labels, callback):
+        self._callbacks[labels] = callback
+
+    def render(self):
+        for labels, callback in list(self._callbacks.items()):
+            self.set(*labels, value=callback())
+        return super().render()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, *labels, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # [per-bucket counts (+Inf last), sum, count]
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _render_value(self, labels, state):
+        with self._lock:
+            counts, total, count = list(state[0]), state[1], state[2]
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+            cumulative += bucket_count
+            le = f'le="{bound}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}")
+        lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._metrics = []
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(self, name, documentation, labelnames))
+
+    def callback_gauge(self, name, documentation, labelnames=()):
+        return self._register(CallbackGauge(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+http_requests = REGISTRY.counter(
+    "quantra_http_requests_total", "HTTP requests by view, method and status.",
+    ("view", "method", "status"),
+)
+http_latency = REGISTRY.histogram(
+    "quantra_http_request_duration_seconds", "Time spent producing the response.",
+    ("view", "method"),
+)
+http_queries = REGISTRY.histogram(
+    "quantra_http_db_queries", "Database queries issued per request.",
+    ("view", "method"), buckets=QUERY_COUNT_BUCKETS,
+)
+http_db_time = REGISTRY.histogram(
+    "quantra_http_db_duration_seconds", "Time spent in the database per request.",
+    ("view", "method"),
+)
+ws_connections = REGISTRY.gauge(
+    "quantra_ws_connections", "Open websocket connections by consumer.", ("consumer",),
+)
+ws_pushes = REGISTRY.counter(
+    "quantra_ws_pushes_total", "Messages pushed to websocket clients by consumer.", ("consumer",),
+)
+ws_paused = REGISTRY.gauge(
+    "quantra_ws_paused_connections", "Open websocket connections the client has paused, by consumer.", ("consumer",),
+)
+ws_skipped = REGISTRY.counter(
+    "quantra_ws_skipped_pushes_total",
+    "Pushes skipped because the client had stopped answering pings, by consumer.", ("consumer",),
+)
+ws_reaped = REGISTRY.counter(
+    "quantra_ws_reaped_total", "Connections closed by the server as dead, by consumer.", ("consumer",),
+)
+scanner_blocks = REGISTRY.counter(
+    "quantra_scanner_blocks_total", "Blocks scanned for deposits, by network (see assets.scanner).", ("network",),
+)
+scanner_candidates = REGISTRY.counter(
+    "quantra_scanner_candidates_total", "Deposit candidates found in scanned blocks, by network.", ("network",),
+)
+scanner_false_positives = REGISTRY.counter(
+    "quantra_scanner_false_positives_total",
+    "Output addresses that passed the Bloom filter but are not ours, by network.", ("network",),
+)
+scanner_block_duration = REGISTRY.histogram(
+    "quantra_scanner_block_duration_seconds", "Time spent matching one block's outputs, by network.", ("network",),
+)
+executor_queued = REGISTRY.callback_gauge(
+    "quantra_executor_queue_depth", "Calls waiting for a worker, by executor (see core.executors).", ("executor",),
+)
+executor_busy = REGISTRY.gauge(
+    "quantra_executor_busy_workers", "Workers running a call, by executor.", ("executor",),
+)
+executor_wait = REGISTRY.histogram(
+    "quantra_executor_wait_seconds", "Time calls spent queued before a worker picked them up.", ("executor",),
+)
+
+
+class QueryTimer:
+    """connection.execute_wrapper callback counting queries and DB time."""
+
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.queries += 1
+
+
+# The current request's timer. Under ASGI queries run on sync_to_async and DB
+# pool threads, each with its own connection; the context is copied into those
+# threads, so the wrapper on whichever connection runs the query finds it here.
+_query_timer = ContextVar("query_timer", default=None)
+
+
+def _timed_execute(execute, sql, params, many, context):
+    timer = _query_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+def _install(conn):
+    if _timed_execute not in conn.execute_wrappers:
+        conn.execute_wrappers.append(_timed_execute)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    _install(connection)
+
+
+connection_created.connect(_on_connection_created, dispatch_uid="core.metrics.query_timer")
+
+
+def _record(request, response, started, timer):
+    elapsed = time.perf_counter() - started
+    match = getattr(request, "resolver_match", None)
+    # Unresolved paths share one label so 404 scans can't blow up cardinality
+    view = match.view_name if match else "unresolved"
+    method = request.method
+    http_requests.inc(view, method, str(response.status_code))
+    http_latency.observe(view, method, value=elapsed)
+    http_queries.observe(view, method, value=timer.queries)
+    http_db_time.observe(view, method, value=timer.seconds)
+
+
+class MetricsMiddleware:
+    """Records latency, query count and DB time per resolved URL name."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        # Connections opened from now on get the wrapper from connection_created
+        for conn in connections.all(initialized_only=True):
+            _install(conn)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer = QueryTimer()
+        token = _query_timer.set(timer)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _query_timer.reset(token)
+        _record(request, response, started, timer)
+        return response
+
+    async def __acall__(self, request):
+        timer = QueryTimer()
+        token = _query_timer.set(timer)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _query_timer.reset(token)
+        _record(request, response, started, timer)
+        return response
+
+
+def metrics_view(request):
+    """
+    GET /metrics
+
+    If METRICS_TOKEN is set, requires "Authorization: Bearer <METRICS_TOKEN>".
+    """
+    token = getattr(settings, "METRICS_TOKEN", None)
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        return HttpResponse(status=403)
+    return HttpResponse(REGISTRY.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
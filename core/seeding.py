@@ -0,0 +1,279 @@
+# core/seeding.py
+"""
+Deterministic bulk data generation for load testing.
+
+Everything is derived from one integer seed and a fixed epoch, so the same
+arguments always produce the same rows. Rows are generated lazily and written
+in chunks, one transaction per chunk, so memory stays flat however many rows
+are requested: bulk_create for users and balances (whose ids we need), raw
+executemany for the history tables.
+"""
+import contextlib
+import random
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Max
+
+from assets.models import Asset, Balance, BalanceEntry, Network, Quote, Transaction
+from assets.money import SCALE
+from staking.models import StakePending, StakeTx, StakingRewards
+
+User = get_user_model()
+
+SEED_EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+# symbol -> (networks, fiat, staking, usd price)
+DEFAULT_CATALOG = {
+    "BTC": (["BTC"], False, False, "60000"),
+    "ETH": (["ETH"], False, True, "3000"),
+    "TRX": (["TRX"], False, False, "0.12"),
+    "DOT": (["DOT"], False, True, "7"),
+    "ATOM": (["ATOM"], False, True, "9"),
+    "USDT": (["ETH", "TRX"], False, False, "1"),
+    "USD": ([], True, False, "1"),
+    "EUR": ([], True, False, "1.08"),
+}
+
+TRANSACTION_STATUS_WEIGHTS = (
+    (Transaction.COMPLETED, 85),
+    (Transaction.PENDING, 8),
+    (Transaction.FAILED, 5),
+    (Transaction.CANCELLED, 2),
+)
+TRANSACTION_TYPE_WEIGHTS = (
+    (Transaction.DEPOSIT, 55),
+    (Transaction.WITHDRAWAL, 40),
+    (Transaction.TRANSFER, 5),
+)
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class LoadSeeder:
+    def __init__(self, seed: int = 0, chunk_size: int = 5000, days: int = 365, log=None):
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.days = days
+        self.log = log or (lambda message: None)
+        self.counts = {}
+
+    def _rng(self, stream: str) -> random.Random:
+        # One independent stream per table keeps each table reproducible on its own
+        return random.Random(f"{self.seed}:{stream}")
+
+    def _timestamp(self, rng):
+        return SEED_EPOCH + timedelta(seconds=rng.randrange(self.days * 86400))
+
+    def _write(self, model, rows, label=None):
+        label = label or model._meta.db_table
+        started = time.perf_counter()
+        written = 0
+        for chunk in _chunks(rows, self.chunk_size):
+            with transaction.atomic():
+                model.objects.bulk_create(chunk, batch_size=self.chunk_size)
+            written += len(chunk)
+        elapsed = time.perf_counter() - started
+        self.counts[label] = self.counts.get(label, 0) + written
+        self.log(f"{label}: {written} rows in {elapsed:.1f}s ({written / elapsed if elapsed else 0:,.0f} rows/s)")
+        return written
+
+    def _insert(self, model, fields, rows, label=None):
+        """
+        Chunked executemany of ready-made value tuples for ``fields``.
+
+        Used for the high-volume history tables: skipping model instances and
+        per-field preparation is what makes tens of millions of rows feasible.
+        Datetimes must already be adapted with ``connection.ops``.
+        """
+        label = label or model._meta.db_table
+        columns = [model._meta.get_field(name).column for name in fields]
+        quote = connection.ops.quote_name
+        sql = "INSERT INTO {} ({}) VALUES ({})".format(
+            quote(model._meta.db_table),
+            ", ".join(quote(column) for column in columns),
+            ", ".join(["%s"] * len(columns)),
+        )
+        started = time.perf_counter()
+        written = 0
+        for chunk in _chunks(rows, self.chunk_size):
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(sql, chunk)
+            written += len(chunk)
+        elapsed = time.perf_counter() - started
+        self.counts[label] = self.counts.get(label, 0) + written
+        self.log(f"{label}: {written} rows in {elapsed:.1f}s ({written / elapsed if elapsed else 0:,.0f} rows/s)")
+        return written
+
+    # ---------------- Catalog ----------------
+    def ensure_catalog(self):
+        """Returns {symbol: Asset}, creating DEFAULT_CATALOG entries that are missing."""
+        networks = {network.name: network for network in Network.objects.all()}
+        assets = {asset.symbol: asset for asset in Asset.objects.prefetch_related("networks")}
+        for symbol, (network_names, fiat, staking, price) in DEFAULT_CATALOG.items():
+            if symbol in assets:
+                continue
+            for name in network_names:
+                if name not in networks:
+                    networks[name] = Network.objects.create(
+                        name=name, full_name=name, apr_low=3.0, apr_high=5.0
+                    )
+            asset = Asset.objects.create(symbol=symbol, name=symbol, fiat=fiat, staking=staking)
+            asset.networks.set([networks[name] for name in network_names])
+            assets[symbol] = asset
+            price = Decimal(price)
+            Quote.objects.update_or_create(
+                asset=asset, interval="1m",
+                defaults={
+                    "bid": price, "ask": price, "lp": price, "volume": 0,
+                    "open_price": price, "high_price": price, "low_price": price,
+                    "value_in_usd": price,
+                },
+            )
+        return {symbol: assets[symbol] for symbol in sorted(assets)}
+
+    # ---------------- Users & balances ----------------
+    def seed_users(self, n_users: int, prefix: str = "load"):
+        """Creates ``n_users`` users and returns their ids."""
+        fiat = list(Asset.objects.filter(fiat=True).order_by("pk"))
+        rng = self._rng("users")
+        rows = (
+            User(
+                email=f"{prefix}-{self.seed}-{i}@quantra.local",
+                password="!",
+                preferred_currency=rng.choice(fiat) if fiat else None,
+            )
+            for i in range(n_users)
+        )
+        self._write(User, rows, "users")
+        return list(
+            User.objects.filter(email__startswith=f"{prefix}-{self.seed}-").order_by("pk").values_list("pk", flat=True)
+        )
+
+    def seed_balances(self, user_ids, assets, min_amount: int = 0, max_amount: int = 1000):
+        """One balance per user on every network of every crypto asset, plus its opening journal entry."""
+        pairs = [
+            (asset, network)
+            for asset in assets.values() if not asset.fiat
+            for network in asset.networks.all()
+        ]
+        rng = self._rng("balances")
+        last_pk = Balance.objects.aggregate(last=Max("pk"))["last"] or 0
+        rows = (
+            Balance(
+                user_id=user_id,
+                asset=asset,
+                network=network,
+                available=rng.randrange(min_amount * SCALE, max_amount * SCALE + 1),
+                public=f"{network.name.lower()}-{asset.symbol.lower()}-{user_id}",
+            )
+            for user_id in user_ids
+            for asset, network in pairs
+        )
+        self._write(Balance, rows, "balances")
+
+        adapt = connection.ops.adapt_datetimefield_value
+        opening = (
+            (pk, available, BalanceEntry.OPENING, True, adapt(SEED_EPOCH))
+            for pk, available in Balance.objects.filter(pk__gt=last_pk)
+            .exclude(available=0).order_by("pk").values_list("pk", "available").iterator(chunk_size=self.chunk_size)
+        )
+        self._insert(BalanceEntry, ("balance", "amount", "cause", "folded", "created_at"), opening)
+
+    # ---------------- History ----------------
+    def seed_transactions(self, user_ids, assets, per_user: int):
+        pairs = [
+            (asset.pk, network.pk, network.name.lower(), network.confirmations)
+            for asset in assets.values() if not asset.fiat
+            for network in asset.networks.all()
+        ]
+        statuses, status_weights = zip(*TRANSACTION_STATUS_WEIGHTS)
+        types, type_weights = zip(*TRANSACTION_TYPE_WEIGHTS)
+        adapt = connection.ops.adapt_datetimefield_value
+        rng = self._rng("transactions")
+
+        def rows():
+            for user_id in user_ids:
+                for _ in range(per_user):
+                    asset_id, network_id, network_name, confirmations = rng.choice(pairs)
+                    tx_status = rng.choices(statuses, status_weights)[0]
+                    timestamp = self._timestamp(rng)
+                    completed = tx_status == Transaction.COMPLETED
+                    yield (
+                        user_id,
+                        asset_id,
+                        network_id,
+                        rng.choices(types, type_weights)[0],
+                        rng.randrange(1, 10**10),
+                        rng.randrange(0, 10**5),
+                        f"{network_name}-{rng.getrandbits(64):016x}",
+                        tx_status,
+                        adapt(timestamp),
+                        adapt(timestamp + timedelta(minutes=rng.randrange(1, 120))) if completed else None,
+                        f"{rng.getrandbits(256):064x}" if completed else None,
+                        confirmations if completed else 0,
+                    )
+
+        self._insert(
+            Transaction,
+            ("user", "asset", "network", "type", "amount", "fee", "to_address", "status",
+             "timestamp", "completed_at", "blockchain_hash", "confirmations"),
+            rows(),
+        )
+
+    def seed_staking(self, user_ids, assets, pending_per_user: int, tx_per_user: int, rewards_per_user: int):
+        staking_assets = [asset.pk for asset in assets.values() if asset.staking]
+        if not staking_assets:
+            self.log("No staking assets in catalog; skipping staking rows")
+            return
+        adapt = connection.ops.adapt_datetimefield_value
+        rng = self._rng("staking")
+
+        def amount(scale=0):
+            # Minor units; a negative scale gives proportionally smaller amounts
+            return rng.randrange(10**6, 10**10) // 10**-scale
+
+        pending = (
+            (user_id, rng.choice(staking_assets), amount(), amount(-2), adapt(self._timestamp(rng)))
+            for user_id in user_ids for _ in range(pending_per_user)
+        )
+        stake_txs = (
+            (user_id, rng.choice(staking_assets), amount(), 0, rng.choice(("STAKE", "UNSTAKE")),
+             adapt(self._timestamp(rng)))
+            for user_id in user_ids for _ in range(tx_per_user)
+        )
+        rewards = (
+            (user_id, rng.choice(staking_assets), amount(-2), adapt(self._timestamp(rng)))
+            for user_id in user_ids for _ in range(rewards_per_user)
+        )
+        self._insert(StakePending, ("user", "asset", "amount", "rewards", "timestamp"), pending)
+        self._insert(StakeTx, ("user", "asset", "amount", "rewards", "type", "timestamp"), stake_txs)
+        self._insert(StakingRewards, ("user", "asset", "amount", "timestamp"), rewards)
+
+
+@contextlib.contextmanager
+def fast_sqlite_writes():
+    """Trade durability for speed while bulk seeding a SQLite database."""
+    if connection.vendor != "sqlite":
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA synchronous")
+        synchronous = cursor.fetchone()[0]
+        cursor.execute("PRAGMA synchronous = OFF")
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA synchronous = {int(synchronous)}")
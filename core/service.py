@@ -1,16 +1,102 @@
-import http.client
 import urllib.request
 import urllib.parse
 import hashlib
 import hmac
 import base64
 import json
+import os
 import time
-import json
+import logging
+import threading
+from pathlib import Path
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+class KrakenError(Exception):
+    """Kraken answered with a non-empty ``error`` list."""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        super().__init__(", ".join(self.errors))
+
+
+class TokenBucket:
+    """
+    Blocking token bucket: holds up to ``capacity`` tokens, refilled at
+    ``refill_rate`` per second. Thread-safe.
+    """
+
+    def __init__(self, capacity: float, refill_rate: float):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_rate)
+        self._updated = now
+
+    def acquire(self, cost: float = 1):
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= cost:
+                    self._tokens -= cost
+                    return
+                wait = (cost - self._tokens) / self.refill_rate
+            time.sleep(wait)
+
+    def drain(self):
+        """The server says we are over the limit: start again from empty."""
+        with self._lock:
+            self._tokens = 0
+            self._updated = time.monotonic()
+
 
 class KrakenService:
-    def get_nonce() -> str:
-        return str(int(time.time() * 1000))
+    """
+    Kraken REST client.
+
+    One pooled ``requests.Session`` per instance, a process-wide monotonic
+    nonce, and process-wide token buckets approximating Kraken's limits
+    (public: ~1 call/s; private: counter of 15 decaying at 0.33/s, with
+    ledger/history queries costing 2). AssetPairs responses are cached on
+    disk and refreshed conditionally.
+    """
+
+    ENVIRONMENT = "https://api.kraken.com"
+    TIMEOUT = 10
+    MAX_RATE_LIMIT_RETRIES = 3
+    RATE_LIMIT_ERRORS = ("EAPI:Rate limit exceeded", "EGeneral:Too many requests")
+    ASSET_PAIRS_MAX_AGE = 24 * 3600
+
+    public_bucket = TokenBucket(capacity=1, refill_rate=1)
+    private_bucket = TokenBucket(capacity=15, refill_rate=0.33)
+    PRIVATE_COSTS = {"Ledgers": 2, "QueryLedgers": 2, "TradesHistory": 2, "QueryTrades": 2}
+
+    _nonce_lock = threading.Lock()
+    _last_nonce = 0
+
+    def __init__(self, cache_dir: str | None = None, pool_size: int = 4):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.cache_dir = Path(cache_dir or settings.KRAKEN_CACHE_DIR)
+
+    @classmethod
+    def get_nonce(cls) -> str:
+        # Strictly increasing even if two calls land in the same microsecond
+        # or the wall clock steps backwards
+        with cls._nonce_lock:
+            cls._last_nonce = max(time.time_ns() // 1000, cls._last_nonce + 1)
+            return str(cls._last_nonce)
 
     def get_signature(self, private_key: str, data: str, nonce: str, path: str) -> str:
         return self.sign(
@@ -31,12 +117,18 @@ class KrakenService:
         ).decode()
     
 
-    def request(self, method: str = "GET", path: str = "", query: dict | None = None, body: dict | None = None, public_key: str = "", private_key: str = "", environment: str = "") -> http.client.HTTPResponse:
-        url = environment + path
+    def request(self, method: str = "GET", path: str = "", query: dict | None = None, body: dict | None = None, public_key: str = "", private_key: str = "", environment: str = "", headers: dict | None = None) -> requests.Response:
+        url = (environment or self.ENVIRONMENT) + path
         query_str = ""
         if query is not None and len(query) > 0:
             query_str = urllib.parse.urlencode(query)
             url += "?" + query_str
+        # Wait for the rate limit before taking the nonce: a nonce taken first
+        # and held while blocked lands behind later ones and Kraken rejects it
+        if len(public_key) > 0:
+            self.private_bucket.acquire(self.PRIVATE_COSTS.get(path.rsplit("/", 1)[-1], 1))
+        else:
+            self.public_bucket.acquire()
         nonce = ""
         if len(public_key) > 0:
             if body is None:
@@ -45,7 +137,7 @@ class KrakenService:
             if nonce is None:
                 nonce = self.get_nonce()
                 body["nonce"] = nonce
-        headers = {}
+        headers = dict(headers or {})
         body_str = ""
         if body is not None and len(body) > 0:
             body_str = json.dumps(body)
@@ -53,28 +145,174 @@ class KrakenService:
         if len(public_key) > 0:
             headers["API-Key"] = public_key
             headers["API-Sign"] = self.get_signature(private_key, query_str+body_str, nonce, path)
-        req = urllib.request.Request(
+        return self.session.request(
             method=method,
             url=url,
-            data=body_str.encode(),
+            data=body_str.encode() if body_str else None,
             headers=headers,
+            timeout=self.TIMEOUT,
         )
-        return urllib.request.urlopen(req)
 
-    def get_asset_pairs(self):
-        response = self.request(
-            method="GET",
-            path="/0/public/AssetPairs",
-            environment="https://api.kraken.com",
-        )
-        data = response.read()
-        return json.loads(data)
+    def call(self, method: str = "GET", path: str = "", **kwargs) -> dict:
+        """``request()`` plus JSON decoding; raises KrakenError on API errors."""
+        return self._send(method, path, **kwargs)[1]
+
+    def _send(self, method, path, body=None, **kwargs):
+        """
+        Returns ``(response, data)``; ``data`` is None for 304 Not Modified.
+        Backs off and retries, with a fresh nonce, when Kraken reports a rate limit.
+        """
+        for attempt in range(self.MAX_RATE_LIMIT_RETRIES + 1):
+            response = self.request(method=method, path=path, body=dict(body) if body else None, **kwargs)
+            if response.status_code == 304:
+                return response, None
+            response.raise_for_status()
+            data = response.json()
+            errors = data.get("error") or []
+            if not any(error in self.RATE_LIMIT_ERRORS for error in errors):
+                break
+            bucket = self.private_bucket if kwargs.get("public_key") else self.public_bucket
+            bucket.drain()
+            time.sleep(2 ** attempt)
+        if errors:
+            raise KrakenError(errors)
+        return response, data
+
+    def get_asset_pairs(self, pairs=None, max_age: float | None = None) -> dict:
+        """
+        AssetPairs, optionally only ``pairs`` (e.g. ["XBTUSDT", "ETHUSDT"]).
+
+        Served from the on-disk cache while younger than ``max_age`` seconds;
+        then revalidated with If-None-Match / If-Modified-Since when the last
+        response carried validators. A failed refresh falls back to the cache.
+        """
+        max_age = self.ASSET_PAIRS_MAX_AGE if max_age is None else max_age
+        pairs = sorted(set(pairs)) if pairs else None
+        key = hashlib.sha1(",".join(pairs).encode()).hexdigest()[:16] if pairs else "all"
+        cache_path = self.cache_dir / f"asset_pairs-{key}.json"
+        cached = self._read_cache(cache_path)
+        if cached and time.time() - cached["fetched_at"] < max_age:
+            return cached["data"]
+
+        headers = {}
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached and cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+        try:
+            response, data = self._send(
+                "GET",
+                "/0/public/AssetPairs",
+                query={"pair": ",".join(pairs)} if pairs else None,
+                headers=headers,
+            )
+        except (requests.RequestException, ValueError, KrakenError):
+            if cached:
+                logger.warning("AssetPairs refresh failed; using cache from %s", cache_path, exc_info=True)
+                return cached["data"]
+            raise
+
+        if data is None and cached:  # 304 Not Modified
+            cached["fetched_at"] = time.time()
+            self._write_cache(cache_path, cached)
+            return cached["data"]
+
+        self._write_cache(cache_path, {
+            "fetched_at": time.time(),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "data": data,
+        })
+        return data
+
+    @staticmethod
+    def _read_cache(path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_cache(path, payload):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp, path)
+
+
+class StaleWhileRevalidateCache:
+    """
+    Caches the result of ``fetch()`` in-process.
+
+    Fresh for ``ttl`` seconds; after that it is still served for up to
+    ``max_stale`` seconds while a single background thread refreshes it.
+    Only a cold (or too stale) cache makes callers wait, and then only one of
+    them calls upstream while the others wait for its result. Results rejected
+    by ``is_valid`` or raising are discarded and the old value kept.
+    """
+
+    def __init__(self, fetch, ttl: float, max_stale: float, is_valid=None, wait_timeout: float = 15.0):
+        self._fetch = fetch
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._is_valid = is_valid or (lambda value: True)
+        self._wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._value = None
+        self._fetched_at = None
+        self._flight = None  # threading.Event of the refresh in progress
+
+    def get(self):
+        """Returns ``(value, age_seconds)``, or ``(None, None)`` if nothing could be fetched."""
+        with self._lock:
+            age = self._age()
+            if age is not None and age < self.ttl:
+                return self._value, age
+            if age is not None and age < self.ttl + self.max_stale:
+                if self._flight is None:
+                    self._flight = threading.Event()
+                    threading.Thread(target=self._refresh, args=(self._flight,), daemon=True).start()
+                return self._value, age
+            flight = self._flight
+            leader = flight is None
+            if leader:
+                flight = self._flight = threading.Event()
+
+        if leader:
+            self._refresh(flight)
+        else:
+            flight.wait(self._wait_timeout)
+        with self._lock:
+            return self._value, self._age()
+
+    def _age(self):
+        return None if self._fetched_at is None else time.monotonic() - self._fetched_at
+
+    def _refresh(self, flight):
+        value, ok = None, False
+        try:
+            value = self._fetch()
+            ok = self._is_valid(value)
+            if not ok:
+                logger.warning("Discarding invalid upstream result: %r", value)
+        except Exception:
+            logger.exception("Upstream refresh failed")
+        finally:
+            with self._lock:
+                if ok:
+                    self._value, self._fetched_at = value, time.monotonic()
+                self._flight = None
+            flight.set()
+
 
 class ApiService:
     FG_URL = 'https://api.alternative.me/fng/?limit=1'
+    FG_TIMEOUT = 10
     def get_fear_and_greed_index(self) -> dict:
         try:
-            with urllib.request.urlopen(self.FG_URL) as response:
+            with urllib.request.urlopen(self.FG_URL, timeout=self.FG_TIMEOUT) as response:
                 if response.status != 200:
                     return {"error": f"Failed to fetch data, status code: {response.status}"}
                 data = response.read()
@@ -0,0 +1,238 @@
+import json
+import threading
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.test import AsyncClient, SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core import metrics
+from core.management.commands import check_query_budgets as budgets
+from core.executors import database_sync_to_async
+from core import service
+from core.service import KrakenService, StaleWhileRevalidateCache
+from users.models import User
+
+
+def _observed(histogram, *labels):
+    """(observations, sum) recorded so far for ``labels``."""
+    state = histogram._values.get(labels)
+    return (state[2], state[1]) if state else (0, 0)
+
+
+class MetricsMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(email="metrics@example.com")
+        cls.headers = {"Authorization": f"Bearer {AccessToken.for_user(cls.user)}"}
+
+    async def test_counts_queries_of_async_views_under_asgi(self):
+        count, queries = _observed(metrics.http_queries, "withdrawal-history", "GET")
+
+        response = await AsyncClient().get(reverse("withdrawal-history"), headers=self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(_observed(metrics.http_queries, "withdrawal-history", "GET")[0], count + 1)
+        self.assertGreater(_observed(metrics.http_queries, "withdrawal-history", "GET")[1], queries)
+
+    async def test_counts_queries_of_sync_views_under_asgi(self):
+        count, queries = _observed(metrics.http_queries, "transaction-export", "GET")
+
+        response = await AsyncClient().get(reverse("transaction-export"), headers=self.headers)
+        [chunk async for chunk in response.streaming_content]
+
+        self.assertEqual(_observed(metrics.http_queries, "transaction-export", "GET")[0], count + 1)
+        self.assertGreater(_observed(metrics.http_queries, "transaction-export", "GET")[1], queries)
+
+    async def test_counts_queries_on_threads_with_their_own_connection(self):
+        def select_one():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+
+        timer = metrics.QueryTimer()
+        token = metrics._query_timer.set(timer)
+        try:
+            await database_sync_to_async(select_one)()
+            await sync_to_async(select_one)()
+        finally:
+            metrics._query_timer.reset(token)
+
+        self.assertEqual(timer.queries, 2)
+        self.assertGreater(timer.seconds, 0)
+
+
+class QueryBudgetTests(TestCase):
+    """check_query_budgets under manage.py test, on a smaller dataset."""
+
+    ROWS = 5
+    SCALE = 3
+
+    def test_endpoints_stay_within_budget_as_data_grows(self):
+        user, assets = budgets.seed_base(seed=0, rows=self.ROWS)
+        base = {}
+        for name, (status_code, log) in budgets.measure(user).items():
+            with self.subTest(name):
+                self.assertLess(status_code, 400)
+                self.assertIn(name, budgets.BUDGETS)
+                self.assertLessEqual(len(log.queries), budgets.BUDGETS[name])
+            base[name] = len(log.queries)
+
+        budgets.grow(0, user, assets, self.ROWS, self.SCALE)
+        client = APIClient(raise_request_exception=False)
+        for name, method, path, payload in budgets.endpoints(user):
+            budgets.prepare(client, user)
+            with self.subTest(name), self.assertNumQueries(base[name]):
+                budgets.send(client, method, path, payload)
+
+
+class KrakenServiceTests(TestCase):
+    def test_private_nonce_is_taken_after_the_rate_limit_wait(self):
+        client = KrakenService(cache_dir="/nonexistent")
+        order = []
+        acquire = mock.patch.object(
+            KrakenService.private_bucket, "acquire", side_effect=lambda cost=1: order.append("acquire")
+        )
+        get_nonce = mock.patch.object(
+            KrakenService, "get_nonce", side_effect=lambda: order.append("nonce") or "42"
+        )
+        with acquire, get_nonce, mock.patch.object(client.session, "request") as send:
+            client.request("POST", "/0/private/Ledgers", public_key="key", private_key="c2VjcmV0")
+
+        self.assertEqual(order, ["acquire", "nonce"])
+        sent = send.call_args.kwargs
+        self.assertEqual(json.loads(sent["data"])["nonce"], "42")
+        self.assertEqual(
+            sent["headers"]["API-Sign"],
+            client.get_signature("c2VjcmV0", sent["data"].decode(), "42", "/0/private/Ledgers"),
+        )
+
+
+class AsyncAPIViewAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(email="async-auth@example.com")
+
+    def headers(self, user):
+        return {"Authorization": f"Bearer {AccessToken.for_user(user)}"}
+
+    async def get(self, headers=None):
+        return await AsyncClient().get(reverse("withdrawal-history"), headers=headers or {})
+
+    def test_active_user_is_loaded_once(self):
+        client = APIClient(headers=self.headers(self.user))
+        with self.assertNumQueries(2):  # the user, then the page
+            response = client.get(reverse("withdrawal-history"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.wsgi_request.user, self.user)
+
+    async def test_inactive_user_is_rejected(self):
+        headers = self.headers(self.user)
+        self.user.is_active = False
+        await self.user.asave(update_fields=["is_active"])
+
+        response = await self.get(headers)
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(json.loads(response.content)["code"], "user_inactive")
+
+    async def test_deleted_user_is_rejected(self):
+        headers = self.headers(self.user)
+        await self.user.adelete()
+
+        response = await self.get(headers)
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(json.loads(response.content)["code"], "user_not_found")
+
+    async def test_missing_and_invalid_tokens(self):
+        self.assertEqual((await self.get()).status_code, 401)
+        self.assertEqual((await self.get({"Authorization": "Bearer not-a-token"})).status_code, 401)
+
+
+class StaleWhileRevalidateCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.calls = 0
+        self.results = iter(range(1, 100))
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def fetch(self):
+        self.calls += 1
+        self.entered.set()
+        self.release.wait(5)
+        return next(self.results)
+
+    def cache(self, **kwargs):
+        return StaleWhileRevalidateCache(self.fetch, ttl=60, max_stale=600, **kwargs)
+
+    def age(self, cache, seconds):
+        cache._fetched_at -= seconds
+
+    def get_in_threads(self, cache, n):
+        values = []
+        threads = [threading.Thread(target=lambda: values.append(cache.get()[0])) for _ in range(n)]
+        for thread in threads:
+            thread.start()
+        return threads, values
+
+    def test_fresh_value_is_served_without_fetching(self):
+        cache = self.cache()
+        self.assertEqual(cache.get()[0], 1)
+        value, age = cache.get()
+
+        self.assertEqual((value, self.calls), (1, 1))
+        self.assertLess(age, cache.ttl)
+
+    def test_stale_value_is_served_while_one_refresh_runs(self):
+        cache = self.cache()
+        cache.get()
+        self.age(cache, cache.ttl + 1)
+        self.entered.clear()
+        self.release.clear()
+
+        self.assertEqual([cache.get()[0] for _ in range(3)], [1, 1, 1])
+        self.assertTrue(self.entered.wait(5))
+        self.release.set()
+        flight = cache._flight
+        if flight is not None:
+            flight.wait(5)
+
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(cache.get()[0], 2)
+
+    def test_cold_callers_share_one_upstream_call(self):
+        cache = self.cache()
+        self.release.clear()
+
+        threads, values = self.get_in_threads(cache, 5)
+        self.assertTrue(self.entered.wait(5))
+        self.release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(values, [1] * 5)
+        self.assertEqual(self.calls, 1)
+
+    def test_rejected_and_failed_results_keep_the_old_value(self):
+        cache = self.cache(is_valid=lambda value: value == 1)
+        cache.get()
+        self.age(cache, cache.ttl + cache.max_stale + 1)
+
+        with self.assertLogs(service.logger, "WARNING"):
+            value, age = cache.get()
+        self.assertEqual(value, 1)
+        self.assertGreater(age, cache.ttl + cache.max_stale)
+
+        self.results = iter(())  # next() raises
+        with self.assertLogs(service.logger, "ERROR"):
+            self.assertEqual(cache.get()[0], 1)
+        self.assertEqual(self.calls, 3)
+
+    def test_nothing_fetched_yet(self):
+        self.results = iter(())
+        with self.assertLogs(service.logger, "ERROR"):
+            self.assertEqual(self.cache().get(), (None, None))
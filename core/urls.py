@@ -28,6 +28,7 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,   
 )
 from django.conf.urls.static import static
+from core.metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -39,6 +40,8 @@ urlpatterns = [
     path("api/auth/", include("users.urls")),
     path("api/", include("assets.urls")),
     path("api/staking/", include("staking.urls")),
+    path("api/trading/", include("trading.urls")),
+    path("metrics", metrics_view, name="metrics"),
 
 
 ]
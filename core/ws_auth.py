@@ -1,16 +1,26 @@
 # core/ws_auth.py
 from urllib.parse import parse_qs
 
-from asgiref.sync import sync_to_async
 from django.contrib.auth.models import AnonymousUser
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
+from core.executors import database_sync_to_async
+
 jwt_auth = JWTAuthentication()
+_get_user = database_sync_to_async(jwt_auth.get_user)
+
+
+async def authenticate_token(token: str):
+    """
+    The user for a JWT, or AnonymousUser. The signature is checked on the
+    event loop; only the user lookup goes to the DB pool.
+    """
+    try:
+        validated = jwt_auth.get_validated_token(token)
+        return await _get_user(validated)
+    except Exception:
+        return AnonymousUser()
 
-@sync_to_async
-def _get_user_from_token(token: str):
-    validated = jwt_auth.get_validated_token(token)
-    return jwt_auth.get_user(validated)
 
 class TokenAuthMiddleware:
     """
@@ -54,11 +64,8 @@ class TokenAuthMiddleware:
 
         # Validate token if we have one and user is anonymous (or force override)
         if token and (not user or getattr(user, "is_anonymous", True)):
-            try:
-                user = await _get_user_from_token(token)
+            user = await authenticate_token(token)
+            if not user.is_anonymous:
                 scope["user"] = user
-            except Exception:
-                # invalid token -> keep anonymous
-                pass
 
         return await self.inner(scope, receive, send)
@@ -0,0 +1,115 @@
+# Generated by Django 6.0 on 2026-10-19 12:05
+
+import assets.money
+from django.db import migrations
+
+# (model, amount columns) rewritten as integer minor units
+AMOUNTS = [
+    ('staketx', ('amount', 'rewards')),
+    ('stakepending', ('amount', 'rewards')),
+    ('stakingrewards', ('amount',)),
+]
+
+
+def to_minor_units(apps, schema_editor):
+    quote_name = schema_editor.quote_name
+    for model_name, columns in AMOUNTS:
+        table = apps.get_model('staking', model_name)._meta.db_table
+        assignments = ", ".join(
+            f"{quote_name(column + '_minor')} = CAST(ROUND({quote_name(column)} * 100000000) AS BIGINT)"
+            for column in columns
+        )
+        schema_editor.execute(f"UPDATE {quote_name(table)} SET {assignments}")
+
+
+def from_minor_units(apps, schema_editor):
+    quote_name = schema_editor.quote_name
+    for model_name, columns in AMOUNTS:
+        table = apps.get_model('staking', model_name)._meta.db_table
+        assignments = ", ".join(
+            f"{quote_name(column)} = {quote_name(column + '_minor')} / 100000000.0"
+            for column in columns
+        )
+        schema_editor.execute(f"UPDATE {quote_name(table)} SET {assignments}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staking', '0001_initial'),
+        ('assets', '0020_minor_units'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='staketx',
+            name='amount_minor',
+            field=assets.money.MinorUnitField(default=0),
+        ),
+        migrations.AddField(
+            model_name='staketx',
+            name='rewards_minor',
+            field=assets.money.MinorUnitField(default=0),
+        ),
+        migrations.AddField(
+            model_name='stakepending',
+            name='amount_minor',
+            field=assets.money.MinorUnitField(default=0),
+        ),
+        migrations.AddField(
+            model_name='stakepending',
+            name='rewards_minor',
+            field=assets.money.MinorUnitField(default=0),
+        ),
+        migrations.AddField(
+            model_name='stakingrewards',
+            name='amount_minor',
+            field=assets.money.MinorUnitField(default=0),
+        ),
+        migrations.RunPython(to_minor_units, from_minor_units),
+        migrations.RemoveField(
+            model_name='staketx',
+            name='amount',
+        ),
+        migrations.RemoveField(
+            model_name='staketx',
+            name='rewards',
+        ),
+        migrations.RemoveField(
+            model_name='stakepending',
+            name='amount',
+        ),
+        migrations.RemoveField(
+            model_name='stakepending',
+            name='rewards',
+        ),
+        migrations.RemoveField(
+            model_name='stakingrewards',
+            name='amount',
+        ),
+        migrations.RenameField(
+            model_name='staketx',
+            old_name='amount_minor',
+            new_name='amount',
+        ),
+        migrations.RenameField(
+            model_name='staketx',
+            old_name='rewards_minor',
+            new_name='rewards',
+        ),
+        migrations.RenameField(
+            model_name='stakepending',
+            old_name='amount_minor',
+            new_name='amount',
+        ),
+        migrations.RenameField(
+            model_name='stakepending',
+            old_name='rewards_minor',
+            new_name='rewards',
+        ),
+        migrations.RenameField(
+            model_name='stakingrewards',
+            old_name='amount_minor',
+            new_name='amount',
+        ),
+    ]
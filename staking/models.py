@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from assets.models import Asset
+from assets.money import MinorUnitField
 
 User = get_user_model()
 
@@ -13,8 +14,8 @@ class StakeTx(models.Model):
     asset = models.ForeignKey(
         Asset, related_name="asset_staked", on_delete=models.CASCADE
     )
-    amount = models.DecimalField(max_digits=15, decimal_places=8, default=0)
-    rewards = models.DecimalField(max_digits=15, decimal_places=8, default=0)
+    amount = MinorUnitField(default=0)
+    rewards = MinorUnitField(default=0)
     type = models.CharField(default="")
 
     class Meta:
@@ -32,8 +33,8 @@ class StakePending(models.Model):
     asset = models.ForeignKey(
         Asset, related_name="asset_staked_pend", on_delete=models.CASCADE
     )
-    amount = models.DecimalField(max_digits=15, decimal_places=8, default=0)
-    rewards = models.DecimalField(max_digits=15, decimal_places=8, default=0)
+    amount = MinorUnitField(default=0)
+    rewards = MinorUnitField(default=0)
     updated_timestamp = models.DateTimeField(blank=True, null=True)
 
     class Meta:
@@ -51,7 +52,7 @@ class StakingRewards(models.Model):
     asset = models.ForeignKey(
         Asset, related_name="asset_reward_st", on_delete=models.CASCADE
     )
-    amount = models.DecimalField(max_digits=15, decimal_places=8, default=0)
+    amount = MinorUnitField(default=0)
 
     class Meta:
         db_table = "staking_reward"
\ No newline at end of file
@@ -1,7 +1,8 @@
 from rest_framework import exceptions, serializers
 from assets.models import Asset
+from assets.serializers import AmountField
 class StakeAssetSerializer(serializers.Serializer):
-    amount = serializers.DecimalField(max_digits=15, decimal_places=8, required=True)
+    amount = AmountField(max_digits=15, required=True)
     symbol = serializers.CharField(max_length=30, required=True)
 
     def validate_symbol(self, value):
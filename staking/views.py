@@ -6,35 +6,16 @@ from django.utils import timezone
 from rest_framework import serializers 
 from django.db import transaction
 from decimal import Decimal
-from assets.models import Quote, Balance
+from assets import ledger
+from assets.models import Balance, BalanceEntry
+from assets.money import from_minor
+from assets.rates import get_rates
 from staking.models import StakePending, StakeTx, StakingRewards
 from . import serializers 
 from django.db import models
 
+REWARD_PLACES = Decimal("0.00000001")
 
-def check_balance(user, amount, symbol):
-    """
-    Checks if the user has enough total balance across all networks for a given asset symbol.
-    Returns True if sufficient, False otherwise.
-    """
-    total_balance = Balance.objects.filter(user=user, asset__symbol=symbol).aggregate(
-        available=models.Sum('available')
-    )['available'] or 0
-
-    return total_balance >= amount
-
-def get_or_create_balance(asset, user):
-    """
-    Returns the Balance object for a given user and asset.
-    Creates it if it doesn't exist (available initialized to 0).
-    """
-    with transaction.atomic():
-        balance, created = Balance.objects.select_for_update().get_or_create(
-            user=user,
-            asset=asset,
-            defaults={"available": 0}
-        )
-        return balance
 
 class StakeAsset(APIView):
     permission_classes = (IsAuthenticated,)
@@ -53,45 +34,26 @@ class StakeAsset(APIView):
         amount = data["amount"]
         asset = serializer.context["asset"]
 
-        with transaction.atomic():
-            if not check_balance(user, amount, asset.symbol):
-                return Response(
-                    {"error": ["Insufficient funds"]},
-                    status=status.HTTP_400_BAD_REQUEST,
+        try:
+            with transaction.atomic():
+                tx_pending = StakePending.objects.create(
+                    user=user, asset=asset, amount=amount, timestamp=timezone.now()
                 )
-
-            user_balance = get_or_create_balance(asset, user)
-            if user_balance.available >= amount:
-                user_balance.available -= amount
-                user_balance.save()
-            else:
-                remaining = amount - user_balance.available
-                user_balance.available = 0
-                user_balance.save()
-
-                other_balances = Balance.objects.select_for_update().filter(
-                    user=user,
-                    asset__symbol=asset.symbol
-                ).exclude(pk=user_balance.pk)
-
-                for b in other_balances:
-                    if remaining <= 0:
-                        break
-                    deduct = min(b.available, remaining)
-                    b.available -= deduct
-                    b.save()
-                    remaining -= deduct
-
-            tx_pending = StakePending.objects.create(
-                user=user, asset=asset, amount=amount, timestamp=timezone.now()
-            )
-            tx = StakeTx.objects.create(
-                user=user, asset=asset, amount=amount, type="STAKE"
+                tx = StakeTx.objects.create(
+                    user=user, asset=asset, amount=amount, type="STAKE"
+                )
+                ledger.reserve(user, asset, amount, BalanceEntry.STAKE, reference=tx.id)
+        except ledger.InsufficientFunds:
+            return Response(
+                {"error": ["Insufficient funds"]},
+                status=status.HTTP_400_BAD_REQUEST,
             )
+        except ledger.ReservationConflict as e:
+            return Response({"error": [str(e)]}, status=status.HTTP_409_CONFLICT)
 
         return Response(
             {
-                "amount": format(amount, ".2f"),
+                "amount": format(from_minor(amount), ".2f"),
                 "symbol": asset.symbol,
                 "timestamp": tx.timestamp,
             },
@@ -117,7 +79,7 @@ class UnStakeAsset(APIView):
         asset = serializer.context["asset"]
 
         with transaction.atomic():
-            user_balance = get_or_create_balance(asset, user)
+            user_balance = ledger.primary_balance(user, asset)
             pending_txs = (
                 StakePending.objects.select_for_update()
                 .filter(asset=asset, user=user)
@@ -131,12 +93,10 @@ class UnStakeAsset(APIView):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            user_balance.available += amount_to_unstake
-            user_balance.save()
-
             tx = StakeTx.objects.create(
                 user=user, asset=asset, amount=amount_to_unstake, type="UNSTAKE"
             )
+            ledger.credit(user_balance, amount_to_unstake, BalanceEntry.UNSTAKE, reference=tx.id)
 
             remaining_amount = amount_to_unstake
 
@@ -172,7 +132,7 @@ class UnStakeAsset(APIView):
 
         return Response(
             {
-                "amount": format(amount_to_unstake, ".2f"),
+                "amount": format(from_minor(amount_to_unstake), ".2f"),
                 "symbol": tx.asset.symbol,
                 "timestamp": tx.timestamp,
             },
@@ -186,60 +146,40 @@ class GetRewardBalance(APIView):
     def get(self, request, *args, **options):
         user = request.user
         section = request.query_params.get("section", "staking")
-        reward, hist_reward = (0, 0)
-
-        if section == "staking":
-            stake_pending = StakePending.objects.filter(user=request.user)
-            stake_rewards = StakingRewards.objects.filter(user=user)
-            for el in stake_rewards:
-                try:
-                    rate = Quote.objects.get(interval="1MIN", symbol=el.asset).lp
-                except:
-                    return Response(
-                        {"error": "Cant find rate for asset"},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
-                hist_reward += el.amount * rate
-            for el in stake_pending:
-                try:
-                    rate = Quote.objects.get(interval="1MIN", symbol=el.asset).lp
-                except:
-                    return Response(
-                        {"error": "Cant find rate for asset"},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
-                reward += rate * el.rewards
-        else:
-            savings = SavingsBalance.objects.filter(user=user, earnings__gt=0)
-            savings_rewards = SavingsHistory.objects.filter(user=user, type="Reward")
-            if savings.exists():
-                for saving in savings:
-                    try:
-                        rate = Quote.objects.get(
-                            interval="1MIN", symbol=saving.asset
-                        ).lp
-                    except:
-                        return Response(
-                            {"error": "Cant find rate for asset"},
-                            status=status.HTTP_400_BAD_REQUEST,
-                        )
-                    reward += rate * saving.earnings
-            if savings_rewards.exists():
-                for reward_obj in savings_rewards:
-                    try:
-                        rate = Quote.objects.get(
-                            interval="1MIN", symbol=reward_obj.asset
-                        ).lp
-                    except:
-                        return Response(
-                            {"error": "Cant find rate for asset"},
-                            status=status.HTTP_400_BAD_REQUEST,
-                        )
-                    hist_reward += rate * reward_obj.amount
+
+        if section != "staking":
+            # Savings products are not implemented yet
+            return Response(
+                {"error": "Unknown section"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # One grouped sum per table and one quote lookup, however many rows the user has
+        pending = dict(
+            StakePending.objects.filter(user=user)
+            .values("asset_id")
+            .annotate(total=models.Sum("rewards"))
+            .values_list("asset_id", "total")
+        )
+        paid = dict(
+            StakingRewards.objects.filter(user=user)
+            .values("asset_id")
+            .annotate(total=models.Sum("amount"))
+            .values_list("asset_id", "total")
+        )
+        rates = get_rates()
+        if any(rates.rate(asset_id, "USD") is None for asset_id in set(pending) | set(paid)):
+            return Response(
+                {"error": "Cant find rate for asset"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        reward = rates.total({asset_id: total or 0 for asset_id, total in pending.items()}, "USD")
+        hist_reward = rates.total({asset_id: total or 0 for asset_id, total in paid.items()}, "USD")
+
         return Response(
             {
-                "reward": format(Decimal(reward).normalize(), "f"),
-                "hist_reward": format(Decimal(hist_reward).normalize(), "f"),
+                "reward": format(Decimal(repr(reward)).quantize(REWARD_PLACES).normalize(), "f"),
+                "hist_reward": format(Decimal(repr(hist_reward)).quantize(REWARD_PLACES).normalize(), "f"),
             },
             status=status.HTTP_200_OK,
         )
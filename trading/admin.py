@@ -0,0 +1,8 @@
+from django.contrib import admin
+
+from .models import Conversion, Fill, Order, OrderEvent
+
+admin.site.register(Order)
+admin.site.register(Fill)
+admin.site.register(OrderEvent)
+admin.site.register(Conversion)
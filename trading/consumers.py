@@ -0,0 +1,64 @@
+# trading/consumers.py
+import asyncio
+import contextlib
+from urllib.parse import parse_qs
+
+from channels.generic.websocket import AsyncWebsocketConsumer
+from django.conf import settings
+
+from core import metrics
+from trading.feeds import get_book, orderbook_group
+
+ORDERBOOK_MIN_INTERVAL = 0.1  # at most 10 depth messages per second per connection
+ORDERBOOK_DEFAULT_DEPTH = 10
+
+
+class OrderBookConsumer(AsyncWebsocketConsumer):
+    """
+    ws/orderbook/<pair>/?depth=10
+
+    Sends the top-N depth (same JSON as the REST endpoint) on connect and
+    whenever the book changes, at most every ORDERBOOK_MIN_INTERVAL seconds.
+    Clients verify the top 10 levels against "checksum".
+    """
+
+    async def connect(self):
+        pair = self.scope["url_route"]["kwargs"]["pair"]
+        self.book = get_book(pair)
+        if self.book is None:
+            await self.close(code=4004)
+            return
+        try:
+            depth = int((parse_qs(self.scope.get("query_string", b"").decode()).get("depth") or [ORDERBOOK_DEFAULT_DEPTH])[0])
+        except ValueError:
+            depth = ORDERBOOK_DEFAULT_DEPTH
+        self.depth = max(1, min(depth, settings.ORDERBOOK_MAX_DEPTH))
+        self._sent_version = None
+        self._changed = asyncio.Event()
+        await self.channel_layer.group_add(orderbook_group(self.book.pair), self.channel_name)
+        await self.accept()
+        metrics.ws_connections.inc("orderbook")
+        self._changed.set()
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def disconnect(self, code):
+        task = getattr(self, "_task", None)
+        if task is None:
+            return
+        metrics.ws_connections.dec("orderbook")
+        task.cancel()
+        await self.channel_layer.group_discard(orderbook_group(self.book.pair), self.channel_name)
+
+    async def book_update(self, event):
+        self._changed.set()
+
+    async def _flush_loop(self):
+        with contextlib.suppress(asyncio.CancelledError):
+            while True:
+                await self._changed.wait()
+                self._changed.clear()
+                if self.book.version != self._sent_version:
+                    self._sent_version = self.book.version
+                    await self.send(text_data=self.book.depth_json(self.depth))
+                    metrics.ws_pushes.inc("orderbook")
+                await asyncio.sleep(ORDERBOOK_MIN_INTERVAL)
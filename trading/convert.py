@@ -0,0 +1,229 @@
+"""
+Instant conversion between assets, priced from the latest quotes.
+
+Quotes are priced in USDT (Binance *USDT pairs). Both legs are valued in USD
+through the same anchor as assets.rates: USDT at its own quote, or 1.0 when
+it has none, and USD at 1 by definition, so either can always be converted
+to or from. Converting A to B sells A at its bid and buys B at its ask:
+rate = A.bid / B.ask, less CONVERT_SPREAD. Pricing reads only
+the in-process QuoteBook, which is loaded once, updated by the Quote
+post_save signal for writes made in this process and reloaded every
+QUOTE_BOOK_REFRESH seconds in a daemon thread for writes made elsewhere
+(populate_quotes). No database access happens until the client executes.
+
+A priced offer is held in memory for CONVERT_QUOTE_TTL seconds under a
+random id; executing it debits one asset and credits the other in one
+transaction, at the offered amounts. Offers are per process, like the
+matching engine's books. Offered amounts are integer minor units
+(assets.money).
+"""
+import logging
+import secrets
+import threading
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from decimal import ROUND_DOWN, Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from assets import ledger
+from assets.models import Asset, BalanceEntry, Quote
+from assets.money import from_minor
+from assets.rates import USD, USDT
+from trading.models import Conversion
+
+logger = logging.getLogger(__name__)
+
+CONVERT_QUOTE_TTL = 10
+CONVERT_SPREAD = Decimal("0.001")
+QUOTE_BOOK_REFRESH = 5
+# Prices older than this are not offered
+QUOTE_MAX_AGE = 15 * 60
+
+RATE_QUANTUM = Decimal("0.0000000001")
+
+
+class ConversionError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Price:
+    asset_id: int
+    bid: Decimal
+    ask: Decimal
+    time: object
+
+
+class QuoteBook:
+    """Latest bid/ask per asset symbol, held in memory; get() prices them in USD."""
+
+    def __init__(self):
+        self._prices = {}
+        self._anchor_ids = {}
+        self._lock = threading.Lock()
+        self._refresher = None
+        self.loaded_at = None
+
+    def load(self):
+        prices = {
+            quote.asset.symbol: Price(quote.asset_id, quote.bid, quote.ask, quote.time)
+            for quote in Quote.objects.select_related("asset").latest_by_asset().values()
+        }
+        # USD and USDT are priced without a quote, but still need their asset ids
+        self._anchor_ids = dict(Asset.objects.filter(symbol__in=(USD, USDT)).values_list("symbol", "pk"))
+        # Swap the whole dict so readers never see a half-built book
+        self._prices = prices
+        self.loaded_at = time.monotonic()
+
+    def update(self, symbol: str, price: Price):
+        current = self._prices.get(symbol)
+        if current is None or current.time is None or price.time is None or price.time >= current.time:
+            self._prices[symbol] = price
+
+    def get(self, symbol: str):
+        """The USD bid/ask of ``symbol``, or None."""
+        if symbol == USD:
+            asset_id = self._anchor_ids.get(USD)
+            return None if asset_id is None else Price(asset_id, Decimal(1), Decimal(1), None)
+        usdt = self._prices.get(USDT)
+        if usdt is None or usdt.bid <= 0 or usdt.ask <= 0:
+            asset_id = self._anchor_ids.get(USDT)
+            usdt = None if asset_id is None else Price(asset_id, Decimal(1), Decimal(1), None)
+        if symbol == USDT:
+            return usdt
+        price = self._prices.get(symbol)
+        if price is None:
+            return None
+        # Quotes are in USDT; without a USDT asset it is taken at par, as in assets.rates
+        anchor = (usdt.bid + usdt.ask) / 2 if usdt is not None else Decimal(1)
+        return Price(price.asset_id, price.bid * anchor, price.ask * anchor, price.time)
+
+    def ensure_running(self):
+        """Loads the book on first use and starts the refresh thread."""
+        if self._refresher is not None:
+            return
+        with self._lock:
+            if self._refresher is None:
+                self.load()
+                self._refresher = threading.Thread(target=self._refresh, name="quote-book", daemon=True)
+                self._refresher.start()
+
+    def _refresh(self):
+        while True:
+            time.sleep(QUOTE_BOOK_REFRESH)
+            try:
+                self.load()
+            except Exception:
+                logger.warning("Quote book refresh failed", exc_info=True)
+
+
+quote_book = QuoteBook()
+
+
+@dataclass(frozen=True)
+class Offer:
+    id: str
+    user_id: int
+    from_symbol: str
+    to_symbol: str
+    from_asset_id: int
+    to_asset_id: int
+    amount: int
+    receive: int
+    rate: Decimal
+    expires_at: object
+
+    def as_dict(self):
+        return {
+            "quote_id": self.id,
+            "from": self.from_symbol,
+            "to": self.to_symbol,
+            "amount": str(from_minor(self.amount)),
+            "receive": str(from_minor(self.receive)),
+            "rate": str(self.rate),
+            "expires_at": self.expires_at.isoformat(),
+        }
+
+
+_offers = {}
+_offers_lock = threading.Lock()
+
+
+def _purge_expired(now):
+    for offer_id in [offer_id for offer_id, offer in _offers.items() if offer.expires_at <= now]:
+        del _offers[offer_id]
+
+
+def price(user_id: int, from_symbol: str, to_symbol: str, amount: int) -> Offer:
+    """Prices a conversion of ``amount`` minor units of from_symbol and locks it for CONVERT_QUOTE_TTL seconds."""
+    if from_symbol == to_symbol:
+        raise ConversionError("Cannot convert an asset to itself")
+    quote_book.ensure_running()
+    source, target = quote_book.get(from_symbol), quote_book.get(to_symbol)
+    now = timezone.now()
+    for symbol, quote in ((from_symbol, source), (to_symbol, target)):
+        if quote is None or quote.bid <= 0 or quote.ask <= 0:
+            raise ConversionError(f"No price for {symbol}")
+        if quote.time is not None and now - quote.time > timedelta(seconds=QUOTE_MAX_AGE):
+            raise ConversionError(f"Price for {symbol} is stale")
+
+    rate = (source.bid / target.ask * (1 - CONVERT_SPREAD)).quantize(RATE_QUANTUM, rounding=ROUND_DOWN)
+    receive = int((amount * rate).to_integral_value(rounding=ROUND_DOWN))
+    if receive <= 0:
+        raise ConversionError("Amount is too small")
+
+    offer = Offer(
+        id=secrets.token_urlsafe(16),
+        user_id=user_id,
+        from_symbol=from_symbol,
+        to_symbol=to_symbol,
+        from_asset_id=source.asset_id,
+        to_asset_id=target.asset_id,
+        amount=amount,
+        receive=receive,
+        rate=rate,
+        expires_at=now + timedelta(seconds=CONVERT_QUOTE_TTL),
+    )
+    with _offers_lock:
+        _purge_expired(now)
+        _offers[offer.id] = offer
+    return offer
+
+
+def execute(user, offer_id: str) -> Conversion:
+    """
+    Executes a locked offer once: debits the source asset across the user's
+    balances and credits the target asset, in one transaction.
+    Raises ConversionError, ledger.InsufficientFunds or ledger.ReservationConflict
+    (the offer stays usable, so the client can retry it).
+    """
+    with _offers_lock:
+        offer = _offers.get(offer_id)
+        if offer is None or offer.user_id != user.id:
+            raise ConversionError("Unknown or already used quote")
+        del _offers[offer_id]
+    if offer.expires_at <= timezone.now():
+        raise ConversionError("Quote expired")
+
+    try:
+        with transaction.atomic():
+            conversion = Conversion.objects.create(
+                user=user,
+                from_asset_id=offer.from_asset_id,
+                to_asset_id=offer.to_asset_id,
+                from_amount=offer.amount,
+                to_amount=offer.receive,
+                rate=offer.rate,
+            )
+            ledger.reserve(user, offer.from_asset_id, offer.amount, BalanceEntry.CONVERT, reference=conversion.id)
+            ledger.credit_many(
+                [(user.id, offer.to_asset_id, offer.receive, BalanceEntry.CONVERT)], reference=conversion.id
+            )
+    except ledger.ReservationConflict:
+        with _offers_lock:
+            _offers[offer.id] = offer
+        raise
+    return conversion
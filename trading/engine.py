@@ -0,0 +1,178 @@
+"""
+Price-time priority matching engine for one pair. Pure Python, no I/O.
+
+Resting orders live in a FIFO deque per price level; level prices are kept
+in a sorted list per side (negated for bids, so both sides are ascending and
+the best price is always index 0). Every resting order is also indexed by
+id, so cancel is a dict lookup: the order is flagged and its quantity taken
+off the level at once, and the deque entry is dropped when matching reaches
+it (or the level is dropped when it empties).
+
+The engine is deterministic: replaying the same place/cancel sequence
+produces the same fills, which is what rebuilding from the journal relies on.
+
+Prices are Decimal; amounts are integer minor units (assets.money).
+"""
+from bisect import bisect_left
+from collections import deque
+from decimal import Decimal
+from typing import NamedTuple
+
+BUY = "buy"
+SELL = "sell"
+
+ZERO = 0
+
+
+class Fill(NamedTuple):
+    taker_id: int
+    maker_id: int
+    taker_user_id: int
+    maker_user_id: int
+    taker_side: str
+    price: Decimal
+    amount: int
+
+
+class _Resting:
+    __slots__ = ("id", "user_id", "side", "price", "remaining", "cancelled")
+
+    def __init__(self, order_id, user_id, side, price, remaining):
+        self.id = order_id
+        self.user_id = user_id
+        self.side = side
+        self.price = price
+        self.remaining = remaining
+        self.cancelled = False
+
+
+class _Level:
+    __slots__ = ("quantity", "orders")
+
+    def __init__(self):
+        self.quantity = ZERO
+        self.orders = deque()
+
+
+class MatchingEngine:
+    def __init__(self, pair: str):
+        self.pair = pair
+        self._keys = {BUY: [], SELL: []}
+        self._levels = {BUY: {}, SELL: {}}
+        self._orders = {}
+
+    def __contains__(self, order_id):
+        return order_id in self._orders
+
+    def __len__(self):
+        return len(self._orders)
+
+    @staticmethod
+    def _key(side, price):
+        return -price if side == BUY else price
+
+    def _add_level(self, side, price):
+        level = self._levels[side][price] = _Level()
+        keys = self._keys[side]
+        key = self._key(side, price)
+        keys.insert(bisect_left(keys, key), key)
+        return level
+
+    def _drop_level(self, side, price):
+        del self._levels[side][price]
+        keys = self._keys[side]
+        del keys[bisect_left(keys, self._key(side, price))]
+
+    def best(self, side):
+        keys = self._keys[side]
+        if not keys:
+            return None
+        return -keys[0] if side == BUY else keys[0]
+
+    def place(self, order_id: int, user_id: int, side: str, price, amount: int) -> tuple:
+        """
+        Matches an order and rests what is left of a limit order.
+        ``price`` None makes it a market order: it takes what liquidity there
+        is and never rests. Returns (fills, remaining, rested).
+        """
+        opposite = SELL if side == BUY else BUY
+        keys = self._keys[opposite]
+        levels = self._levels[opposite]
+        fills = []
+        remaining = amount
+
+        while remaining > 0 and keys:
+            best = -keys[0] if opposite == BUY else keys[0]
+            if price is not None and (best > price if side == BUY else best < price):
+                break
+            level = levels[best]
+            queue = level.orders
+            while remaining > 0 and queue:
+                maker = queue[0]
+                if maker.cancelled:
+                    queue.popleft()
+                    continue
+                traded = maker.remaining if maker.remaining < remaining else remaining
+                maker.remaining -= traded
+                remaining -= traded
+                level.quantity -= traded
+                fills.append(Fill(order_id, maker.id, user_id, maker.user_id, side, best, traded))
+                if maker.remaining == 0:
+                    queue.popleft()
+                    del self._orders[maker.id]
+            if level.quantity == 0:
+                self._drop_level(opposite, best)
+
+        rested = remaining > 0 and price is not None
+        if rested:
+            level = self._levels[side].get(price) or self._add_level(side, price)
+            order = _Resting(order_id, user_id, side, price, remaining)
+            level.orders.append(order)
+            level.quantity += remaining
+            self._orders[order_id] = order
+        return fills, remaining, rested
+
+    def cancel(self, order_id: int):
+        """Removes a resting order; returns its unfilled amount, or None if it is not resting."""
+        order = self._orders.pop(order_id, None)
+        if order is None:
+            return None
+        order.cancelled = True
+        level = self._levels[order.side][order.price]
+        level.quantity -= order.remaining
+        if level.quantity == 0:
+            self._drop_level(order.side, order.price)
+        return order.remaining
+
+    def remaining(self, order_id: int):
+        order = self._orders.get(order_id)
+        return order.remaining if order else None
+
+    def sweep(self, side: str, amount: int, price=None):
+        """
+        The fills a taker order would get right now, without changing the
+        book: [(price, amount), ...] in match order, one entry per maker.
+        """
+        opposite = SELL if side == BUY else BUY
+        result = []
+        remaining = amount
+        for key in self._keys[opposite]:
+            level_price = -key if opposite == BUY else key
+            if price is not None and (level_price > price if side == BUY else level_price < price):
+                break
+            for maker in self._levels[opposite][level_price].orders:
+                if maker.cancelled:
+                    continue
+                traded = min(maker.remaining, remaining)
+                result.append((level_price, traded))
+                remaining -= traded
+                if remaining == 0:
+                    return result
+        return result
+
+    def depth(self, n: int):
+        """Top ``n`` aggregated levels per side: {"bids": [(price, qty)], "asks": [...]}."""
+        return {
+            "bids": [(-key, self._levels[BUY][-key].quantity) for key in self._keys[BUY][:n]],
+            "asks": [(key, self._levels[SELL][key].quantity) for key in self._keys[SELL][:n]],
+        }
@@ -0,0 +1,218 @@
+"""
+Order entry and settlement around the in-memory MatchingEngine.
+
+Per order, under the pair's lock:
+
+1. One transaction creates the Order, holds its funds (quote for buys, base
+   for sells) through ``ledger.reserve`` and appends a PLACE OrderEvent.
+2. The engine matches it.
+3. One more transaction settles everything the match produced, whatever the
+   number of fills: Fill rows, trade credits and hold releases each go in a
+   single bulk insert, the touched orders in a single bulk update.
+
+Cancels journal a CANCEL event in the transaction that releases the hold.
+
+The book exists only in memory, so on first use in a process it is rebuilt
+by replaying the pair's journal in order. Matching is deterministic, so the
+replay reproduces every fill; a taker whose fills never got settled (the
+process died between steps 2 and 3) is settled during the replay.
+
+Books live in this process, so the app must run as a single process
+(one daphne/runserver worker) while trading is enabled.
+
+Amounts, holds and credits are integer minor units (assets.money); only
+prices are Decimal.
+"""
+import logging
+import threading
+from collections import defaultdict
+from decimal import ROUND_DOWN, ROUND_UP, Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from assets import ledger
+from assets.models import Asset, BalanceEntry
+from trading.engine import BUY, MatchingEngine
+from trading.models import Fill, Order, OrderEvent
+
+logger = logging.getLogger(__name__)
+
+class OrderRejected(Exception):
+    pass
+
+
+def notional(price: Decimal, amount: int, rounding=ROUND_DOWN) -> int:
+    """Quote value, in quote minor units, of ``amount`` base minor units at ``price``."""
+    return int((price * amount).to_integral_value(rounding=rounding))
+
+
+class Exchange:
+    """One pair: its engine, the lock that serialises it, and the DB side of every order."""
+
+    def __init__(self, pair: str, base: Asset, quote: Asset):
+        self.pair = pair
+        self.base = base
+        self.quote = quote
+        self.engine = MatchingEngine(pair)
+        self.lock = threading.Lock()
+
+    def _hold_asset_id(self, side):
+        return self.quote.id if side == Order.BUY else self.base.id
+
+    # ---------------- Order entry ----------------
+    def place(self, user, side: str, amount: int, price=None) -> Order:
+        """
+        Places a limit order (``price`` set) or a market order (``price`` None).
+        Market orders take what liquidity there is and cancel the rest.
+        Raises OrderRejected, ledger.InsufficientFunds or ledger.ReservationConflict.
+        """
+        with self.lock:
+            if price is None:
+                sweep = self.engine.sweep(side, amount)
+                if not sweep:
+                    raise OrderRejected("No liquidity on the other side of the book")
+                # A market buy holds exactly what the current book will cost
+                hold = sum(notional(p, a) for p, a in sweep) if side == Order.BUY else amount
+            else:
+                hold = notional(price, amount, ROUND_UP) if side == Order.BUY else amount
+            if hold <= 0:
+                raise OrderRejected("Order value is too small")
+
+            with transaction.atomic():
+                order = Order.objects.create(
+                    user=user,
+                    pair=self.pair,
+                    base=self.base,
+                    quote=self.quote,
+                    side=side,
+                    type=Order.MARKET if price is None else Order.LIMIT,
+                    price=price,
+                    amount=amount,
+                    locked=hold,
+                )
+                ledger.reserve(
+                    user, self.quote if side == Order.BUY else self.base, hold,
+                    BalanceEntry.ORDER_HOLD, reference=order.id,
+                )
+                OrderEvent.objects.create(pair=self.pair, kind=OrderEvent.PLACE, order=order)
+
+            fills, _, rested = self.engine.place(order.id, user.id, side, price, amount)
+            return self._settle(order.id, fills, rested)
+
+    def cancel(self, order: Order) -> Order:
+        """Cancels a resting order and releases what is still held for it."""
+        with self.lock:
+            if order.id not in self.engine:
+                raise OrderRejected("Order is not open")
+            with transaction.atomic():
+                order = Order.objects.select_for_update().get(pk=order.pk)
+                ledger.credit_many(
+                    [(order.user_id, self._hold_asset_id(order.side), order.locked, BalanceEntry.ORDER_RELEASE)],
+                    reference=order.id,
+                )
+                order.locked = 0
+                order.status = Order.CANCELLED
+                order.save(update_fields=["locked", "status", "updated_at"])
+                OrderEvent.objects.create(pair=self.pair, kind=OrderEvent.CANCEL, order=order)
+            self.engine.cancel(order.id)
+            return order
+
+    # ---------------- Settlement ----------------
+    def _settle(self, taker_id: int, fills, rested: bool) -> Order:
+        """Applies one match result in a single transaction; returns the updated taker."""
+        with transaction.atomic():
+            orders = Order.objects.in_bulk({taker_id, *(fill.maker_id for fill in fills)})
+            taker = orders[taker_id]
+            credits = defaultdict(int)  # (user_id, asset_id, cause) -> amount
+
+            for fill in fills:
+                maker = orders[fill.maker_id]
+                buyer, seller = (taker, maker) if fill.taker_side == BUY else (maker, taker)
+                cost = notional(fill.price, fill.amount)
+                buyer.filled += fill.amount
+                buyer.locked -= cost
+                seller.filled += fill.amount
+                seller.locked -= fill.amount
+                credits[(buyer.user_id, self.base.id, BalanceEntry.TRADE)] += fill.amount
+                credits[(seller.user_id, self.quote.id, BalanceEntry.TRADE)] += cost
+
+            now = timezone.now()
+            for order in orders.values():
+                if order.filled == order.amount:
+                    order.status = Order.FILLED
+                elif order is taker and not rested:
+                    order.status = Order.CANCELLED
+                elif order.filled:
+                    order.status = Order.PARTIAL
+                if order.status in (Order.FILLED, Order.CANCELLED) and order.locked:
+                    # Price improvement and rounding leave buy holds with change
+                    credits[(order.user_id, self._hold_asset_id(order.side), BalanceEntry.ORDER_RELEASE)] += order.locked
+                    order.locked = 0
+                order.updated_at = now
+
+            Fill.objects.bulk_create(
+                [
+                    Fill(pair=self.pair, maker_id=fill.maker_id, taker_id=taker_id, price=fill.price, amount=fill.amount)
+                    for fill in fills
+                ]
+            )
+            Order.objects.bulk_update(list(orders.values()), ["filled", "locked", "status", "updated_at"])
+            ledger.credit_many(
+                [(user_id, asset_id, amount, cause) for (user_id, asset_id, cause), amount in credits.items()],
+                reference=taker_id,
+            )
+        return taker
+
+    # ---------------- Journal ----------------
+    def rebuild(self) -> int:
+        """Replays the journal into a fresh engine. Returns the number of events applied."""
+        with self.lock:
+            self.engine = MatchingEngine(self.pair)
+            settled = set(Fill.objects.filter(pair=self.pair).values_list("taker_id", flat=True).distinct())
+            events = (
+                OrderEvent.objects.filter(pair=self.pair)
+                .order_by("id")
+                .values_list("kind", "order_id", "order__user_id", "order__side", "order__price", "order__amount")
+            )
+            applied = 0
+            for kind, order_id, user_id, side, price, amount in events.iterator(chunk_size=5000):
+                applied += 1
+                if kind == OrderEvent.CANCEL:
+                    self.engine.cancel(order_id)
+                    continue
+                fills, _, rested = self.engine.place(order_id, user_id, side, price, amount)
+                if fills and order_id not in settled:
+                    logger.warning("%s: settling order %s left unsettled", self.pair, order_id)
+                    self._settle(order_id, fills, rested)
+
+            # Active in the DB but not on the book: a taker that never reached settlement
+            for order_id in Order.objects.filter(pair=self.pair, status__in=Order.ACTIVE_STATUSES).values_list("pk", flat=True):
+                if order_id not in self.engine:
+                    logger.warning("%s: closing order %s left open", self.pair, order_id)
+                    self._settle(order_id, [], rested=False)
+            return applied
+
+
+_exchanges = {}
+_registry_lock = threading.Lock()
+
+
+def get_exchange(pair: str):
+    """The exchange for a configured "BASE/QUOTE" pair, rebuilt from the journal on first use; else None."""
+    pair = pair.upper()
+    if pair not in settings.TRADING_PAIRS:
+        return None
+    with _registry_lock:
+        exchange = _exchanges.get(pair)
+        if exchange is None:
+            base, quote = pair.split("/", 1)
+            assets = Asset.objects.in_bulk([base, quote], field_name="symbol")
+            if base not in assets or quote not in assets:
+                return None
+            exchange = Exchange(pair, assets[base], assets[quote])
+            events = exchange.rebuild()
+            logger.info("%s: order book rebuilt from %d journal events", pair, events)
+            _exchanges[pair] = exchange
+    return exchange
@@ -0,0 +1,136 @@
+"""
+Order book feeds and the per-process book registry.
+
+Feeds are configured in settings.ORDERBOOK_FEEDS ({pair: source}) and start
+lazily, in a daemon thread, the first time a book is requested:
+
+- ``"kraken"`` polls Kraken's public Depth endpoint (a full snapshot each
+  time) through the rate-limited KrakenService.
+- ``"file:<path>"`` replays Kraken websocket book messages from an NDJSON
+  file, snapshot first, verifying each diff's checksum: the mock market
+  data stand-in.
+
+Every applied message bumps the book version and notifies the
+"orderbook.<PAIR>" channel-layer group; consumers coalesce from there. The
+channel layer is not thread-safe, so feed threads hand the group_send to
+the server's event loop (recorded when a consumer asks for a book) and skip
+the notification while the previous one for the book is still in flight.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+from core.service import KrakenService
+from trading.orderbook import ChecksumMismatch, OrderBook, apply_kraken_message
+
+logger = logging.getLogger(__name__)
+
+_books = {}
+_feeds = {}
+_lock = threading.Lock()
+_loop = None
+_in_flight = {}
+
+
+def orderbook_group(pair: str) -> str:
+    return f"orderbook.{pair}"
+
+
+def get_book(pair: str):
+    """The live book for a configured pair (starting its feed), else None."""
+    global _loop
+    pair = pair.upper()
+    source = settings.ORDERBOOK_FEEDS.get(pair)
+    if source is None:
+        return None
+    try:
+        _loop = asyncio.get_running_loop()
+    except RuntimeError:
+        pass  # a sync view; consumers, the only listeners, record the loop
+    with _lock:
+        book = _books.get(pair)
+        if book is None:
+            book = _books[pair] = OrderBook(pair, max_depth=settings.ORDERBOOK_MAX_DEPTH)
+            thread = threading.Thread(target=_run_feed, args=(book, source), name=f"orderbook-{pair}", daemon=True)
+            _feeds[pair] = thread
+            thread.start()
+    return book
+
+
+def _notify(book):
+    loop = _loop
+    if loop is None or loop.is_closed():
+        return  # nobody in this process has subscribed yet
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    pending = _in_flight.get(book.pair)
+    if pending is not None and not pending.done():
+        return  # consumers read book.version when woken, one wake-up is enough
+    future = asyncio.run_coroutine_threadsafe(
+        channel_layer.group_send(orderbook_group(book.pair), {"type": "book.update", "version": book.version}),
+        loop,
+    )
+    future.add_done_callback(_log_failed_notify)
+    _in_flight[book.pair] = future
+
+
+def _log_failed_notify(future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning("Order book notification failed", exc_info=future.exception())
+
+
+def _run_feed(book, source):
+    try:
+        if source == "kraken":
+            _poll_kraken(book)
+        elif source.startswith("file:"):
+            _replay_file(book, source[len("file:"):])
+        else:
+            logger.error("Unknown order book source %r for %s", source, book.pair)
+    except Exception:
+        logger.exception("Order book feed for %s stopped", book.pair)
+
+
+def _poll_kraken(book):
+    client = KrakenService()
+    while True:
+        try:
+            data = client.call(
+                method="GET",
+                path="/0/public/Depth",
+                query={"pair": book.pair, "count": book.max_depth},
+            )
+            for levels in data["result"].values():
+                book.apply_snapshot(
+                    [(level[0], level[1]) for level in levels["asks"]],
+                    [(level[0], level[1]) for level in levels["bids"]],
+                )
+                _notify(book)
+        except Exception:
+            logger.warning("Kraken depth poll for %s failed", book.pair, exc_info=True)
+        time.sleep(settings.ORDERBOOK_POLL_INTERVAL)
+
+
+def _replay_file(book, path):
+    interval = 1 / settings.ORDERBOOK_REPLAY_RATE if settings.ORDERBOOK_REPLAY_RATE else 0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                applied = apply_kraken_message(book, json.loads(line))
+            except ChecksumMismatch as e:
+                # Kraken's rule: drop the book and wait for a fresh snapshot
+                logger.warning("%s: %s", book.pair, e)
+                applied = True
+            if applied:
+                _notify(book)
+            if interval:
+                time.sleep(interval)
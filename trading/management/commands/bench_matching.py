@@ -0,0 +1,193 @@
+import json
+import random
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from assets import ledger
+from assets.models import BalanceEntry
+from assets.money import SCALE
+from core import benchmarking
+from core.benchmarking import percentile, throwaway_database
+from core.seeding import LoadSeeder
+from trading.engine import BUY, SELL, MatchingEngine
+from trading.exchange import Exchange, OrderRejected
+from trading.models import Fill, Order
+
+User = get_user_model()
+
+MID_PRICE = 60000
+
+
+def _summary_us(values):
+    values = sorted(values)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "p50": round(percentile(values, 50) / 1000, 2),
+        "p99": round(percentile(values, 99) / 1000, 2),
+        "p999": round(percentile(values, 99.9) / 1000, 2),
+        "max": round(values[-1] / 1000, 2),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the matching engine with a random limit/market/cancel order flow on one "
+        "thread and report sustained orders per second and latency as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=200000, help="Orders to submit (default: 200000).")
+        parser.add_argument(
+            "--market-ratio", type=float, default=0.1,
+            help="Share of orders that are market orders (default: 0.1).",
+        )
+        parser.add_argument(
+            "--cancel-ratio", type=float, default=0.3,
+            help="Chance that each order is followed by cancelling a random resting one (default: 0.3).",
+        )
+        parser.add_argument(
+            "--spread", type=int, default=50,
+            help="Limit prices fall within this many ticks of the mid price (default: 50).",
+        )
+        parser.add_argument(
+            "--settle", action="store_true",
+            help="Go through the full order path (holds, journal, batched settlement) on a "
+                 "throwaway database instead of the bare engine. Use far fewer --orders.",
+        )
+        parser.add_argument("--users", type=int, default=100, help="Traders for --settle (default: 100).")
+        parser.add_argument("--seed", type=int, default=0, help="Order flow seed (default: 0).")
+        parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+
+    def handle(self, *args, **opts):
+        if opts["orders"] < 1:
+            raise CommandError("--orders must be positive")
+
+        flow = self._order_flow(opts)
+        if opts["settle"]:
+            with throwaway_database():
+                results = self._run_exchange(flow, opts)
+        else:
+            results = self._run_engine(flow)
+
+        report = {
+            "commit": benchmarking.git_commit(),
+            "timestamp": timezone.now().isoformat(),
+            "mode": "settle" if opts["settle"] else "engine",
+            "database": connection.vendor if opts["settle"] else None,
+            "settings": {
+                key: opts[key] for key in ("orders", "market_ratio", "cancel_ratio", "spread", "seed")
+            },
+            **results,
+        }
+        output = json.dumps(report, indent=2)
+        if opts["output"]:
+            with open(opts["output"], "w", encoding="utf-8") as f:
+                f.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+    def _order_flow(self, opts):
+        """The whole flow, generated up front so only matching is timed: (side, price|None, amount, cancel?)."""
+        rng = random.Random(opts["seed"])
+        flow = []
+        for _ in range(opts["orders"]):
+            side = BUY if rng.random() < 0.5 else SELL
+            amount = rng.randint(1, 100) * SCALE // 100
+            if rng.random() < opts["market_ratio"]:
+                price = None
+            else:
+                # Skew each side away from the mid so the book keeps depth
+                offset = rng.randint(-opts["spread"] // 5, opts["spread"])
+                price = Decimal(MID_PRICE - offset if side == BUY else MID_PRICE + offset)
+            flow.append((side, price, amount, rng.random() < opts["cancel_ratio"]))
+        return flow
+
+    def _run_engine(self, flow):
+        engine = MatchingEngine("BENCH/USD")
+        rng = random.Random(1)
+        resting = []
+        place_ns, cancel_ns = [], []
+        fills = 0
+        clock = time.perf_counter_ns
+
+        started = clock()
+        for order_id, (side, price, amount, cancel) in enumerate(flow, start=1):
+            t0 = clock()
+            matched, _, rested = engine.place(order_id, order_id % 1000, side, price, amount)
+            place_ns.append(clock() - t0)
+            fills += len(matched)
+            if rested:
+                resting.append(order_id)
+            if cancel and resting:
+                victim = resting.pop(rng.randrange(len(resting)))
+                t0 = clock()
+                engine.cancel(victim)
+                cancel_ns.append(clock() - t0)
+        elapsed = (clock() - started) / 1e9
+
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "orders_per_s": round(len(flow) / elapsed),
+            "fills_per_s": round(fills / elapsed),
+            "fills": fills,
+            "cancels": len(cancel_ns),
+            "resting_at_end": len(engine),
+            "place_latency_us": _summary_us(place_ns),
+            "cancel_latency_us": _summary_us(cancel_ns),
+        }
+
+    def _run_exchange(self, flow, opts):
+        seeder = LoadSeeder(seed=opts["seed"])
+        assets = seeder.ensure_catalog()
+        users = list(User.objects.filter(pk__in=seeder.seed_users(opts["users"], prefix="matchbench")))
+        ledger.credit_many(
+            [(user.id, assets["BTC"].id, 10**6 * SCALE, BalanceEntry.DEPOSIT) for user in users]
+            + [(user.id, assets["USDT"].id, 10**10 * SCALE, BalanceEntry.DEPOSIT) for user in users]
+        )
+        exchange = Exchange("BTC/USDT", assets["BTC"], assets["USDT"])
+        rng = random.Random(1)
+        resting = []
+        place_ns, cancel_ns = [], []
+        rejected = 0
+        clock = time.perf_counter_ns
+
+        started = clock()
+        for i, (side, price, amount, cancel) in enumerate(flow):
+            t0 = clock()
+            try:
+                order = exchange.place(users[i % len(users)], side, amount, price)
+            except OrderRejected:
+                rejected += 1
+                continue
+            place_ns.append(clock() - t0)
+            if order.status in Order.ACTIVE_STATUSES:
+                resting.append(order)
+            if cancel and resting:
+                victim = resting.pop(rng.randrange(len(resting)))
+                t0 = clock()
+                try:
+                    exchange.cancel(victim)
+                except OrderRejected:
+                    continue  # filled since
+                cancel_ns.append(clock() - t0)
+        elapsed = (clock() - started) / 1e9
+
+        fills = Fill.objects.count()
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "orders_per_s": round(len(place_ns) / elapsed),
+            "fills_per_s": round(fills / elapsed),
+            "fills": fills,
+            "cancels": len(cancel_ns),
+            "rejected": rejected,
+            "resting_at_end": len(exchange.engine),
+            "place_latency_us": _summary_us(place_ns),
+            "cancel_latency_us": _summary_us(cancel_ns),
+        }
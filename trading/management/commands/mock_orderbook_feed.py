@@ -0,0 +1,61 @@
+import json
+import random
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from trading.orderbook import OrderBook
+
+
+class Command(BaseCommand):
+    help = (
+        "Write a deterministic mock Kraken book feed (NDJSON: one snapshot, then diffs "
+        "with checksums) for ORDERBOOK_FEEDS=\"PAIR=file:<path>\""
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="NDJSON file to write.")
+        parser.add_argument("--pair", default="XBTUSDT", help="Pair label (default: XBTUSDT).")
+        parser.add_argument("--mid", type=Decimal, default=Decimal("60000"), help="Starting mid price (default: 60000).")
+        parser.add_argument("--tick", type=Decimal, default=Decimal("0.1"), help="Price tick (default: 0.1).")
+        parser.add_argument("--levels", type=int, default=100, help="Levels per side (default: 100).")
+        parser.add_argument("--updates", type=int, default=10000, help="Diff messages (default: 10000).")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0).")
+
+    def handle(self, *args, **opts):
+        rng = random.Random(opts["seed"])
+        tick, mid, n = opts["tick"], opts["mid"], opts["levels"]
+        book = OrderBook(opts["pair"], max_depth=n)
+
+        def price(p):
+            return f"{p:.5f}"
+
+        def qty():
+            return f"{Decimal(rng.randrange(1, 10**9)).scaleb(-8):.8f}"
+
+        def level(p, q):
+            return [price(p), q, f"{1735689600 + rng.random():.6f}"]
+
+        asks = [level(mid + tick * (i + 1), qty()) for i in range(n)]
+        bids = [level(mid - tick * i, qty()) for i in range(n)]
+        book.apply_snapshot([(a[0], a[1]) for a in asks], [(b[0], b[1]) for b in bids])
+
+        with open(opts["output"], "w", encoding="utf-8") as f:
+            f.write(json.dumps([0, {"as": asks, "bs": bids}, f"book-{n}", opts["pair"]]) + "\n")
+            for _ in range(opts["updates"]):
+                side = rng.choice(("a", "b"))
+                levels = book.asks if side == "a" else book.bids
+                best = levels.prices[0] if levels.prices else mid
+                offset = tick * rng.randrange(0, n)
+                p = best + offset if side == "a" else best - offset
+                # Mostly resize, sometimes remove a level
+                q = "0.00000000" if rng.random() < 0.2 else qty()
+                update = [(price(p), q)]
+                if side == "a":
+                    book.apply_update(asks=update)
+                else:
+                    book.apply_update(bids=update)
+                message = {side: [level(p, q)], "c": str(book.checksum())}
+                f.write(json.dumps([0, message, f"book-{n}", opts["pair"]]) + "\n")
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Wrote 1 snapshot and {opts['updates']} diffs to {opts['output']}"))
@@ -0,0 +1,86 @@
+# Generated by Django 6.0 on 2026-10-19 09:00
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('assets', '0017_alter_balanceentry_cause'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Order',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('pair', models.CharField(max_length=30)),
+                ('side', models.CharField(choices=[('buy', 'Buy'), ('sell', 'Sell')], max_length=4)),
+                ('type', models.CharField(choices=[('limit', 'Limit'), ('market', 'Market')], max_length=6)),
+                ('price', models.DecimalField(blank=True, decimal_places=8, max_digits=20, null=True)),
+                ('amount', models.DecimalField(decimal_places=8, max_digits=20)),
+                ('filled', models.DecimalField(decimal_places=8, default=Decimal('0'), max_digits=20)),
+                ('locked', models.DecimalField(decimal_places=8, default=Decimal('0'), max_digits=20)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('partial', 'Partially filled'), ('filled', 'Filled'), ('cancelled', 'Cancelled')], default='open', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('base', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='assets.asset')),
+                ('quote', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='assets.asset')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='orders', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'orders',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Fill',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('pair', models.CharField(max_length=30)),
+                ('price', models.DecimalField(decimal_places=8, max_digits=20)),
+                ('amount', models.DecimalField(decimal_places=8, max_digits=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('maker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='maker_fills', to='trading.order')),
+                ('taker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='taker_fills', to='trading.order')),
+            ],
+            options={
+                'db_table': 'fills',
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('pair', models.CharField(max_length=30)),
+                ('kind', models.CharField(choices=[('place', 'Place'), ('cancel', 'Cancel')], max_length=6)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='trading.order')),
+            ],
+            options={
+                'db_table': 'order_events',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', '-created_at'], name='orders_user_id_535113_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['pair', 'status'], name='orders_pair_35ffd5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fill',
+            index=models.Index(fields=['pair', '-created_at'], name='fills_pair_4988b1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderevent',
+            index=models.Index(fields=['pair', 'id'], name='order_event_pair_bcb3bb_idx'),
+        ),
+    ]
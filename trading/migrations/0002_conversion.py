@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-19 10:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0018_alter_balanceentry_cause'),
+        ('trading', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Conversion',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('from_amount', models.DecimalField(decimal_places=8, max_digits=20)),
+                ('to_amount', models.DecimalField(decimal_places=8, max_digits=20)),
+                ('rate', models.DecimalField(decimal_places=10, max_digits=30)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('from_asset', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='assets.asset')),
+                ('to_asset', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='assets.asset')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'conversions',
+                'indexes': [models.Index(fields=['user', '-created_at'], name='conversions_user_id_10afd7_idx')],
+            },
+        ),
+    ]
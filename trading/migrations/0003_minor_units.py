@@ -0,0 +1,170 @@
+# Generated by Django 6.0 on 2026-10-19 12:10
+
+import assets.money
+from django.db import migrations, models
+
+# (model, amount columns) rewritten as integer minor units
+AMOUNTS = [
+    ('order', ('amount', 'filled', 'locked')),
+    ('fill', ('amount',)),
+    ('conversion', ('from_amount', 'to_amount')),
+]
+
+
+def to_minor_units(apps, schema_editor):
+    quote_name = schema_editor.quote_name
+    for model_name, columns in AMOUNTS:
+        table = apps.get_model('trading', model_name)._meta.db_table
+        assignments = ", ".join(
+            f"{quote_name(column + '_minor')} = CAST(ROUND({quote_name(column)} * 100000000) AS BIGINT)"
+            for column in columns
+        )
+        schema_editor.execute(f"UPDATE {quote_name(table)} SET {assignments}")
+
+
+def from_minor_units(apps, schema_editor):
+    quote_name = schema_editor.quote_name
+    for model_name, columns in AMOUNTS:
+        table = apps.get_model('trading', model_name)._meta.db_table
+        assignments = ", ".join(
+            f"{quote_name(column)} = {quote_name(column + '_minor')} / 100000000.0"
+            for column in columns
+        )
+        schema_editor.execute(f"UPDATE {quote_name(table)} SET {assignments}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0002_conversion'),
+        ('assets', '0020_minor_units'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='amount_minor',
+            field=assets.money.MinorUnitField(default=0),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='filled_minor',
+            field=assets.money.MinorUnitField(default=0),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='locked_minor',
+            field=assets.money.MinorUnitField(default=0),
+        ),
+        migrations.AddField(
+            model_name='fill',
+            name='amount_minor',
+            field=assets.money.MinorUnitField(default=0),
+        ),
+        migrations.AddField(
+            model_name='conversion',
+            name='from_amount_minor',
+            field=assets.money.MinorUnitField(default=0),
+        ),
+        migrations.AddField(
+            model_name='conversion',
+            name='to_amount_minor',
+            field=assets.money.MinorUnitField(default=0),
+        ),
+        # Nullable while both columns exist, so that removing them can be reversed
+        migrations.AlterField(
+            model_name='order',
+            name='amount',
+            field=models.DecimalField(decimal_places=8, max_digits=20, null=True),
+        ),
+        migrations.AlterField(
+            model_name='fill',
+            name='amount',
+            field=models.DecimalField(decimal_places=8, max_digits=20, null=True),
+        ),
+        migrations.AlterField(
+            model_name='conversion',
+            name='from_amount',
+            field=models.DecimalField(decimal_places=8, max_digits=20, null=True),
+        ),
+        migrations.AlterField(
+            model_name='conversion',
+            name='to_amount',
+            field=models.DecimalField(decimal_places=8, max_digits=20, null=True),
+        ),
+        migrations.RunPython(to_minor_units, from_minor_units),
+        migrations.RemoveField(
+            model_name='order',
+            name='amount',
+        ),
+        migrations.RemoveField(
+            model_name='order',
+            name='filled',
+        ),
+        migrations.RemoveField(
+            model_name='order',
+            name='locked',
+        ),
+        migrations.RemoveField(
+            model_name='fill',
+            name='amount',
+        ),
+        migrations.RemoveField(
+            model_name='conversion',
+            name='from_amount',
+        ),
+        migrations.RemoveField(
+            model_name='conversion',
+            name='to_amount',
+        ),
+        migrations.RenameField(
+            model_name='order',
+            old_name='amount_minor',
+            new_name='amount',
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='amount',
+            field=assets.money.MinorUnitField(),
+        ),
+        migrations.RenameField(
+            model_name='order',
+            old_name='filled_minor',
+            new_name='filled',
+        ),
+        migrations.RenameField(
+            model_name='order',
+            old_name='locked_minor',
+            new_name='locked',
+        ),
+        migrations.RenameField(
+            model_name='fill',
+            old_name='amount_minor',
+            new_name='amount',
+        ),
+        migrations.AlterField(
+            model_name='fill',
+            name='amount',
+            field=assets.money.MinorUnitField(),
+        ),
+        migrations.RenameField(
+            model_name='conversion',
+            old_name='from_amount_minor',
+            new_name='from_amount',
+        ),
+        migrations.AlterField(
+            model_name='conversion',
+            name='from_amount',
+            field=assets.money.MinorUnitField(),
+        ),
+        migrations.RenameField(
+            model_name='conversion',
+            old_name='to_amount_minor',
+            new_name='to_amount',
+        ),
+        migrations.AlterField(
+            model_name='conversion',
+            name='to_amount',
+            field=assets.money.MinorUnitField(),
+        ),
+    ]
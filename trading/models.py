@@ -0,0 +1,148 @@
+from django.db import models
+
+from assets.money import MinorUnitField, from_minor
+
+
+class Order(models.Model):
+    """
+    A limit or market order on a pair. ``locked`` is what is still held for
+    it (quote asset for buys, base asset for sells) and is released once the
+    order is filled or cancelled.
+    """
+
+    BUY = 'buy'
+    SELL = 'sell'
+
+    SIDE_CHOICES = [
+        (BUY, 'Buy'),
+        (SELL, 'Sell'),
+    ]
+
+    LIMIT = 'limit'
+    MARKET = 'market'
+
+    TYPE_CHOICES = [
+        (LIMIT, 'Limit'),
+        (MARKET, 'Market'),
+    ]
+
+    OPEN = 'open'
+    PARTIAL = 'partial'
+    FILLED = 'filled'
+    CANCELLED = 'cancelled'
+
+    STATUS_CHOICES = [
+        (OPEN, 'Open'),
+        (PARTIAL, 'Partially filled'),
+        (FILLED, 'Filled'),
+        (CANCELLED, 'Cancelled'),
+    ]
+
+    ACTIVE_STATUSES = (OPEN, PARTIAL)
+
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey('users.User', on_delete=models.CASCADE, related_name='orders')
+    pair = models.CharField(max_length=30)
+    base = models.ForeignKey('assets.Asset', on_delete=models.PROTECT, related_name='+')
+    quote = models.ForeignKey('assets.Asset', on_delete=models.PROTECT, related_name='+')
+
+    side = models.CharField(max_length=4, choices=SIDE_CHOICES)
+    type = models.CharField(max_length=6, choices=TYPE_CHOICES)
+    price = models.DecimalField(max_digits=20, decimal_places=8, null=True, blank=True)
+    # Minor units (assets.money)
+    amount = MinorUnitField()
+    filled = MinorUnitField(default=0)
+    locked = MinorUnitField(default=0)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=OPEN)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'orders'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['pair', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.side} {from_minor(self.amount)} {self.pair} @ {self.price or 'market'}"
+
+    @property
+    def remaining(self):
+        return self.amount - self.filled
+
+
+class Fill(models.Model):
+    """One match between a resting (maker) order and an incoming (taker) order."""
+
+    id = models.BigAutoField(primary_key=True)
+    pair = models.CharField(max_length=30)
+    maker = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='maker_fills')
+    taker = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='taker_fills')
+    price = models.DecimalField(max_digits=20, decimal_places=8)
+    amount = MinorUnitField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'fills'
+        indexes = [
+            models.Index(fields=['pair', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"{from_minor(self.amount)} {self.pair} @ {self.price}"
+
+
+class OrderEvent(models.Model):
+    """
+    Order book journal: every place and cancel, in the order the engine saw
+    them. Replaying a pair's events by id rebuilds its book exactly.
+    """
+
+    PLACE = 'place'
+    CANCEL = 'cancel'
+
+    KIND_CHOICES = [
+        (PLACE, 'Place'),
+        (CANCEL, 'Cancel'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    pair = models.CharField(max_length=30)
+    kind = models.CharField(max_length=6, choices=KIND_CHOICES)
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='events')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'order_events'
+        indexes = [
+            models.Index(fields=['pair', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} order {self.order_id}"
+
+
+class Conversion(models.Model):
+    """An executed instant conversion: ``from_amount`` of one asset for ``to_amount`` of another."""
+
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey('users.User', on_delete=models.CASCADE, related_name='conversions')
+    from_asset = models.ForeignKey('assets.Asset', on_delete=models.PROTECT, related_name='+')
+    to_asset = models.ForeignKey('assets.Asset', on_delete=models.PROTECT, related_name='+')
+    # Minor units (assets.money)
+    from_amount = MinorUnitField()
+    to_amount = MinorUnitField()
+    rate = models.DecimalField(max_digits=30, decimal_places=10)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'conversions'
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"{from_minor(self.from_amount)} {self.from_asset_id} -> {from_minor(self.to_amount)} {self.to_asset_id}"
@@ -0,0 +1,199 @@
+"""
+In-memory L2 order book (price levels, not orders) per pair.
+
+Each side keeps parallel, price-sorted lists: a bisect key, the price, the
+quantity and the raw (price, qty) strings as received, which the Kraken
+checksum is computed from. Finding a level is a binary search; inserting or
+removing one shifts the list tail, which is a single memmove and in practice
+cheaper than a tree at order-book depths (<= 1000 levels). Top-N depth is a
+slice of the already-sorted lists, and its JSON is rendered once per book
+version and shared by every reader.
+"""
+import json
+import threading
+import time
+import zlib
+from bisect import bisect_left
+from decimal import Decimal
+
+CHECKSUM_DEPTH = 10
+
+
+class ChecksumMismatch(Exception):
+    def __init__(self, expected, actual):
+        self.expected = expected
+        self.actual = actual
+        super().__init__(f"Order book checksum mismatch: expected {expected}, got {actual}")
+
+
+class BookSide:
+    __slots__ = ("descending", "keys", "prices", "qtys", "raw")
+
+    def __init__(self, descending: bool):
+        self.descending = descending
+        self.keys = []    # price, negated for bids so both sides sort ascending
+        self.prices = []  # Decimal, best first
+        self.qtys = []    # Decimal
+        self.raw = []     # (price_str, qty_str) as received
+
+    def __len__(self):
+        return len(self.keys)
+
+    def clear(self):
+        self.keys.clear()
+        self.prices.clear()
+        self.qtys.clear()
+        self.raw.clear()
+
+    def load(self, levels):
+        """Replaces the side with ``levels``: iterable of (price_str, qty_str)."""
+        parsed = sorted(
+            ((Decimal(p), Decimal(q), (p, q)) for p, q in levels if Decimal(q) != 0),
+            key=lambda level: level[0],
+            reverse=self.descending,
+        )
+        self.prices = [price for price, _, _ in parsed]
+        self.qtys = [qty for _, qty, _ in parsed]
+        self.raw = [raw for _, _, raw in parsed]
+        self.keys = [-price if self.descending else price for price in self.prices]
+
+    def update(self, price_str: str, qty_str: str):
+        """Sets one level; a zero quantity removes it."""
+        price, qty = Decimal(price_str), Decimal(qty_str)
+        key = -price if self.descending else price
+        i = bisect_left(self.keys, key)
+        exists = i < len(self.keys) and self.keys[i] == key
+        if qty == 0:
+            if exists:
+                del self.keys[i], self.prices[i], self.qtys[i], self.raw[i]
+        elif exists:
+            self.qtys[i] = qty
+            self.raw[i] = (price_str, qty_str)
+        else:
+            self.keys.insert(i, key)
+            self.prices.insert(i, price)
+            self.qtys.insert(i, qty)
+            self.raw.insert(i, (price_str, qty_str))
+
+    def truncate(self, depth: int):
+        if len(self.keys) > depth:
+            del self.keys[depth:], self.prices[depth:], self.qtys[depth:], self.raw[depth:]
+
+
+def _checksum_token(value: str) -> str:
+    return value.replace(".", "").lstrip("0")
+
+
+class OrderBook:
+    def __init__(self, pair: str, max_depth: int = 100):
+        self.pair = pair
+        self.max_depth = max_depth
+        self.bids = BookSide(descending=True)
+        self.asks = BookSide(descending=False)
+        self.version = 0
+        self.updated_at = None
+        # Set after a checksum mismatch: diffs are ignored until the next snapshot
+        self.stale = True
+        self._lock = threading.Lock()
+        self._rendered = {}  # depth -> (version, json text)
+
+    def apply_snapshot(self, asks, bids):
+        with self._lock:
+            self.asks.load(asks)
+            self.bids.load(bids)
+            self.asks.truncate(self.max_depth)
+            self.bids.truncate(self.max_depth)
+            self.stale = False
+            self._touch()
+
+    def apply_update(self, asks=(), bids=(), checksum=None):
+        """
+        Applies one diff. With ``checksum`` (Kraken CRC32 of the top 10 levels)
+        the result is verified; on mismatch the book is marked stale and
+        ChecksumMismatch raised so the feed can request a fresh snapshot.
+        """
+        with self._lock:
+            if self.stale:
+                return False
+            for price, qty in asks:
+                self.asks.update(price, qty)
+            for price, qty in bids:
+                self.bids.update(price, qty)
+            self.asks.truncate(self.max_depth)
+            self.bids.truncate(self.max_depth)
+            self._touch()
+            if checksum is not None:
+                actual = self._checksum()
+                if actual != int(checksum):
+                    self.stale = True
+                    raise ChecksumMismatch(int(checksum), actual)
+            return True
+
+    def _touch(self):
+        self.version += 1
+        self.updated_at = time.time()
+
+    def _checksum(self) -> int:
+        parts = []
+        for price, qty in self.asks.raw[:CHECKSUM_DEPTH]:
+            parts.append(_checksum_token(price) + _checksum_token(qty))
+        for price, qty in self.bids.raw[:CHECKSUM_DEPTH]:
+            parts.append(_checksum_token(price) + _checksum_token(qty))
+        return zlib.crc32("".join(parts).encode())
+
+    def checksum(self) -> int:
+        with self._lock:
+            return self._checksum()
+
+    def best_bid(self):
+        with self._lock:
+            return self.bids.prices[0] if self.bids.prices else None
+
+    def best_ask(self):
+        with self._lock:
+            return self.asks.prices[0] if self.asks.prices else None
+
+    def depth_json(self, depth: int) -> str:
+        """Top-``depth`` levels as JSON text, rendered once per (version, depth)."""
+        depth = max(1, min(depth, self.max_depth))
+        cached = self._rendered.get(depth)
+        if cached and cached[0] == self.version:
+            return cached[1]
+        with self._lock:
+            version = self.version
+            payload = {
+                "pair": self.pair,
+                "version": version,
+                "timestamp": self.updated_at,
+                "stale": self.stale,
+                "checksum": self._checksum(),
+                "bids": [[p, q] for p, q in self.bids.raw[:depth]],
+                "asks": [[p, q] for p, q in self.asks.raw[:depth]],
+            }
+        text = json.dumps(payload, separators=(",", ":"))
+        self._rendered[depth] = (version, text)
+        return text
+
+
+def apply_kraken_message(book: OrderBook, message) -> bool:
+    """
+    Applies a Kraken (v1) websocket book message:
+    ``[channel_id, {"as": [...], "bs": [...]}, "book-N", "XBT/USD"]`` for a
+    snapshot, ``[channel_id, {"a": [...]}, {"b": [...], "c": "..."}, ...]``
+    for a diff. The bare dicts are accepted too. Levels are
+    ``[price, volume, timestamp, ...]``. Returns False for other messages.
+    """
+    parts = [message] if isinstance(message, dict) else [m for m in message if isinstance(m, dict)]
+    merged = {}
+    for part in parts:
+        merged.update(part)
+
+    def levels(key):
+        return [(level[0], level[1]) for level in merged.get(key, ())]
+
+    if "as" in merged or "bs" in merged:
+        book.apply_snapshot(levels("as"), levels("bs"))
+        return True
+    if "a" in merged or "b" in merged:
+        return book.apply_update(levels("a"), levels("b"), checksum=merged.get("c"))
+    return False
@@ -0,0 +1,7 @@
+# trading/routing.py
+from django.urls import path
+from .consumers import OrderBookConsumer
+
+websocket_urlpatterns = [
+    path("ws/orderbook/<str:pair>/", OrderBookConsumer.as_asgi()),
+]
@@ -0,0 +1,69 @@
+from django.conf import settings
+from rest_framework import serializers
+
+from assets.serializers import AmountField
+
+from .models import Conversion, Order
+
+
+class OrderSerializer(serializers.ModelSerializer):
+    amount = AmountField(read_only=True)
+    filled = AmountField(read_only=True)
+    locked = AmountField(read_only=True)
+
+    class Meta:
+        model = Order
+        fields = [
+            "id",
+            "pair",
+            "side",
+            "type",
+            "price",
+            "amount",
+            "filled",
+            "locked",
+            "status",
+            "created_at",
+            "updated_at",
+        ]
+
+
+class PlaceOrderSerializer(serializers.Serializer):
+    pair = serializers.CharField(max_length=30)
+    side = serializers.ChoiceField(choices=Order.SIDE_CHOICES)
+    type = serializers.ChoiceField(choices=Order.TYPE_CHOICES, default=Order.LIMIT)
+    amount = AmountField()
+    price = serializers.DecimalField(max_digits=20, decimal_places=8, required=False, allow_null=True)
+
+    def validate_pair(self, value):
+        value = value.upper()
+        if value not in settings.TRADING_PAIRS:
+            raise serializers.ValidationError("Unknown pair")
+        return value
+
+    def validate_amount(self, amount):
+        if amount <= 0:
+            raise serializers.ValidationError("Invalid amount provided")
+        return amount
+
+    def validate(self, data):
+        price = data.get("price")
+        if data["type"] == Order.LIMIT:
+            if price is None:
+                raise serializers.ValidationError({"price": "Required for limit orders"})
+            if price <= 0:
+                raise serializers.ValidationError({"price": "Invalid price provided"})
+        elif price is not None:
+            raise serializers.ValidationError({"price": "Market orders take no price"})
+        return data
+
+
+class ConversionSerializer(serializers.ModelSerializer):
+    from_symbol = serializers.CharField(source="from_asset.symbol", read_only=True)
+    to_symbol = serializers.CharField(source="to_asset.symbol", read_only=True)
+    from_amount = AmountField(read_only=True)
+    to_amount = AmountField(read_only=True)
+
+    class Meta:
+        model = Conversion
+        fields = ["id", "from_symbol", "to_symbol", "from_amount", "to_amount", "rate", "created_at"]
@@ -0,0 +1,17 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from assets.models import Quote
+from assets.signals import quote_symbol
+from trading.convert import Price, quote_book
+
+
+@receiver(post_save, sender=Quote, dispatch_uid="trading.update_quote_book")
+def update_quote_book(sender, instance, **kwargs):
+    """Keeps the in-memory convert prices current with quotes written in this process."""
+    if quote_book.loaded_at is None:
+        return
+    symbol = quote_symbol(instance)
+    price = Price(instance.asset_id, instance.bid, instance.ask, instance.time)
+    transaction.on_commit(lambda: quote_book.update(symbol, price))
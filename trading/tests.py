@@ -0,0 +1,358 @@
+import asyncio
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from channels.layers import get_channel_layer
+from django.db.models import Sum
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from assets import ledger
+from assets.models import Asset, Balance, BalanceEntry, Quote
+from assets.money import SCALE
+from trading import convert, feeds
+from trading.engine import BUY, SELL, MatchingEngine
+from trading.exchange import Exchange, OrderRejected
+from trading.models import Conversion, Fill, Order
+from users.models import User
+from trading.orderbook import ChecksumMismatch, OrderBook, apply_kraken_message
+
+# Kraken's worked example for the v1 book checksum
+KRAKEN_ASKS = [(f"0.050{n:02d}", "0.00000500") for n in (5, 10, 15, 20, 25, 30, 35, 40, 45, 50)]
+KRAKEN_BIDS = [
+    (price, "0.00000500")
+    for price in ("0.05000", "0.04995", "0.04990", "0.04980", "0.04975",
+                  "0.04970", "0.04965", "0.04960", "0.04955", "0.04950")
+]
+KRAKEN_CHECKSUM = 974947235
+
+
+class FeedNotifyTests(SimpleTestCase):
+    async def test_feed_threads_send_on_the_server_loop(self):
+        layer = get_channel_layer()
+        channel = await layer.new_channel()
+        await layer.group_add(feeds.orderbook_group("XBTUSDT"), channel)
+        book = OrderBook("XBTUSDT")
+        book.apply_snapshot([("100.0", "1")], [("99.0", "2")])
+
+        with mock.patch.object(feeds, "_loop", asyncio.get_running_loop()), mock.patch.dict(feeds._in_flight):
+            await asyncio.to_thread(feeds._notify, book)
+            message = await asyncio.wait_for(layer.receive(channel), timeout=1)
+
+        self.assertEqual(message, {"type": "book.update", "version": book.version})
+
+    def test_no_loop_no_notification(self):
+        book = OrderBook("XBTUSDT")
+        with mock.patch.object(feeds, "_loop", None), mock.patch.object(feeds, "get_channel_layer") as layer:
+            feeds._notify(book)
+        layer.assert_not_called()
+
+
+class OrderBookChecksumTests(SimpleTestCase):
+    def book(self):
+        book = OrderBook("XBTUSD")
+        book.apply_snapshot(KRAKEN_ASKS, KRAKEN_BIDS)
+        return book
+
+    def test_matches_krakens_example(self):
+        self.assertEqual(self.book().checksum(), KRAKEN_CHECKSUM)
+
+    def test_only_the_top_ten_levels_count(self):
+        book = self.book()
+        book.apply_update(asks=[("0.05100", "1.00000000")], bids=[("0.04000", "1.00000000")])
+        self.assertEqual(book.checksum(), KRAKEN_CHECKSUM)
+
+    def test_diff_with_the_right_checksum_applies(self):
+        expected = OrderBook("XBTUSD")
+        expected.apply_snapshot([("0.05001", "0.10000000")] + KRAKEN_ASKS, KRAKEN_BIDS[1:])
+
+        book = self.book()
+        applied = apply_kraken_message(
+            book,
+            [336, {"a": [["0.05001", "0.10000000", "1582905487.1"]]},
+             {"b": [["0.05000", "0.00000000", "1582905487.2"]], "c": str(expected.checksum())},
+             "book-10", "XBT/USD"],
+        )
+
+        self.assertTrue(applied)
+        self.assertFalse(book.stale)
+        self.assertEqual(book.best_ask(), expected.best_ask())
+        self.assertEqual(book.best_bid(), expected.best_bid())
+
+    def test_mismatch_marks_the_book_stale_until_the_next_snapshot(self):
+        book = self.book()
+        with self.assertRaises(ChecksumMismatch) as raised:
+            book.apply_update(asks=[("0.05005", "1.00000000")], checksum=KRAKEN_CHECKSUM)
+
+        self.assertEqual(raised.exception.expected, KRAKEN_CHECKSUM)
+        self.assertTrue(book.stale)
+        self.assertFalse(book.apply_update(asks=[("0.05005", "0.00000500")]))
+
+        snapshot = {"as": [list(level) for level in KRAKEN_ASKS], "bs": [list(level) for level in KRAKEN_BIDS]}
+        self.assertTrue(apply_kraken_message(book, snapshot))
+        self.assertFalse(book.stale)
+        self.assertEqual(book.checksum(), KRAKEN_CHECKSUM)
+
+
+class MatchingEngineTests(SimpleTestCase):
+    def test_better_price_matches_first(self):
+        engine = MatchingEngine("BTC/USDT")
+        engine.place(1, 10, SELL, Decimal("101"), 5)
+        engine.place(2, 11, SELL, Decimal("100"), 5)
+
+        fills, remaining, rested = engine.place(3, 12, BUY, Decimal("101"), 7)
+
+        self.assertEqual(
+            [(f.maker_id, f.price, f.amount) for f in fills], [(2, Decimal("100"), 5), (1, Decimal("101"), 2)]
+        )
+        self.assertEqual((remaining, rested), (0, False))
+        self.assertEqual(engine.remaining(1), 3)
+        self.assertNotIn(2, engine)
+
+    def test_earlier_order_matches_first_at_the_same_price(self):
+        engine = MatchingEngine("BTC/USDT")
+        engine.place(1, 10, BUY, Decimal("100"), 4)
+        engine.place(2, 11, BUY, Decimal("100"), 4)
+
+        fills, _, _ = engine.place(3, 12, SELL, Decimal("100"), 6)
+
+        self.assertEqual([(f.maker_id, f.amount) for f in fills], [(1, 4), (2, 2)])
+        self.assertEqual(engine.depth(5), {"bids": [(Decimal("100"), 2)], "asks": []})
+
+    def test_limit_rests_what_does_not_cross(self):
+        engine = MatchingEngine("BTC/USDT")
+        engine.place(1, 10, SELL, Decimal("101"), 5)
+
+        fills, remaining, rested = engine.place(2, 11, BUY, Decimal("100"), 3)
+
+        self.assertEqual((fills, remaining, rested), ([], 3, True))
+        self.assertEqual((engine.best(BUY), engine.best(SELL)), (Decimal("100"), Decimal("101")))
+
+    def test_market_order_never_rests(self):
+        engine = MatchingEngine("BTC/USDT")
+        engine.place(1, 10, SELL, Decimal("100"), 2)
+
+        self.assertEqual(engine.sweep(BUY, 5), [(Decimal("100"), 2)])
+        fills, remaining, rested = engine.place(2, 11, BUY, None, 5)
+
+        self.assertEqual([f.amount for f in fills], [2])
+        self.assertEqual((remaining, rested, len(engine)), (3, False, 0))
+
+    def test_cancel_takes_the_order_off_its_level(self):
+        engine = MatchingEngine("BTC/USDT")
+        engine.place(1, 10, SELL, Decimal("100"), 4)
+        engine.place(2, 11, SELL, Decimal("100"), 4)
+        engine.place(3, 12, SELL, Decimal("102"), 4)
+
+        self.assertEqual(engine.cancel(1), 4)
+        self.assertIsNone(engine.cancel(1))
+        self.assertEqual(engine.depth(5)["asks"], [(Decimal("100"), 4), (Decimal("102"), 4)])
+
+        fills, _, _ = engine.place(4, 13, BUY, Decimal("102"), 5)
+        self.assertEqual([(f.maker_id, f.amount) for f in fills], [(2, 4), (3, 1)])
+
+        self.assertEqual(engine.cancel(3), 3)
+        self.assertIsNone(engine.best(SELL))
+
+    def test_replay_is_deterministic(self):
+        script = [
+            ("place", 1, SELL, Decimal("100"), 3), ("place", 2, SELL, Decimal("99"), 3),
+            ("cancel", 2), ("place", 3, BUY, Decimal("100"), 4), ("place", 4, BUY, None, 9),
+        ]
+
+        def run():
+            engine, fills = MatchingEngine("BTC/USDT"), []
+            for step in script:
+                if step[0] == "cancel":
+                    engine.cancel(step[1])
+                else:
+                    fills += engine.place(step[1], 10 + step[1], *step[2:])[0]
+            return fills, engine.depth(5)
+
+        self.assertEqual(run(), run())
+
+
+class ExchangeSettleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.btc = Asset.objects.create(symbol="BTC", name="Bitcoin")
+        cls.usdt = Asset.objects.create(symbol="USDT", name="Tether")
+        cls.buyer = User.objects.create(email="buyer@example.com")
+        cls.seller = User.objects.create(email="seller@example.com")
+        for user in (cls.buyer, cls.seller):
+            Balance.objects.create(user=user, asset=cls.btc, available=10 * SCALE)
+            Balance.objects.create(user=user, asset=cls.usdt, available=10_000 * SCALE)
+
+    def setUp(self):
+        self.exchange = Exchange("BTC/USDT", self.btc, self.usdt)
+
+    def live(self, user, asset):
+        return (
+            Balance.objects.with_live_available().filter(user=user, asset=asset)
+            .aggregate(total=Sum("live_available"))["total"]
+        )
+
+    def assertHoldsReleased(self, *orders):
+        for order in orders:
+            order.refresh_from_db()
+            self.assertEqual(order.locked, 0, order)
+
+    def test_price_improvement_releases_the_buy_change(self):
+        maker = self.exchange.place(self.seller, SELL, 1 * SCALE, Decimal("100"))
+        taker = self.exchange.place(self.buyer, BUY, 1 * SCALE, Decimal("110"))
+
+        self.assertEqual((maker.status, taker.status), (Order.OPEN, Order.FILLED))
+        self.assertHoldsReleased(maker, taker)
+        release = BalanceEntry.objects.get(cause=BalanceEntry.ORDER_RELEASE, reference=str(taker.id))
+        self.assertEqual(release.amount, 10 * SCALE)
+        self.assertEqual(self.live(self.buyer, self.usdt), 9_900 * SCALE)
+        self.assertEqual(self.live(self.buyer, self.btc), 11 * SCALE)
+        self.assertEqual(self.live(self.seller, self.usdt), 10_100 * SCALE)
+        self.assertEqual(self.live(self.seller, self.btc), 9 * SCALE)
+        self.assertEqual(Fill.objects.get().price, Decimal("100"))
+
+    def test_partial_fill_keeps_the_rest_held(self):
+        self.exchange.place(self.seller, SELL, 1 * SCALE, Decimal("100"))
+        taker = self.exchange.place(self.buyer, BUY, 3 * SCALE, Decimal("100"))
+
+        self.assertEqual((taker.status, taker.filled, taker.locked), (Order.PARTIAL, 1 * SCALE, 200 * SCALE))
+        self.assertEqual(self.live(self.buyer, self.usdt), 9_700 * SCALE)
+
+        cancelled = self.exchange.cancel(taker)
+
+        self.assertEqual(cancelled.status, Order.CANCELLED)
+        self.assertHoldsReleased(cancelled)
+        self.assertEqual(self.live(self.buyer, self.usdt), 9_900 * SCALE)
+        with self.assertRaises(OrderRejected):
+            self.exchange.cancel(cancelled)
+
+    def test_unfilled_market_remainder_is_released(self):
+        self.exchange.place(self.buyer, BUY, 1 * SCALE, Decimal("100"))
+        taker = self.exchange.place(self.seller, SELL, 4 * SCALE)
+
+        self.assertEqual((taker.status, taker.filled), (Order.CANCELLED, 1 * SCALE))
+        self.assertHoldsReleased(taker)
+        self.assertEqual(self.live(self.seller, self.btc), 9 * SCALE)
+        self.assertEqual(self.live(self.seller, self.usdt), 10_100 * SCALE)
+
+    def test_rebuild_restores_the_book(self):
+        resting = self.exchange.place(self.seller, SELL, 2 * SCALE, Decimal("100"))
+        self.exchange.place(self.buyer, BUY, 1 * SCALE, Decimal("100"))
+
+        rebuilt = Exchange("BTC/USDT", self.btc, self.usdt)
+        rebuilt.rebuild()
+
+        self.assertEqual(rebuilt.engine.remaining(resting.id), 1 * SCALE)
+        self.assertEqual(Fill.objects.count(), 1)
+
+
+def _quote(asset, bid, ask):
+    bid, ask = Decimal(bid), Decimal(ask)
+    return Quote.objects.create(
+        asset=asset, interval="1m", bid=bid, ask=ask, lp=bid, volume=0,
+        open_price=bid, high_price=bid, low_price=bid, value_in_usd=bid,
+    )
+
+
+class ConvertTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.btc = Asset.objects.create(symbol="BTC", name="Bitcoin")
+        cls.eth = Asset.objects.create(symbol="ETH", name="Ether")
+        cls.usdt = Asset.objects.create(symbol="USDT", name="Tether")
+        cls.usd = Asset.objects.create(symbol="USD", name="US Dollar", fiat=True)
+        # Binance *USDT prices; neither USDT nor USD has a quote
+        _quote(cls.btc, "100", "101")
+        _quote(cls.eth, "10", "10.1")
+        cls.user = User.objects.create(email="convert@example.com")
+        Balance.objects.create(user=cls.user, asset=cls.btc, available=2 * SCALE)
+
+    def setUp(self):
+        book = convert.QuoteBook()
+        book.load()
+        for patcher in (
+            mock.patch.object(convert, "quote_book", book),
+            mock.patch.object(book, "ensure_running"),
+            mock.patch.dict(convert._offers, clear=True),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.book = book
+
+    def rate(self, from_symbol, to_symbol):
+        return convert.price(self.user.id, from_symbol, to_symbol, 1 * SCALE).rate
+
+    def spread(self, rate):
+        return (Decimal(rate) * (1 - convert.CONVERT_SPREAD)).quantize(convert.RATE_QUANTUM, rounding="ROUND_DOWN")
+
+    def live(self, asset):
+        return (
+            Balance.objects.with_live_available().filter(user=self.user, asset=asset)
+            .aggregate(total=Sum("live_available"))["total"] or 0
+        )
+
+    def test_usdt_and_usd_are_priced_without_a_quote(self):
+        offer = convert.price(self.user.id, "BTC", "USDT", 1 * SCALE)
+
+        self.assertEqual((offer.from_asset_id, offer.to_asset_id), (self.btc.pk, self.usdt.pk))
+        self.assertEqual(offer.rate, self.spread(100))
+        self.assertEqual(offer.receive, int(self.spread(100) * SCALE))
+        self.assertEqual(self.rate("BTC", "USD"), self.spread(100))
+        self.assertEqual(self.rate("USD", "ETH"), self.spread(Decimal(1) / Decimal("10.1")))
+
+    def test_a_usdt_quote_anchors_usd_only(self):
+        _quote(self.usdt, "1.01", "1.01")
+        self.book.load()
+
+        self.assertEqual(self.rate("BTC", "USDT"), self.spread(100))
+        self.assertEqual(self.rate("BTC", "USD"), self.spread(101))
+        self.assertEqual(self.rate("USDT", "USD"), self.spread("1.01"))
+
+    def test_cross_rate_sells_at_the_bid_and_buys_at_the_ask(self):
+        self.assertEqual(self.rate("BTC", "ETH"), self.spread(Decimal(100) / Decimal("10.1")))
+        self.assertEqual(self.rate("ETH", "BTC"), self.spread(Decimal(10) / Decimal(101)))
+
+    def test_rejects_what_it_cannot_price(self):
+        Quote.objects.filter(asset=self.eth).update(time=timezone.now() - timedelta(seconds=convert.QUOTE_MAX_AGE + 1))
+        self.book.load()
+        for from_symbol, to_symbol, error in (
+            ("BTC", "BTC", "Cannot convert an asset to itself"),
+            ("BTC", "DOGE", "No price for DOGE"),
+            ("ETH", "BTC", "Price for ETH is stale"),
+        ):
+            with self.subTest(to_symbol), self.assertRaisesMessage(convert.ConversionError, error):
+                convert.price(self.user.id, from_symbol, to_symbol, 1 * SCALE)
+        with self.assertRaisesMessage(convert.ConversionError, "Amount is too small"):
+            convert.price(self.user.id, "USDT", "BTC", 1)
+
+    def test_execute_moves_the_offered_amounts_once(self):
+        offer = convert.price(self.user.id, "BTC", "USDT", 1 * SCALE)
+
+        conversion = convert.execute(self.user, offer.id)
+
+        self.assertEqual(
+            (conversion.from_amount, conversion.to_amount, conversion.rate), (offer.amount, offer.receive, offer.rate)
+        )
+        self.assertEqual(self.live(self.btc), 1 * SCALE)
+        self.assertEqual(self.live(self.usdt), offer.receive)
+        with self.assertRaisesMessage(convert.ConversionError, "Unknown or already used quote"):
+            convert.execute(self.user, offer.id)
+
+    def test_execute_rejects_other_users_expired_offers_and_missing_funds(self):
+        other = User.objects.create(email="other@example.com")
+        offer = convert.price(self.user.id, "BTC", "USDT", 1 * SCALE)
+        with self.assertRaisesMessage(convert.ConversionError, "Unknown or already used quote"):
+            convert.execute(other, offer.id)
+
+        with mock.patch.object(convert, "CONVERT_QUOTE_TTL", 0):
+            expired = convert.price(self.user.id, "BTC", "USDT", 1 * SCALE)
+        with self.assertRaisesMessage(convert.ConversionError, "Quote expired"):
+            convert.execute(self.user, expired.id)
+
+        too_much = convert.price(self.user.id, "BTC", "USDT", 3 * SCALE)
+        with self.assertRaises(ledger.InsufficientFunds):
+            convert.execute(self.user, too_much.id)
+
+        self.assertFalse(Conversion.objects.exists())
+        self.assertEqual(self.live(self.btc), 2 * SCALE)
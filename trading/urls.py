@@ -0,0 +1,10 @@
+from django.urls import path
+from .views import ConvertQuoteView, ConvertView, OrderBookView, OrderDetailView, OrderListView
+
+urlpatterns = [
+    path("orderbook/<str:pair>/", OrderBookView.as_view(), name="orderbook"),
+    path("orders/", OrderListView.as_view(), name="orders"),
+    path("orders/<int:order_id>/", OrderDetailView.as_view(), name="order-detail"),
+    path("convert/quote/", ConvertQuoteView.as_view(), name="convert-quote"),
+    path("convert/", ConvertView.as_view(), name="convert"),
+]
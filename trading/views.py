@@ -0,0 +1,198 @@
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from assets.ledger import InsufficientFunds, ReservationConflict
+from assets.money import InexactAmount, to_minor
+from trading import convert
+from trading.exchange import OrderRejected, get_exchange
+from trading.feeds import get_book
+from trading.models import Conversion, Order
+from trading.serializers import ConversionSerializer, OrderSerializer, PlaceOrderSerializer
+
+ORDERBOOK_DEFAULT_DEPTH = 20
+ORDERS_PAGE_SIZE = 100
+
+
+class OrderBookView(APIView):
+    """
+    Top-N price levels of a live order book.
+
+    GET /api/trading/orderbook/<pair>/?depth=20
+
+    Response: {
+        "pair": "XBTUSDT",
+        "version": 1042,
+        "timestamp": 1735603200.12,
+        "stale": false,
+        "checksum": 974947235,
+        "bids": [["60010.1", "0.25"], ...],   best first
+        "asks": [["60010.2", "1.10"], ...]
+    }
+    """
+
+    def get(self, request, pair):
+        book = get_book(pair)
+        if book is None:
+            return Response({"error": "Unknown pair"}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            depth = int(request.query_params.get("depth", ORDERBOOK_DEFAULT_DEPTH))
+        except ValueError:
+            return Response({"error": "depth must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= depth <= settings.ORDERBOOK_MAX_DEPTH:
+            return Response(
+                {"error": f"depth must be between 1 and {settings.ORDERBOOK_MAX_DEPTH}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        # The JSON is rendered once per book version and shared by all readers
+        return HttpResponse(book.depth_json(depth), content_type="application/json")
+
+
+class OrderListView(APIView):
+    """
+    GET /api/trading/orders/?pair=BTC/USDT&status=open
+        The user's newest orders (at most 100); ``status=open`` means open or
+        partially filled.
+
+    POST /api/trading/orders/
+        {"pair": "BTC/USDT", "side": "buy", "type": "limit", "price": "60000", "amount": "0.01"}
+        Market orders omit ``price``. Funds are held on entry; the response is
+        the order after matching (201).
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        orders = Order.objects.filter(user=request.user).order_by("-created_at", "-id")
+        pair = request.query_params.get("pair")
+        if pair:
+            orders = orders.filter(pair=pair.upper())
+        order_status = request.query_params.get("status")
+        if order_status == "open":
+            orders = orders.filter(status__in=Order.ACTIVE_STATUSES)
+        elif order_status:
+            orders = orders.filter(status=order_status)
+        return Response(OrderSerializer(orders[:ORDERS_PAGE_SIZE], many=True).data)
+
+    def post(self, request):
+        serializer = PlaceOrderSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+
+        exchange = get_exchange(data["pair"])
+        if exchange is None:
+            return Response({"error": "Pair is not tradable"}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            order = exchange.place(request.user, data["side"], data["amount"], data.get("price"))
+        except (OrderRejected, InsufficientFunds) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except ReservationConflict as e:
+            return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
+        return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
+
+
+class OrderDetailView(APIView):
+    """
+    GET /api/trading/orders/<id>/     the order
+    DELETE /api/trading/orders/<id>/  cancel it and release its hold
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, order_id):
+        order = Order.objects.filter(pk=order_id, user=request.user).first()
+        if order is None:
+            return Response({"error": "Order not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(OrderSerializer(order).data)
+
+    def delete(self, request, order_id):
+        order = Order.objects.filter(pk=order_id, user=request.user).first()
+        if order is None:
+            return Response({"error": "Order not found"}, status=status.HTTP_404_NOT_FOUND)
+        exchange = get_exchange(order.pair)
+        if exchange is None:
+            return Response({"error": "Pair is not tradable"}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            order = exchange.cancel(order)
+        except OrderRejected as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(OrderSerializer(order).data)
+
+
+class ConvertQuoteView(APIView):
+    """
+    Price a conversion and lock it for a few seconds.
+
+    POST /api/trading/convert/quote/
+        {"from": "BTC", "to": "USDT", "amount": "0.1"}
+
+    Response: {
+        "quote_id": "kP3...",
+        "from": "BTC",
+        "to": "USDT",
+        "amount": "0.1",
+        "receive": "5994.00000000",
+        "rate": "59940.0000000000",
+        "expires_at": "2026-01-01T10:00:10+00:00"
+    }
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        from_symbol = str(request.data.get("from", "")).upper().strip()
+        to_symbol = str(request.data.get("to", "")).upper().strip()
+        amount_str = str(request.data.get("amount", "")).strip()
+        if not all([from_symbol, to_symbol, amount_str]):
+            return Response(
+                {"error": "Missing required fields: from, to, amount"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            amount = to_minor(amount_str)
+            if amount <= 0:
+                raise InexactAmount()
+        except InexactAmount:
+            return Response(
+                {"error": "Invalid amount. Must be a positive number with at most 8 decimals."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            offer = convert.price(request.user.id, from_symbol, to_symbol, amount)
+        except convert.ConversionError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(offer.as_dict())
+
+
+class ConvertView(APIView):
+    """
+    GET /api/trading/convert/   the user's newest conversions (at most 100)
+
+    POST /api/trading/convert/  {"quote_id": "kP3..."}
+        Executes a locked quote at its quoted amounts; each quote works once.
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        conversions = (
+            Conversion.objects.filter(user=request.user)
+            .select_related("from_asset", "to_asset")
+            .order_by("-created_at", "-id")[:ORDERS_PAGE_SIZE]
+        )
+        return Response(ConversionSerializer(conversions, many=True).data)
+
+    def post(self, request):
+        quote_id = str(request.data.get("quote_id", "")).strip()
+        if not quote_id:
+            return Response({"error": "Missing required field: quote_id"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            conversion = convert.execute(request.user, quote_id)
+        except (convert.ConversionError, InsufficientFunds) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except ReservationConflict as e:
+            return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
+        return Response(ConversionSerializer(conversion).data, status=status.HTTP_201_CREATED)